@@ -0,0 +1,122 @@
+'''Time the redraw of NSphere segments with a stubbed draw manager.
+
+The legacy drawing interpolates the spheres of every segment on every redraw with one sphere per unit.
+The cached drawing uses DrawCache, so only the segments that moved are interpolated and the number of spheres is capped.
+
+Usage:
+    python -m benchmarks.DrawBenchmark [segments] [frames]
+'''
+
+import math
+import random
+import sys
+import time
+import DrawCache
+
+
+class StubDrawManager(object):
+    '''Class used in place of MUIDrawManager, which only counts the draw calls.'''
+
+    def __init__(self):
+        '''Constructor'''
+
+        self.m_spheres = 0
+
+    def sphere(self, _centre, _radius, _filled):
+        '''Count a sphere.'''
+
+        self.m_spheres += 1
+
+
+def makeSegments(_count, _seed=1):
+    '''Make segments with long bones.
+
+    Args:
+        _count: The number of segments
+        _seed: The random seed
+
+    Returns:
+        list: The (position, parent position, scale, parent radius) of each segment
+    '''
+
+    random.seed(_seed)
+    segments = []
+    for i in range(_count):
+        position = tuple(random.uniform(-50.0, 50.0) for _ in range(3))
+        direction = [random.gauss(0.0, 1.0) for _ in range(3)]
+        length = random.uniform(5.0, 100.0) / math.sqrt(sum(d * d for d in direction))
+        parentPosition = tuple(p + d * length for p, d in zip(position, direction))
+        scale = (random.uniform(0.5, 3.0),) * 3
+        segments.append((position, parentPosition, scale, random.uniform(0.5, 3.0)))
+    return segments
+
+
+def legacyDraw(_segments, _drawManager):
+    '''Interpolate and draw every segment in the same way as the original prepareForDraw and addUIDrawables.'''
+
+    for position, parentPosition, scale, parentRadius in _segments:
+        radius = max(scale)
+        offset = [p - q for p, q in zip(parentPosition, position)]
+        numUnits = math.sqrt(sum(o * o for o in offset))
+        unit = [o / numUnits for o in offset]
+        radiusUnit = (parentRadius - radius) / numUnits
+        centres = []
+        radii = []
+        for i in range(int(numUnits) + 1):
+            centres.append(tuple(u * i / s for u, s in zip(unit, scale)))
+            radii.append((radius + radiusUnit * i) / radius)
+        for centre, r in zip(centres, radii):
+            _drawManager.sphere(centre, r, True)
+
+
+def cachedDraw(_segments, _caches, _pixelLengths, _drawManager):
+    '''Update the draw cache of every segment and draw it.'''
+
+    for (position, parentPosition, scale, parentRadius), cache, pixelLength in zip(_segments, _caches, _pixelLengths):
+        offset = [p - q for p, q in zip(parentPosition, position)]
+        count = cache.sphereCount(math.sqrt(sum(o * o for o in offset)), pixelLength)
+        cache.update(position, parentPosition, scale, parentRadius, count)
+        for centre, r in zip(cache.m_centres, cache.m_radii):
+            _drawManager.sphere(centre, r, True)
+
+
+def run(_segmentCount=500, _frames=60, _movedPerFrame=1):
+    '''Time both ways of drawing while a few segments move each frame.
+
+    Args:
+        _segmentCount: The number of segments
+        _frames: The number of redraws
+        _movedPerFrame: The number of segments moved before each redraw
+
+    Returns:
+        dict: The time per frame in milliseconds and the spheres drawn per frame for each way of drawing
+    '''
+
+    segments = makeSegments(_segmentCount)
+    caches = [DrawCache.DrawCache() for _ in segments]
+    # The segments on screen are about 2 pixels per unit long
+    pixelLengths = [2.0 * math.sqrt(sum((p - q) ** 2 for p, q in zip(s[0], s[1]))) for s in segments]
+    results = {}
+    for name in ("legacy", "cached"):
+        drawManager = StubDrawManager()
+        random.seed(2)
+        frameSegments = list(segments)
+        start = time.time()
+        for frame in range(_frames):
+            for _ in range(_movedPerFrame):
+                i = random.randrange(len(frameSegments))
+                position, parentPosition, scale, parentRadius = frameSegments[i]
+                frameSegments[i] = (tuple(p + 0.1 for p in position), parentPosition, scale, parentRadius)
+            if name == "legacy":
+                legacyDraw(frameSegments, drawManager)
+            else:
+                cachedDraw(frameSegments, caches, pixelLengths, drawManager)
+        elapsed = time.time() - start
+        results[name] = {"msPerFrame": 1000.0 * elapsed / _frames, "spheresPerFrame": drawManager.m_spheres / float(_frames)}
+    return results
+
+
+if __name__ == "__main__":
+    arguments = [int(a) for a in sys.argv[1:3]]
+    for name, result in sorted(run(*arguments).items()):
+        print("%s: %.2f ms per frame, %.0f spheres per frame" % (name, result["msPerFrame"], result["spheresPerFrame"]))
@@ -0,0 +1,280 @@
+'''Time each stage of the export on synthetic rigs and store the results as JSON.
+
+Every case is run in a new process so its peak memory is measured on its own.
+The stages are finding the bounding box, sampling the points and writing them as binary and ascii .ply files.
+The mirror sampler only samples half of a mirrored rig, and checks its points match sampling the whole grid.
+The progressive sampler records the time each level is sampled by, and checks the points of the last level match sampling the whole grid.
+Cases with more voxels than --max-voxels are recorded as skipped.
+
+Usage:
+    python -m benchmarks.ExportBenchmark --output results.json
+    python -m benchmarks.ExportBenchmark --counts 100,500 --workers all --output workers.json
+    python -m benchmarks.ExportBenchmark --output new.json --compare results.json
+    python -m benchmarks.ExportBenchmark --samplers adaptive,progressive --levels 4 --output progressive.json
+'''
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import ProgressiveSampler
+import SDFExporter
+import SDFSampler
+from benchmarks import RigGenerator
+try:
+    import PointCloudExport
+except SyntaxError:
+    # PointCloudExport is written for the Python 2 interpreter of Maya, so the legacy sampler can only be timed with Python 2
+    PointCloudExport = None
+
+
+def caseKey(_case):
+    '''Find the key used to match a case between runs.
+
+    Args:
+        _case: The case dictionary
+
+    Returns:
+        tuple: The settings of the case
+    '''
+
+    return (_case["shape"], _case["count"], _case["voxelSize"], _case["smoothness"], _case["sampler"], _case["workers"])
+
+
+def peakMemoryMB():
+    '''Find the peak resident memory of this process.
+
+    Returns:
+        float: The peak memory in megabytes
+    '''
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes and macOS reports bytes
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+def runCase(_case):
+    '''Run one case, this is called in a new process.
+
+    Args:
+        _case: A dictionary of the shape, count, voxelSize, smoothness, sampler, workers, levels, seed and maxVoxels
+
+    Returns:
+        dict: The case with the time of each stage, the rates and the peak memory added
+    '''
+
+    result = dict(_case)
+    sdCapsuleData = RigGenerator.RigGenerator(_case["seed"]).generate(_case["shape"], _case["count"])
+    exporter = SDFExporter.SDFExporter()
+
+    start = time.time()
+    bbox = exporter.findBoundingBox(sdCapsuleData, _case["voxelSize"])
+    result["boundingBoxSeconds"] = time.time() - start
+
+    if _case["sampler"] == "legacy":
+        sampler = SDFSampler.SDFSampler(sdCapsuleData, _case["smoothness"])
+    else:
+        mirror = "auto" if _case["sampler"] == "mirror" else None
+        # The progressive sampler splits each level across the workers itself, so it needs the AdaptiveSampler
+        workers = _case["workers"] if _case["sampler"] != "progressive" else 1
+        sampler = exporter.createSampler(sdCapsuleData, _case["smoothness"], _case["sampler"] != "dense", 1e-4, workers, _mirror=mirror)
+    axes = sampler.axes(_case["voxelSize"], bbox)
+    if _case["sampler"] == "progressive":
+        sampler = ProgressiveSampler.ProgressiveSampler(sampler, _case["levels"], _workers=_case["workers"])
+    voxels = int(np.prod([len(a) for a in axes]))
+    result["voxels"] = voxels
+    if voxels > _case["maxVoxels"]:
+        result["skipped"] = "more than %d voxels" % _case["maxVoxels"]
+        return result
+    if _case["sampler"] == "legacy" and PointCloudExport is None:
+        result["skipped"] = "the legacy sampler needs Python 2"
+        return result
+
+    if _case["sampler"] == "legacy":
+        # The scalar PointCloudExporter.calculateSD is too slow for the whole grid, so time a sample of the voxels
+        points = sampler.gridPoints(*axes)
+        points = points[np.linspace(0, len(points) - 1, min(len(points), 2000)).astype(np.int64)]
+        pce = PointCloudExport.PointCloudExporter()
+        start = time.time()
+        for point in points:
+            pce.calculateSD(point.tolist(), sdCapsuleData, _case["smoothness"])
+        seconds = time.time() - start
+        result["sampleSeconds"] = seconds * voxels / float(len(points))
+        result["voxelsPerSecond"] = len(points) / seconds
+        result["estimated"] = True
+        result["peakMemoryMB"] = peakMemoryMB()
+        return result
+
+    start = time.time()
+    if _case["sampler"] == "progressive":
+        # The time each level is ready by, the first is when a preview can be written
+        result["levelSeconds"] = []
+        for stride, dims, levelPoints in sampler.iterateLevels(_case["voxelSize"], bbox):
+            result["levelSeconds"].append(time.time() - start)
+        points = levelPoints.points()
+        result["voxelsSampled"] = sum(sampler.m_voxelsSampled)
+    else:
+        points = sampler.sampleSD(_case["voxelSize"], bbox)
+    result["sampleSeconds"] = time.time() - start
+    result["points"] = len(points)
+    result["voxelsPerSecond"] = voxels / max(result["sampleSeconds"], 1e-9)
+    if _case["sampler"] == "mirror":
+        result["mirrored"] = getattr(sampler, "m_positionsMirrored", 0) > 0
+    if _case["sampler"] in ("mirror", "progressive"):
+        # Mirroring and refining must give exactly the points of the whole grid, in the same order
+        fullSampler = exporter.createSampler(sdCapsuleData, _case["smoothness"], True, 1e-4, _case["workers"])
+        result["matchesFullSweep"] = bool(np.array_equal(points, fullSampler.sampleSD(_case["voxelSize"], bbox)))
+
+    folder = tempfile.mkdtemp()
+    try:
+        for name, binary in (("Binary", True), ("Ascii", False)):
+            start = time.time()
+            exporter.write(os.path.join(folder, "points" + name), points, binary)
+            seconds = time.time() - start
+            result["write" + name + "Seconds"] = seconds
+            result["write" + name + "PointsPerSecond"] = len(points) / max(seconds, 1e-9)
+            result["write" + name + "Bytes"] = os.path.getsize(os.path.join(folder, "points" + name + ".ply"))
+    finally:
+        shutil.rmtree(folder)
+    result["peakMemoryMB"] = peakMemoryMB()
+    return result
+
+
+def makeCases(_args):
+    '''Make every combination of the settings.
+
+    Args:
+        _args: The parsed command line options
+
+    Returns:
+        list: A dictionary for each case
+    '''
+
+    workers = range(1, multiprocessing.cpu_count() + 1) if _args.workers == "all" else [int(w) for w in _args.workers.split(",")]
+    cases = []
+    for shape in _args.shapes.split(","):
+        for count in [int(c) for c in _args.counts.split(",")]:
+            for voxelSize in [float(v) for v in _args.voxel_sizes.split(",")]:
+                for smoothness in [float(k) for k in _args.smoothness.split(",")]:
+                    for sampler in _args.samplers.split(","):
+                        # The worker count does not change the legacy sampler
+                        for worker in (workers if sampler != "legacy" else [1]):
+                            cases.append({
+                                "shape": shape,
+                                "count": count,
+                                "voxelSize": voxelSize,
+                                "smoothness": smoothness,
+                                "sampler": sampler,
+                                "workers": worker,
+                                "levels": _args.levels,
+                                "seed": _args.seed,
+                                "maxVoxels": _args.max_voxels
+                            })
+    return cases
+
+
+def gitCommit():
+    '''Find the commit of the repository.
+
+    Returns:
+        str: The commit hash, or None if it is not known
+    '''
+
+    try:
+        output = subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.STDOUT)
+        return output.decode("ascii").strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(_results, _previous):
+    '''Print the change in the time of each stage from a previous run.
+
+    Args:
+        _results: The results of this run
+        _previous: The results of the previous run
+    '''
+
+    previous = dict((caseKey(r), r) for r in _previous["results"])
+    stages = ("boundingBoxSeconds", "sampleSeconds", "writeBinarySeconds", "writeAsciiSeconds")
+    for result in _results["results"]:
+        old = previous.get(caseKey(result))
+        if old is None or "skipped" in result or "skipped" in old:
+            continue
+        ratios = ["%s x%.2f" % (stage[:-7], old[stage] / max(result[stage], 1e-9)) for stage in stages if stage in result and stage in old]
+        print("%-48s speedup %s" % (" ".join(str(v) for v in caseKey(result)), ", ".join(ratios)))
+
+
+def main(_arguments=None):
+    '''Run the benchmark.
+
+    Args:
+        _arguments: The command line arguments, by default sys.argv
+
+    Returns:
+        int: The exit code
+    '''
+
+    parser = argparse.ArgumentParser(description="Time each stage of the export on synthetic rigs.")
+    parser.add_argument("--shapes", default="chain,star,tree", help="Comma separated rig shapes")
+    parser.add_argument("--counts", default="8,100,500,2000", help="Comma separated numbers of capsules")
+    parser.add_argument("--voxel-sizes", default="0.4,0.2", help="Comma separated voxel sizes")
+    parser.add_argument("--smoothness", default="4,16", help="Comma separated smoothness constants")
+    parser.add_argument("--samplers", default="dense,adaptive", help="Comma separated samplers: dense, adaptive, mirror, progressive or legacy")
+    parser.add_argument("--workers", default="1", help="Comma separated worker counts, or all for 1 to the number of CPUs")
+    parser.add_argument("--levels", type=int, default=4, help="The number of levels of the progressive sampler")
+    parser.add_argument("--seed", type=int, default=0, help="The random seed of the rigs")
+    parser.add_argument("--max-voxels", type=int, default=20000000, help="Skip cases with more voxels than this")
+    parser.add_argument("--output", default="benchmark.json", help="The JSON file to write the results to")
+    parser.add_argument("--compare", help="A JSON file from a previous run to compare with")
+    args = parser.parse_args(sys.argv[1:] if _arguments is None else _arguments)
+
+    results = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": gitCommit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpuCount": multiprocessing.cpu_count()
+        },
+        "results": []
+    }
+    failed = False
+    for case in makeCases(args):
+        # A new process for every case, so the peak memory is only of that case
+        pool = multiprocessing.Pool(1, maxtasksperchild=1)
+        try:
+            result = pool.apply(runCase, (case,))
+        finally:
+            pool.close()
+            pool.join()
+        results["results"].append(result)
+        if "skipped" in result:
+            print("%-48s skipped, %s" % (" ".join(str(v) for v in caseKey(result)), result["skipped"]))
+        else:
+            print("%-48s sample %.3fs (%.2e voxels/s), %.0f MB" % (" ".join(str(v) for v in caseKey(result)), result["sampleSeconds"], result["voxelsPerSecond"], result["peakMemoryMB"]))
+            if "levelSeconds" in result:
+                print("%-48s first level %.3fs" % (" ".join(str(v) for v in caseKey(result)), result["levelSeconds"][0]))
+        if result.get("matchesFullSweep") is False:
+            print("%-48s points do not match the whole grid" % " ".join(str(v) for v in caseKey(result)))
+            failed = True
+
+    with open(args.output, "w") as outputFile:
+        json.dump(results, outputFile, indent=1, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as inputFile:
+            compare(results, json.load(inputFile))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+'''Compare the size, write time and load time of the point cloud formats on one sampled rig and store the results as JSON.
+
+The formats are the ascii and binary .ply files and the .vpc voxel point cloud with every index or with the runs along the z rows.
+The .vpc files are loaded both memory mapped and read into memory, and every format is checked to load the sampled points.
+The default rig and voxel size sample about four million points.
+
+Usage:
+    python -m benchmarks.FormatBenchmark --output formats.json
+    python -m benchmarks.FormatBenchmark --shape chain --count 100 --voxel-size 0.05 --output formats.json
+'''
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+import PLYFile
+import SDFExporter
+import VoxelFile
+import VoxelPoints
+from benchmarks import RigGenerator
+from benchmarks.ExportBenchmark import gitCommit
+
+
+def timeFormat(_name, _write, _load, _filePath, _points):
+    '''Write and load one format.
+
+    Args:
+        _name: The name of the format
+        _write: A function which writes the file
+        _load: A function which loads the file and returns an (M, 3) array of positions, or VoxelPoints
+        _filePath: The path of the file written
+        _points: The sampled points the loaded positions must match
+
+    Returns:
+        dict: The size, the write and load times and whether the positions match,
+            the load time of VoxelPoints is split into opening the file and finding the positions
+    '''
+
+    start = time.time()
+    _write()
+    writeSeconds = time.time() - start
+    start = time.time()
+    loaded = _load()
+    loadSeconds = time.time() - start
+    result = {}
+    if isinstance(loaded, VoxelPoints.VoxelPoints):
+        result["openSeconds"] = loadSeconds
+        start = time.time()
+        loaded = loaded.points()
+        result["positionsSeconds"] = time.time() - start
+        loadSeconds += result["positionsSeconds"]
+    # The .ply files store float32 positions, the .vpc files the exact voxel indices
+    matches = np.allclose(loaded, _points, rtol=0, atol=1e-5) if loaded.dtype == np.float32 else np.array_equal(loaded, _points)
+    result.update({
+        "format": _name,
+        "bytes": os.path.getsize(_filePath),
+        "bytesPerPoint": os.path.getsize(_filePath) / float(max(len(_points), 1)),
+        "writeSeconds": writeSeconds,
+        "loadSeconds": loadSeconds,
+        "matches": bool(matches)
+    })
+    return result
+
+
+def main(_arguments=None):
+    '''Run the benchmark.
+
+    Args:
+        _arguments: The command line arguments, by default sys.argv
+
+    Returns:
+        int: The exit code
+    '''
+
+    parser = argparse.ArgumentParser(description="Compare the size, write time and load time of the point cloud formats.")
+    parser.add_argument("--shape", default="tree", help="The rig shape")
+    parser.add_argument("--count", type=int, default=500, help="The number of capsules")
+    parser.add_argument("--voxel-size", type=float, default=0.035, help="The voxel size")
+    parser.add_argument("--smoothness", type=float, default=4, help="The smoothness constant")
+    parser.add_argument("--seed", type=int, default=0, help="The random seed of the rig")
+    parser.add_argument("--output", default="formats.json", help="The JSON file to write the results to")
+    args = parser.parse_args(sys.argv[1:] if _arguments is None else _arguments)
+
+    sdCapsuleData = RigGenerator.RigGenerator(args.seed).generate(args.shape, args.count)
+    exporter = SDFExporter.SDFExporter()
+    bbox = exporter.findBoundingBox(sdCapsuleData, args.voxel_size)
+    sampler = exporter.createSampler(sdCapsuleData, args.smoothness, True, 1e-4, 1)
+    points = sampler.sampleSD(args.voxel_size, bbox)
+    dims = sampler.dims(args.voxel_size, bbox)
+
+    results = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": gitCommit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "shape": args.shape,
+            "count": args.count,
+            "voxelSize": args.voxel_size,
+            "smoothness": args.smoothness,
+            "dims": list(dims),
+            "points": len(points)
+        },
+        "results": []
+    }
+    plyFile = PLYFile.PLYFile()
+    voxelFile = VoxelFile.VoxelFile()
+    folder = tempfile.mkdtemp()
+    try:
+        for name, binary in (("ply ascii", False), ("ply binary", True)):
+            filePath = os.path.join(folder, name.replace(" ", "") + ".ply")
+            results["results"].append(timeFormat(
+                name,
+                lambda: plyFile.write(filePath, points, binary),
+                lambda: plyFile.read(filePath),
+                filePath, points))
+        for name, runs in (("vpc indices", False), ("vpc runs", True)):
+            filePath = os.path.join(folder, name.replace(" ", "") + ".vpc")
+            for mmap in (True, False):
+                results["results"].append(timeFormat(
+                    name + (" mmap" if mmap else ""),
+                    lambda: voxelFile.write(filePath, points, dims, bbox[0], args.voxel_size, runs),
+                    lambda: voxelFile.read(filePath, mmap),
+                    filePath, points))
+    finally:
+        shutil.rmtree(folder)
+
+    print("%d points, %d x %d x %d voxels" % ((len(points),) + tuple(dims)))
+    for result in results["results"]:
+        opened = " (open %.3fs)" % result["openSeconds"] if "openSeconds" in result else ""
+        print("%-18s %12d bytes %6.2f bytes/point, write %.3fs, load %.3fs%s%s" % (result["format"], result["bytes"], result["bytesPerPoint"], result["writeSeconds"], result["loadSeconds"], opened, "" if result["matches"] else ", DOES NOT MATCH"))
+    with open(args.output, "w") as outputFile:
+        json.dump(results, outputFile, indent=1, sort_keys=True)
+    return 0 if all(result["matches"] for result in results["results"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
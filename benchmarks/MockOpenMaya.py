@@ -0,0 +1,312 @@
+'''A mock of the parts of maya.api.OpenMaya used by NSphereGraph, with a scene of NSphere nodes which the tests can edit.
+
+Each NSphere node has a transform with a position and scale, and parentN and childN connections to other NSpheres.
+Transforms can be parented under group transforms, and the world matrix is found from the chain of parents without rotations.
+Moving an NSphere or a group calls the world matrix callbacks of every transform below it, and deleting an NSphere calls the node removed callbacks, as Maya does.
+Use it in place of OpenMaya by setting the om attribute of the module under test, for example NSphereGraph.om = MockOpenMaya.
+'''
+
+# The callbacks by id, each is (the node, the function, the client data)
+m_worldMatrixCallbacks = {}
+# The node removed callbacks by id, each is (the node type, the function, the client data)
+m_nodeRemovedCallbacks = {}
+m_nextCallbackId = [0]
+
+
+class MSpace(object):
+    kWorld = 4
+
+
+class MVector(object):
+    '''Stub of MVector with the components.'''
+
+    def __init__(self, _x=0.0, _y=0.0, _z=0.0):
+        self.x, self.y, self.z = float(_x), float(_y), float(_z)
+
+
+class MObject(object):
+    '''A node of the scene.'''
+
+    def __init__(self, _kind, _hashCode):
+        '''Constructor
+
+        Args:
+            _kind: Either "NSphere" or "transform"
+            _hashCode: The hash code of the node, Maya can give a new node the hash code of a deleted one
+        '''
+
+        self.m_kind = _kind
+        self.m_hashCode = _hashCode
+        self.m_alive = True
+        # The transform of an NSphere
+        self.m_transform = None
+        # The parent group of a transform, or None if it is in the world
+        self.m_parent = None
+        # The position and scale of a transform relative to its parent
+        self.m_translation = (0.0, 0.0, 0.0)
+        self.m_scale = (1.0, 1.0, 1.0)
+        # The NSpheres connected to the parentN and childN attributes of an NSphere
+        self.m_parentN = None
+        self.m_childN = []
+
+
+class Scene(object):
+    '''The NSphere nodes of the mock scene.'''
+
+    def __init__(self):
+        '''Constructor, removing every callback of the previous scene.'''
+
+        m_worldMatrixCallbacks.clear()
+        m_nodeRemovedCallbacks.clear()
+        self.m_nextHashCode = 1
+
+    def createNSphere(self, _position, _radius, _parent=None, _hashCode=None, _group=None):
+        '''Create an NSphere and its transform.
+
+        Args:
+            _position: The (x, y, z) position relative to the group
+            _radius: The radius, which is the uniform scale of the transform
+            _parent: The parent NSphere to connect to, or None
+            _hashCode: The hash code of the NSphere node, by default a new one
+            _group: The group transform to parent the transform under, or None
+
+        Returns:
+            MObject: The NSphere node
+        '''
+
+        if _hashCode is None:
+            _hashCode = self.m_nextHashCode
+        self.m_nextHashCode = max(self.m_nextHashCode, _hashCode) + 2
+        node = MObject("NSphere", _hashCode)
+        node.m_transform = MObject("transform", _hashCode + 1)
+        node.m_transform.m_parent = _group
+        self.move(node, _position, _radius)
+        if _parent is not None:
+            self.connect(_parent, node)
+        return node
+
+    def createGroup(self, _position=(0.0, 0.0, 0.0), _scale=1.0, _group=None):
+        '''Create a group transform with no NSphere.
+
+        Args:
+            _position: The (x, y, z) position relative to the parent group
+            _scale: The uniform scale
+            _group: The group transform to parent it under, or None
+
+        Returns:
+            MObject: The transform
+        '''
+
+        group = MObject("transform", self.m_nextHashCode)
+        self.m_nextHashCode += 1
+        group.m_parent = _group
+        self.move(group, _position, _scale)
+        return group
+
+    def move(self, _node, _position, _radius=None):
+        '''Move an NSphere or a group and call the world matrix callbacks of every transform below it.
+
+        Args:
+            _node: The NSphere node or group transform
+            _position: The (x, y, z) position relative to the parent group
+            _radius: The radius or uniform scale, or None to keep it
+        '''
+
+        transform = _node.m_transform if _node.m_kind == "NSphere" else _node
+        transform.m_translation = tuple(float(p) for p in _position)
+        if _radius is not None:
+            transform.m_scale = (float(_radius),) * 3
+        for node, function, clientData in list(m_worldMatrixCallbacks.values()):
+            if transform in self.ancestors(node):
+                function(node, 0, clientData)
+
+    def ancestors(self, _transform):
+        '''Find a transform and the groups above it, from the transform up to the world.'''
+
+        transforms = []
+        while _transform is not None:
+            transforms.append(_transform)
+            _transform = _transform.m_parent
+        return transforms
+
+    def worldMatrix(self, _node):
+        '''Find the world position and scale of an NSphere or a transform, see MDagPath.inclusiveMatrix.'''
+
+        transform = _node.m_transform if _node.m_kind == "NSphere" else _node
+        return MDagPath(transform).inclusiveMatrix()
+
+    def connect(self, _parent, _child):
+        '''Connect the childN attribute of an NSphere to the parentN attribute of another.'''
+
+        self.disconnect(_child)
+        _child.m_parentN = _parent
+        _parent.m_childN.append(_child)
+
+    def disconnect(self, _child):
+        '''Disconnect an NSphere from its parent.'''
+
+        if _child.m_parentN is not None:
+            _child.m_parentN.m_childN.remove(_child)
+            _child.m_parentN = None
+
+    def delete(self, _node, _notify=True):
+        '''Delete an NSphere and its transform, disconnecting it first.
+
+        Args:
+            _node: The NSphere node
+            _notify: Call the node removed callbacks, turn this off to act as if a callback was missed
+        '''
+
+        self.disconnect(_node)
+        for child in list(_node.m_childN):
+            self.disconnect(child)
+        if _notify:
+            for nodeType, function, clientData in list(m_nodeRemovedCallbacks.values()):
+                if nodeType == _node.m_kind:
+                    function(_node, clientData)
+        _node.m_alive = False
+        _node.m_transform.m_alive = False
+
+    def callbackCount(self):
+        '''Find the number of world matrix callbacks which have not been removed.'''
+
+        return len(m_worldMatrixCallbacks)
+
+
+class MObjectHandle(object):
+
+    def __init__(self, _node):
+        self.m_node = _node
+
+    def hashCode(self):
+        return self.m_node.m_hashCode
+
+    def isValid(self):
+        return self.m_node.m_alive
+
+    def isAlive(self):
+        return self.m_node.m_alive
+
+    def object(self):
+        return self.m_node
+
+
+class MDagPath(object):
+
+    def __init__(self, _node):
+        self.m_node = _node
+
+    def inclusiveMatrix(self):
+        '''The mock matrix is the world translation and scale, found by applying the groups above the transform in turn.'''
+
+        translation = self.m_node.m_translation
+        scale = self.m_node.m_scale
+        group = self.m_node.m_parent
+        while group is not None:
+            translation = tuple(group.m_translation[i] + group.m_scale[i] * translation[i] for i in range(3))
+            scale = tuple(group.m_scale[i] * scale[i] for i in range(3))
+            group = group.m_parent
+        return (translation, scale)
+
+
+class MTransformationMatrix(object):
+
+    def __init__(self, _matrix):
+        self.m_matrix = _matrix
+
+    def translation(self, _space):
+        return MVector(*self.m_matrix[0])
+
+    def scale(self, _space):
+        return list(self.m_matrix[1])
+
+
+class MFnDagNode(object):
+
+    def __init__(self, _node):
+        self.m_node = _node
+
+    def parent(self, _index):
+        '''The transform of an NSphere, or the group of a transform.'''
+
+        if self.m_node.m_kind == "NSphere":
+            return self.m_node.m_transform
+        return self.m_node.m_parent
+
+    def getPath(self):
+        return MDagPath(self.m_node)
+
+
+class MFnDependencyNode(object):
+
+    def __init__(self):
+        self.m_node = None
+
+    def setObject(self, _node):
+        self.m_node = _node
+
+    def attribute(self, _name):
+        '''The mock attributes are their names.'''
+
+        return _name
+
+
+class MPlug(object):
+
+    def __init__(self, _node=None, _attribute=None):
+        self.m_node = _node
+        self.m_attribute = _attribute
+
+    @property
+    def isNull(self):
+        return self.m_node is None
+
+    def node(self):
+        return self.m_node
+
+    def source(self):
+        '''The childN plug of the parent connected to a parentN plug.'''
+
+        if self.m_attribute == "parentN" and self.m_node.m_parentN is not None:
+            return MPlug(self.m_node.m_parentN, "childN")
+        return MPlug()
+
+    def destinations(self):
+        '''The parentN plugs of the children connected to a childN plug.'''
+
+        if self.m_attribute == "childN":
+            return [MPlug(child, "parentN") for child in self.m_node.m_childN]
+        return []
+
+
+class MMessage(object):
+
+    @staticmethod
+    def removeCallback(_id):
+        if _id in m_nodeRemovedCallbacks:
+            del m_nodeRemovedCallbacks[_id]
+        else:
+            del m_worldMatrixCallbacks[_id]
+
+    @staticmethod
+    def removeCallbacks(_ids):
+        for callbackId in _ids:
+            MMessage.removeCallback(callbackId)
+
+
+class MDagMessage(object):
+
+    @staticmethod
+    def addWorldMatrixModifiedCallback(_path, _function, _clientData=None):
+        m_nextCallbackId[0] += 1
+        m_worldMatrixCallbacks[m_nextCallbackId[0]] = (_path.m_node, _function, _clientData)
+        return m_nextCallbackId[0]
+
+
+class MDGMessage(object):
+
+    @staticmethod
+    def addNodeRemovedCallback(_function, _nodeType="dependNode", _clientData=None):
+        m_nextCallbackId[0] += 1
+        m_nodeRemovedCallbacks[m_nextCallbackId[0]] = (_nodeType, _function, _clientData)
+        return m_nextCallbackId[0]
@@ -0,0 +1,93 @@
+import math
+import random
+
+
+class RigGenerator(object):
+    '''Class used for generating synthetic NSphere rigs.
+
+    The rigs are capsule lists in the same format as PointCloudExporter.findLineSegments,
+    [parent position, parent radius, child position, child radius] for every connected pair of NSpheres.
+    chain: every NSphere is the child of the one before it.
+    star: arms of chains which all start at the root NSphere.
+    tree: every NSphere is the child of a random earlier NSphere, so the rig branches.
+    mirrored: a tree and its mirror image across the x = 0 plane, like a symmetric character. The count is rounded up to an even number.
+    '''
+
+    m_shapes = ("chain", "star", "tree", "mirrored")
+
+    def __init__(self, _seed=0, _minRadius=0.2, _maxRadius=0.8):
+        '''Constructor
+
+        Args:
+            _seed: The random seed, so the same rig is generated every time
+            _minRadius: The smallest NSphere radius
+            _maxRadius: The largest NSphere radius
+        '''
+
+        self.m_random = random.Random(_seed)
+        self.m_minRadius = _minRadius
+        self.m_maxRadius = _maxRadius
+
+    def generate(self, _shape, _count):
+        '''Generate a rig.
+
+        Args:
+            _shape: One of m_shapes
+            _count: The number of capsules
+
+        Returns:
+            list: The sdCapsule data in the format [x, y, z, r, x, y, z, r, ...]
+        '''
+
+        if _shape not in self.m_shapes:
+            raise ValueError("Unknown rig shape: " + str(_shape))
+        if _shape == "mirrored":
+            half = self.generate("tree", (_count + 1) // 2)
+            mirrored = list(half)
+            for i in range(0, len(mirrored), 4):
+                mirrored[i] = -mirrored[i]
+            return half + mirrored
+        root = (0.0, 0.0, 0.0, self.radius())
+        spheres = [root]
+        sdCapsuleData = []
+        if _shape == "star":
+            arms = max(1, int(round(math.sqrt(_count))))
+            tips = [root] * arms
+        for i in range(_count):
+            if _shape == "chain":
+                parent = spheres[-1]
+            elif _shape == "star":
+                parent = tips[i % len(tips)]
+            else:
+                parent = self.m_random.choice(spheres)
+            child = self.child(parent)
+            if _shape == "star":
+                tips[i % len(tips)] = child
+            spheres.append(child)
+            sdCapsuleData.extend(parent + child)
+        return sdCapsuleData
+
+    def radius(self):
+        '''Find a random NSphere radius.
+
+        Returns:
+            float: The radius
+        '''
+
+        return self.m_random.uniform(self.m_minRadius, self.m_maxRadius)
+
+    def child(self, _parent):
+        '''Place a child NSphere a random direction away from its parent, far enough that the capsule is longer than its radii.
+
+        Args:
+            _parent: The (x, y, z, r) data of the parent NSphere
+
+        Returns:
+            tuple: The (x, y, z, r) data of the child NSphere
+        '''
+
+        radius = self.radius()
+        direction = [self.m_random.gauss(0.0, 1.0) for _ in range(3)]
+        length = math.sqrt(sum(d * d for d in direction)) or 1.0
+        distance = (_parent[3] + radius) * self.m_random.uniform(0.75, 1.5)
+        return tuple(p + d * distance / length for p, d in zip(_parent[0:3], direction)) + (radius,)
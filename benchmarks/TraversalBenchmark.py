@@ -0,0 +1,146 @@
+'''Time the traversal of chains of NSpheres by NSphereGraph with a mock OpenMaya.
+
+The legacy traversal keeps the visited nodes in a list and scans it for every child, as before the hashed visited set,
+so it takes quadratic time on long chains. The other traversals use NSphereGraph:
+cold reads every NSphere, warm reads none as nothing moved, and moved reads the one NSphere moved before it.
+
+Usage:
+    python -m benchmarks.TraversalBenchmark [counts...]
+'''
+
+import sys
+import time
+import NSphereGraph
+from benchmarks import MockOpenMaya
+
+
+def makeChain(_scene, _count):
+    '''Make a chain of NSpheres where each NSphere is the child of the one before it.
+
+    Args:
+        _scene: The MockOpenMaya.Scene
+        _count: The number of NSpheres
+
+    Returns:
+        list: The NSphere nodes, the root first
+    '''
+
+    nodes = [_scene.createNSphere((0.0, 0.0, 0.0), 1.0)]
+    for i in range(1, _count):
+        nodes.append(_scene.createNSphere((float(i), 0.0, 0.0), 1.0, nodes[-1]))
+    return nodes
+
+
+def legacyTraversal(_graph, _rootNode):
+    '''Find the line segments with a list of the visited nodes, in the same way as the original findLineSegments.
+
+    Args:
+        _graph: The NSphereGraph used to read the NSpheres
+        _rootNode: The root NSphere node
+
+    Returns:
+        list: The (parent key, child key) of each line segment
+    '''
+
+    om = MockOpenMaya
+    checkedN = []
+    uncheckedN = [_rootNode]
+    dependencyFn = om.MFnDependencyNode()
+    lineSegments = []
+    while len(uncheckedN) > 0:
+        node = uncheckedN.pop()
+        checkedN.append(node)
+        dependencyFn.setObject(node)
+        key = _graph.nodeKey(node)
+        _graph.nodeData(node, key)
+        nPlug = om.MPlug(node, dependencyFn.attribute("parentN")).source()
+        if not nPlug.isNull:
+            parent = nPlug.node()
+            parentKey = _graph.nodeKey(parent)
+            _graph.nodeData(parent, parentKey)
+            lineSegments.append((parentKey, key))
+        for p in om.MPlug(node, dependencyFn.attribute("childN")).destinations():
+            n = p.node()
+            if n not in checkedN:
+                uncheckedN.append(n)
+    return lineSegments
+
+
+def best(_function, _repeats):
+    '''Find the shortest time of a function.
+
+    Args:
+        _function: The function, called with no arguments
+        _repeats: The number of times it is called
+
+    Returns:
+        float: The shortest time in milliseconds
+    '''
+
+    times = []
+    for _ in range(_repeats):
+        start = time.time()
+        _function()
+        times.append(time.time() - start)
+    return 1000.0 * min(times)
+
+
+def run(_counts=(10, 100, 1000), _repeats=5):
+    '''Time each traversal of chains of NSpheres.
+
+    Args:
+        _counts: The number of NSpheres of each chain
+        _repeats: The number of times each traversal is timed, the shortest time is kept
+
+    Returns:
+        list: The count, the time of each traversal in milliseconds and the NSpheres read by each NSphereGraph traversal
+    '''
+
+    om = NSphereGraph.om
+    NSphereGraph.om = MockOpenMaya
+    try:
+        results = []
+        for count in _counts:
+            scene = MockOpenMaya.Scene()
+            nodes = makeChain(scene, count)
+            result = {"count": count, "reads": {}}
+
+            def legacy():
+                graph = NSphereGraph.NSphereGraph()
+                legacyTraversal(graph, nodes[0])
+                graph.clear()
+            result["legacy"] = best(legacy, _repeats)
+
+            def cold():
+                graph = NSphereGraph.NSphereGraph()
+                graph.findLineSegments(nodes[0])
+                result["reads"]["cold"] = graph.m_reads
+                graph.clear()
+            result["cold"] = best(cold, _repeats)
+
+            graph = NSphereGraph.NSphereGraph()
+            graph.findLineSegments(nodes[0])
+
+            def warm():
+                graph.findLineSegments(nodes[0])
+                result["reads"]["warm"] = graph.m_reads
+            result["warm"] = best(warm, _repeats)
+
+            def moved():
+                scene.move(nodes[count // 2], (float(count // 2), 1.0, 0.0))
+                graph.findLineSegments(nodes[0])
+                result["reads"]["moved"] = graph.m_reads
+            result["moved"] = best(moved, _repeats)
+            graph.clear()
+            results.append(result)
+        return results
+    finally:
+        NSphereGraph.om = om
+
+
+if __name__ == "__main__":
+    counts = [int(a) for a in sys.argv[1:]] or (10, 100, 1000)
+    for result in run(counts):
+        print("%5d NSpheres: legacy %.2f ms, cold %.2f ms (%d reads), warm %.2f ms (%d reads), moved %.2f ms (%d reads)" % (
+            result["count"], result["legacy"], result["cold"], result["reads"]["cold"],
+            result["warm"], result["reads"]["warm"], result["moved"], result["reads"]["moved"]))
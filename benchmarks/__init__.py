@@ -0,0 +1,18 @@
+'''Benchmarks of the exporter which run without Maya.
+
+Run a benchmark as a module from the repository folder, for example:
+    python -m benchmarks.ExportBenchmark --output results.json
+
+Importing the package puts the scripts folder on the path,
+and the stub maya package if Maya is not available.
+'''
+
+import os
+import sys
+
+m_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(m_root, "scripts"))
+try:
+    import maya.api.OpenMaya
+except ImportError:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "stubs"))
@@ -0,0 +1,4 @@
+'''A stub of the maya package so the exporter scripts can be imported and timed without Maya.
+
+Only the parts of maya.api.OpenMaya used by the Maya free code paths are implemented.
+'''
@@ -0,0 +1,32 @@
+import math
+
+
+class MVector(object):
+    '''Stub of MVector with the operations used by PointCloudExporter.sdCapsule.'''
+
+    def __init__(self, *args):
+        '''Constructor, from nothing, a sequence of three values or three values.'''
+
+        values = args[0] if len(args) == 1 else (args or (0.0, 0.0, 0.0))
+        self.x, self.y, self.z = [float(v) for v in values]
+
+    def __add__(self, _other):
+        return MVector(self.x + _other.x, self.y + _other.y, self.z + _other.z)
+
+    def __sub__(self, _other):
+        return MVector(self.x - _other.x, self.y - _other.y, self.z - _other.z)
+
+    def __mul__(self, _other):
+        '''The dot product with a vector, or the vector scaled by a number.'''
+
+        if isinstance(_other, MVector):
+            return self.x * _other.x + self.y * _other.y + self.z * _other.z
+        return MVector(self.x * _other, self.y * _other, self.z * _other)
+
+    def __truediv__(self, _other):
+        return MVector(self.x / _other, self.y / _other, self.z / _other)
+
+    __div__ = __truediv__
+
+    def length(self):
+        return math.sqrt(self * self)
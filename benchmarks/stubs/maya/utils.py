@@ -0,0 +1,7 @@
+'''A stub of maya.utils, there is no main thread event loop without Maya.'''
+
+
+def executeDeferred(_function, *args):
+    '''Stub of executeDeferred which calls the function straight away.'''
+
+    _function(*args)
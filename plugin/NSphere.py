@@ -2,7 +2,8 @@ import sys
 import maya.api.OpenMaya as om
 import maya.api.OpenMayaUI as omui
 import maya.api.OpenMayaRender as omr
-import maya.cmds as mc
+import DrawCache
+import SDFCache
 
 
 class NSphereClass(omui.MPxLocatorNode):
@@ -19,7 +20,7 @@ class NSphereClass(omui.MPxLocatorNode):
     # Dummy attribute to connect NSpheres
     m_parent = None
     m_child = None
-    # Attribute to connect to a SdCapsuleData node
+    # The world space position and radius, connected to an NSphereSDF node
     m_outSdCapsule = None
 
     @staticmethod
@@ -49,15 +50,183 @@ class NSphereClass(omui.MPxLocatorNode):
         numericAttr.keyable = False
         om.MPxNode.addAttribute(NSphereClass.m_child)
 
+        NSphereClass.m_outSdCapsule = numericAttr.create("outSdCapsule", "osc", om.MFnNumericData.k4Double)
+        numericAttr.writable = False
+        numericAttr.readable = True
+        numericAttr.storable = False
+        numericAttr.hidden = False
+        numericAttr.keyable = False
+        om.MPxNode.addAttribute(NSphereClass.m_outSdCapsule)
+
+        # Moving the NSphere or changing its parent dirties the NSphereSDF node it is connected to
+        om.MPxNode.attributeAffects(omui.MPxLocatorNode.worldMatrix, NSphereClass.m_outSdCapsule)
+        om.MPxNode.attributeAffects(NSphereClass.m_parent, NSphereClass.m_outSdCapsule)
+
     def __init__(self):
         '''Constructor'''
 
         omui.MPxLocatorNode.__init__(self)
 
     def compute(self, plug, data):
-        '''Empty compute function as no computation is necessary'''
+        '''Compute the world space position and radius of the NSphere.
+
+        Args:
+            plug: The plug to compute
+            data: The data block of the node
+        '''
+
+        if plug != NSphereClass.m_outSdCapsule:
+            return None
+
+        worldMatrix = data.inputArrayValue(omui.MPxLocatorNode.worldMatrix)
+        worldMatrix.jumpToLogicalElement(0)
+        matrix = om.MTransformationMatrix(worldMatrix.inputValue().asMatrix())
+        pos = matrix.translation(om.MSpace.kWorld)
+        outHandle = data.outputValue(NSphereClass.m_outSdCapsule)
+        outHandle.set4Double(pos.x, pos.y, pos.z, max(matrix.scale(om.MSpace.kWorld)))
+        outHandle.setClean()
+
+
+class NSphereSDFClass(om.MPxNode):
+    '''Node which samples the signed distance field of the NSpheres connected to it and caches the points inside the mesh.
+    The outSdCapsule attribute of each NSphere is connected to an element of the inNSpheres attribute,
+    and the NSpheres are joined into capsules using their parentN/childN connections.
+    The points are only sampled again when a connected NSphere is dirtied or a setting changes,
+    and only the voxels near the NSpheres that moved are sampled.
+    The exporter uses the cached points when it exports the same NSpheres with the same settings.
+    '''
+
+    # Node attributes
+    m_id = om.MTypeId(0x1002)
+
+    m_inNSpheres = None
+    m_voxelSize = None
+    m_smoothness = None
+    m_errorBound = None
+    m_outPoints = None
+    m_outPointCount = None
+    # The id of the callback which unregisters the cache of a deleted node
+    m_removedCallback = None
+
+    @staticmethod
+    def creator():
+        '''This is required by Maya to create an instance of the class'''
+
+        return NSphereSDFClass()
+
+    @staticmethod
+    def initialize():
+        '''Initialise the node'''
+
+        numericAttr = om.MFnNumericAttribute()
+        typedAttr = om.MFnTypedAttribute()
+
+        NSphereSDFClass.m_inNSpheres = numericAttr.create("inNSpheres", "ins", om.MFnNumericData.k4Double)
+        numericAttr.array = True
+        numericAttr.storable = False
+        numericAttr.keyable = False
+        numericAttr.disconnectBehavior = om.MFnAttribute.kDelete
+        om.MPxNode.addAttribute(NSphereSDFClass.m_inNSpheres)
+
+        NSphereSDFClass.m_voxelSize = numericAttr.create("voxelSize", "vs", om.MFnNumericData.kDouble, 0.5)
+        numericAttr.setMin(0.0001)
+        numericAttr.storable = True
+        numericAttr.keyable = False
+        om.MPxNode.addAttribute(NSphereSDFClass.m_voxelSize)
+
+        NSphereSDFClass.m_smoothness = numericAttr.create("smoothness", "sm", om.MFnNumericData.kDouble, 4.0)
+        numericAttr.setMin(1.0)
+        numericAttr.storable = True
+        numericAttr.keyable = False
+        om.MPxNode.addAttribute(NSphereSDFClass.m_smoothness)
+
+        # A value of 0 uses every capsule
+        NSphereSDFClass.m_errorBound = numericAttr.create("errorBound", "eb", om.MFnNumericData.kDouble, 1e-4)
+        numericAttr.setMin(0.0)
+        numericAttr.storable = True
+        numericAttr.keyable = False
+        om.MPxNode.addAttribute(NSphereSDFClass.m_errorBound)
+
+        NSphereSDFClass.m_outPoints = typedAttr.create("outPoints", "op", om.MFnData.kPointArray)
+        typedAttr.writable = False
+        typedAttr.storable = False
+        om.MPxNode.addAttribute(NSphereSDFClass.m_outPoints)
+
+        NSphereSDFClass.m_outPointCount = numericAttr.create("outPointCount", "opc", om.MFnNumericData.kInt, 0)
+        numericAttr.writable = False
+        numericAttr.storable = False
+        om.MPxNode.addAttribute(NSphereSDFClass.m_outPointCount)
+
+        for inputAttr in (NSphereSDFClass.m_inNSpheres, NSphereSDFClass.m_voxelSize, NSphereSDFClass.m_smoothness, NSphereSDFClass.m_errorBound):
+            om.MPxNode.attributeAffects(inputAttr, NSphereSDFClass.m_outPoints)
+            om.MPxNode.attributeAffects(inputAttr, NSphereSDFClass.m_outPointCount)
+
+    def __init__(self):
+        '''Constructor'''
+
+        om.MPxNode.__init__(self)
+        self.m_cache = SDFCache.SDFCache()
+
+    def postConstructor(self):
+        '''Register the cache so the exporter can find it from the node'''
+
+        self.m_cache.register(om.MObjectHandle(self.thisMObject()).hashCode())
+
+    @staticmethod
+    def nodeRemoved(node, clientData):
+        '''Callback for when an NSphereSDF node is deleted, so its cache is freed and can not be found from a new node with the same hash code.
+
+        Args:
+            node: The NSphereSDF node
+            clientData: Not used
+        '''
+
+        SDFCache.SDFCache.unregister(om.MObjectHandle(node).hashCode())
+
+    def compute(self, plug, data):
+        '''Sample the points inside the mesh of the connected NSpheres.
+
+        Args:
+            plug: The plug to compute
+            data: The data block of the node
+        '''
 
-        return None
+        if plug != NSphereSDFClass.m_outPoints and plug != NSphereSDFClass.m_outPointCount:
+            return None
+        # Registered again in case the deletion of the node was undone
+        self.m_cache.register(om.MObjectHandle(self.thisMObject()).hashCode())
+
+        # Read the data of each connected NSphere and find the index of its parent NSphere
+        inputArray = data.inputArrayValue(NSphereSDFClass.m_inNSpheres)
+        inputPlug = om.MPlug(self.thisMObject(), NSphereSDFClass.m_inNSpheres)
+        spheres = []
+        nodes = []
+        indices = {}
+        for i in range(inputPlug.numConnectedElements()):
+            element = inputPlug.connectionByPhysicalIndex(i)
+            node = element.source().node()
+            inputArray.jumpToLogicalElement(element.logicalIndex())
+            spheres.append(inputArray.inputValue().asDouble4())
+            nodes.append(node)
+            indices[om.MObjectHandle(node).hashCode()] = len(nodes) - 1
+        parents = []
+        for node in nodes:
+            parentPlug = om.MPlug(node, NSphereClass.m_parent).source()
+            parentKey = None if parentPlug.isNull else om.MObjectHandle(parentPlug.node()).hashCode()
+            parents.append(indices.get(parentKey, -1))
+
+        voxelSize = data.inputValue(NSphereSDFClass.m_voxelSize).asDouble()
+        smoothness = data.inputValue(NSphereSDFClass.m_smoothness).asDouble()
+        errorBound = data.inputValue(NSphereSDFClass.m_errorBound).asDouble()
+        sdCapsuleData = self.m_cache.findLineSegments(spheres, parents)
+        points = self.m_cache.points(sdCapsuleData, smoothness, voxelSize, errorBound if errorBound > 0 else None)
+
+        pointsHandle = data.outputValue(NSphereSDFClass.m_outPoints)
+        pointsHandle.setMObject(om.MFnPointArrayData().create(om.MPointArray(points.tolist())))
+        pointsHandle.setClean()
+        countHandle = data.outputValue(NSphereSDFClass.m_outPointCount)
+        countHandle.setInt(len(points))
+        countHandle.setClean()
 
 
 class NSphereClassDrawOverride(omr.MPxDrawOverride):
@@ -88,6 +257,8 @@ class NSphereClassDrawOverride(omr.MPxDrawOverride):
         # List of centres and radii for each sphere to draw
         self.m_radii = []
         self.m_centres = []
+        # The spheres are kept until the NSphere or its parent moves
+        self.m_drawCache = DrawCache.DrawCache()
 
     def supportedDrawAPIs(self):
         '''Let Maya know which APIs can be used. In this case is OpenGL and DirectX'''
@@ -105,28 +276,33 @@ class NSphereClassDrawOverride(omr.MPxDrawOverride):
         return True
 
     def boundingBox(self, objPath, cameraPath):
-        '''Calculate the bounding box.
+        '''Calculate the bounding box around every sphere drawn from this NSphere to its parent.
+        The box is cached with the spheres, so it is only found again when the NSphere or its parent moves.
 
         Args:
             objPath: The DAG path of the locator
             cameraPath: The DAG path of the current camera
         '''
 
-        corner1 = om.MPoint(-0.5, -0.5, -0.5)
-        corner2 = om.MPoint(0.5, 0.5, 0.5)
-
         self.getScale(objPath)
-        corner1 *= self.m_radius
-        corner2 *= self.m_radius
+        plug = om.MPlug(objPath.node(), NSphereClass.m_parent)
+        if plug.isConnected:
+            self.getPosition(objPath)
+            self.getParentNSphereData(objPath)
+            corner1, corner2 = self.m_drawCache.bounds(self.m_position, self.m_parentPosition, self.m_scale, self.m_parentRadius)
+        else:
+            corner1, corner2 = self.m_drawCache.bounds((0.0, 0.0, 0.0), (0.0, 0.0, 0.0), self.m_scale, self.m_radius)
 
         self.m_CurrentBoundingBox.clear()
-        self.m_CurrentBoundingBox.expand(corner1)
-        self.m_CurrentBoundingBox.expand(corner2)
+        self.m_CurrentBoundingBox.expand(om.MPoint(corner1))
+        self.m_CurrentBoundingBox.expand(om.MPoint(corner2))
 
         return self.m_CurrentBoundingBox
 
     def prepareForDraw(self, objPath, cameraPath, frameContext, data):
-        '''Cache data before it is drawn'''
+        '''Cache data before it is drawn.
+        The spheres are only interpolated again when the NSphere, its parent or the number of spheres changes.
+        '''
 
         # Get the scale of the object
         self.getScale(objPath)
@@ -140,30 +316,15 @@ class NSphereClassDrawOverride(omr.MPxDrawOverride):
             # Get the position of this node and the parent node
             self.getPosition(objPath)
             self.getParentNSphereData(objPath)
-            startPoint = om.MPoint(self.m_position[0], self.m_position[1], self.m_position[2])
-            # Negate the offset from the transform node
-            parentPoint = om.MPoint(self.m_parentPosition[0], self.m_parentPosition[1], self.m_parentPosition[2])
-            # Get the unit direction
-            unit = parentPoint - startPoint
-            numUnits = unit.length()
-            unit /= numUnits
-            radiusUnit = (self.m_parentRadius - self.m_radius) / numUnits
-            # Lists of the centre and radius of each sphere to draw
-            self.m_centres = []
-            self.m_radii = []
-            # Interpolate the values for the lists
-            for i in range(int(numUnits) + 1):
-                pos = om.MPoint(unit * i)
-                pos.x /= self.m_scale[0]
-                pos.y /= self.m_scale[1]
-                pos.z /= self.m_scale[2]
-                self.m_centres.append(pos)
-                rad = (self.m_radius + (radiusUnit * i)) / self.m_radius
-                self.m_radii.append(rad)
+            offset = om.MVector(self.m_parentPosition) - om.MVector(self.m_position)
+            count = self.m_drawCache.sphereCount(offset.length(), self.getPixelLength(objPath, frameContext))
+            changed = self.m_drawCache.update(self.m_position, self.m_parentPosition, self.m_scale, self.m_parentRadius, count)
         # If this is the root, there is only one sphere to draw
         else:
-            self.m_centres = [om.MPoint(0.0, 0.0, 0.0)]
-            self.m_radii = [1.0]
+            changed = self.m_drawCache.update((0.0, 0.0, 0.0), (0.0, 0.0, 0.0), self.m_scale, self.m_radius, 1)
+        if changed:
+            self.m_centres = [om.MPoint(centre) for centre in self.m_drawCache.m_centres]
+            self.m_radii = self.m_drawCache.m_radii
 
     def hasUIDrawables(self):
         '''This function queries if the function addUIDrawables will be called'''
@@ -206,15 +367,9 @@ class NSphereClassDrawOverride(omr.MPxDrawOverride):
             objPath: The DAG path for this locator
         '''
 
-        # Get the current node and attach to a DAG node function set
-        nNode = objPath.node()
-        dagFn = om.MFnDagNode(nNode)
-        # Get the parent (transform) node and attach to the DAG function set
-        parentObj = dagFn.parent(0)
-        dagFn.setObject(parentObj)
-        # Get the name of the transform node and find the scale attribute
-        nodeName = dagFn.name()
-        self.m_scale = mc.getAttr(nodeName + ".scale")[0]
+        # Get the parent (transform) node of the current node
+        transformFn = om.MFnTransform(om.MFnDagNode(objPath.node()).parent(0))
+        self.m_scale = tuple(transformFn.scale())
         self.m_radius = max(self.m_scale)
 
     def getPosition(self, objPath):
@@ -224,15 +379,10 @@ class NSphereClassDrawOverride(omr.MPxDrawOverride):
             objPath: The DAG path for this locator
         '''
 
-        # Get the current node and attach to a DAG node function set
-        nNode = objPath.node()
-        dagFn = om.MFnDagNode(nNode)
-        # Get the parent (transform) node and attach to the DAG function set
-        parentObj = dagFn.parent(0)
-        dagFn.setObject(parentObj)
-        # Get the name of the transform node and find the position attribute
-        nodeName = dagFn.name()
-        self.m_position = mc.getAttr(nodeName + ".translate")[0]
+        # Get the parent (transform) node of the current node
+        transformFn = om.MFnTransform(om.MFnDagNode(objPath.node()).parent(0))
+        translation = transformFn.translation(om.MSpace.kTransform)
+        self.m_position = (translation.x, translation.y, translation.z)
 
     def getParentNSphereData(self, objPath):
         '''Get the position and radius of the transform node from the parent NSphere
@@ -244,16 +394,35 @@ class NSphereClassDrawOverride(omr.MPxDrawOverride):
         nNode = objPath.node()
         # Get the plug from the parent
         plug = om.MPlug(nNode, NSphereClass.m_parent).source()
-        # Get the node that it belongs to
-        node = plug.node()
-        dagFn = om.MFnDagNode(node)
-        # Get the parent (transform node)
-        parentObj = dagFn.parent(0)
-        dagFn.setObject(parentObj)
-        # Get the node name
-        nodeName = dagFn.name()
-        self.m_parentPosition = mc.getAttr(nodeName + ".translate")[0]
-        self.m_parentRadius = max(mc.getAttr(nodeName + ".scale")[0])
+        # Get the parent (transform) node of the node that it belongs to
+        transformFn = om.MFnTransform(om.MFnDagNode(plug.node()).parent(0))
+        translation = transformFn.translation(om.MSpace.kTransform)
+        self.m_parentPosition = (translation.x, translation.y, translation.z)
+        self.m_parentRadius = max(transformFn.scale())
+
+    def getPixelLength(self, objPath, frameContext):
+        '''Get the length on screen of the line from this NSphere to its parent NSphere.
+
+        Args:
+            objPath: The DAG path for this locator
+            frameContext: A frame context
+
+        Returns:
+            float: The length in pixels, or None if either end is behind the camera
+        '''
+
+        # The positions are in the space of the parent of the transform node
+        transformPath = om.MDagPath(objPath)
+        transformPath.pop()
+        viewProjection = transformPath.exclusiveMatrix() * frameContext.getMatrix(omr.MFrameContext.kViewProjMtx)
+        start = om.MPoint(self.m_position) * viewProjection
+        end = om.MPoint(self.m_parentPosition) * viewProjection
+        if start.w <= 0 or end.w <= 0:
+            return None
+        originX, originY, width, height = frameContext.getViewportDimensions()
+        dx = (end.x / end.w - start.x / start.w) * width * 0.5
+        dy = (end.y / end.w - start.y / start.w) * height * 0.5
+        return (dx * dx + dy * dy) ** 0.5
 
 
 def maya_useNewAPI():
@@ -273,6 +442,13 @@ def initializePlugin(obj):
         sys.stderr.write("Failed to register node\n")
         raise
 
+    try:
+        plugin.registerNode("NSphereSDF", NSphereSDFClass.m_id, NSphereSDFClass.creator, NSphereSDFClass.initialize)
+        NSphereSDFClass.m_removedCallback = om.MDGMessage.addNodeRemovedCallback(NSphereSDFClass.nodeRemoved, "NSphereSDF")
+    except:
+        sys.stderr.write("Failed to register node\n")
+        raise
+
     try:
         omr.MDrawRegistry.registerDrawOverrideCreator(NSphereClass.m_drawDbClassification, NSphereClass.m_drawRegistrantId, NSphereClassDrawOverride.creator)
     except:
@@ -291,6 +467,16 @@ def uninitializePlugin(obj):
         sys.stderr.write("Failed to deregister node\n")
         pass
 
+    try:
+        if NSphereSDFClass.m_removedCallback is not None:
+            om.MMessage.removeCallback(NSphereSDFClass.m_removedCallback)
+            NSphereSDFClass.m_removedCallback = None
+        SDFCache.SDFCache.m_caches.clear()
+        plugin.deregisterNode(NSphereSDFClass.m_id)
+    except:
+        sys.stderr.write("Failed to deregister node\n")
+        pass
+
     try:
         omr.MDrawRegistry.deregisterDrawOverrideCreator(NSphereClass.m_drawDbClassification, NSphereClass.m_drawRegistrantId)
     except:
@@ -0,0 +1,243 @@
+import numpy as np
+import SDFSampler
+
+
+class AdaptiveSampler(SDFSampler.SDFSampler):
+    '''Class used for sampling the signed distance field by recursively subdividing the grid.
+
+    The smin function takes the sign of the smallest capsule distance, so a point is inside when any capsule distance is negative.
+    Each capsule distance is Lipschitz continuous, so the distance at the centre of a cell bounds the distance everywhere in the cell.
+    Cells that are provably outside are skipped, cells that are provably inside are filled,
+    and only the cells close to the surface are sampled at the voxel size.
+    '''
+
+    def __init__(self, _sdCapsuleData, _smoothness, _leafSize=4, _maxElements=1 << 20, _errorBound=None, _blockPlanes=8, _flavour="exponential"):
+        '''Constructor
+
+        Args:
+            _sdCapsuleData: A list of the sdCapsule data in the format [x, y, z, r, x, y, z, r, ...]
+            _smoothness: The smoothness constant (k) for the smin function
+            _leafSize: The number of voxels along each side of a cell below which the cell is sampled densely
+            _maxElements: The maximum number of voxel/capsule pairs to evaluate at once
+            _errorBound: If set, only combine the capsules which change the signed distance by more than this
+            _blockPlanes: The number of x planes subdivided at once, which bounds the memory used when streaming
+            _flavour: The flavour of the smin function, either exponential or polynomial
+        '''
+
+        SDFSampler.SDFSampler.__init__(self, _sdCapsuleData, _smoothness, _maxElements, _errorBound, _flavour)
+        self.m_leafSize = max(1, int(_leafSize))
+        self.m_blockPlanes = max(1, int(_blockPlanes))
+        self.m_lipschitz = self.lipschitzConstants()
+        # Counters from the last sampled grid
+        self.m_cellsEvaluated = 0
+        self.m_voxelsEvaluated = 0
+
+    def lipschitzConstants(self):
+        '''Find the Lipschitz constant of each capsule distance function.
+
+        The distance to the line segment changes by at most 1 per unit moved,
+        and the interpolated radius changes by at most |r2 - r1| / |b - a| per unit moved.
+
+        Returns:
+            numpy.ndarray: The Lipschitz constant for each capsule
+        '''
+
+        length = np.sqrt(((self.m_capsules[:, 4:7] - self.m_capsules[:, 0:3]) ** 2).sum(axis=1))
+        radiusChange = np.abs(self.m_capsules[:, 7] - self.m_capsules[:, 3])
+        slope = np.zeros_like(length)
+        nonZero = length > 0.0
+        slope[nonZero] = radiusChange[nonZero] / length[nonZero]
+        return 1.0 + slope
+
+    def distanceBounds(self, _centres, _halfDiagonals):
+        '''Find a lower and upper bound of the smallest capsule distance within each cell.
+
+        Args:
+            _centres: A (C, 3) array of cell centres
+            _halfDiagonals: The distance from the centre to the corner of each cell
+
+        Returns:
+            numpy.ndarray, numpy.ndarray: The lower and upper bound for each cell
+        '''
+
+        lower = np.empty(len(_centres), dtype=np.float64)
+        upper = np.empty(len(_centres), dtype=np.float64)
+        rows = max(1, self.m_maxElements // max(1, len(self.m_capsules)))
+        for start in range(0, len(_centres), rows):
+            end = start + rows
+            distances = self.sdCapsules(_centres[start:end])
+            margin = _halfDiagonals[start:end, np.newaxis] * self.m_lipschitz[np.newaxis, :]
+            lower[start:end] = (distances - margin).min(axis=1)
+            upper[start:end] = (distances + margin).min(axis=1)
+        return lower, upper
+
+    def splitCells(self, _cells):
+        '''Split each cell in half along every axis that is longer than one voxel.
+
+        Args:
+            _cells: A (C, 6) array of cells as [i0, j0, k0, i1, j1, k1] voxel index ranges
+
+        Returns:
+            numpy.ndarray: The non empty child cells
+        '''
+
+        lo = _cells[:, 0:3]
+        hi = _cells[:, 3:6]
+        mid = np.where(hi - lo > 1, (lo + hi) // 2, hi)
+        children = []
+        for octant in range(8):
+            upperHalf = np.array([(octant >> axis) & 1 for axis in range(3)], dtype=bool)
+            childLo = np.where(upperHalf, mid, lo)
+            childHi = np.where(upperHalf, hi, mid)
+            children.append(np.hstack((childLo, childHi)))
+        children = np.vstack(children)
+        return children[(children[:, 3:6] > children[:, 0:3]).all(axis=1)]
+
+    def iterateValues(self, _xs, _ys, _zs, _planes, _band=None):
+        '''Sample the signed distance at every voxel of a grid, a block of x planes at a time.
+
+        If a band is given, each block is split into tiles of _planes voxels along each side
+        and tiles which are provably further than the band from the surface are filled without sampling them.
+
+        Args:
+            _xs: The x positions
+            _ys: The y positions
+            _zs: The z positions
+            _planes: The number of x planes in each block
+            _band: If set, the values are clamped to the range [-_band, _band]
+
+        Returns:
+            generator: A (planes, len(_ys), len(_zs)) float32 array of signed distances for each block
+        '''
+
+        if _band is None:
+            for values in SDFSampler.SDFSampler.iterateValues(self, _xs, _ys, _zs, _planes):
+                yield values
+            return
+
+        # Outside the capsules the smin can be less than the smallest capsule distance, by up to log(N) / k for the exponential flavour
+        outsideBand = _band + self.m_kernel.offset(len(self.m_capsules))
+        tileStarts = [np.arange(0, len(a), _planes) for a in (_ys, _zs)]
+        for start in range(0, len(_xs), _planes):
+            xs = _xs[start:start + _planes]
+            values = np.empty((len(xs), len(_ys), len(_zs)), dtype=np.float32)
+            # Find the bounds of every tile in this block
+            j, k = [a.ravel() for a in np.meshgrid(tileStarts[0], tileStarts[1], indexing="ij")]
+            jEnd = np.minimum(j + _planes, len(_ys))
+            kEnd = np.minimum(k + _planes, len(_zs))
+            first = np.column_stack((np.full(len(j), xs[0]), _ys[j], _zs[k]))
+            last = np.column_stack((np.full(len(j), xs[-1]), _ys[jEnd - 1], _zs[kEnd - 1]))
+            centres = (first + last) * 0.5
+            halfDiagonals = np.sqrt(((last - first) ** 2).sum(axis=1)) * 0.5
+            halfDiagonals += 1e-9 * (1.0 + np.abs(centres).max(axis=1))
+            lower, upper = self.distanceBounds(centres, halfDiagonals)
+            self.m_cellsEvaluated += len(centres)
+
+            for tile in range(len(j)):
+                block = values[:, j[tile]:jEnd[tile], k[tile]:kEnd[tile]]
+                if lower[tile] > outsideBand:
+                    block.fill(_band)
+                elif upper[tile] < -_band:
+                    block.fill(-_band)
+                else:
+                    points = self.gridPoints(xs, _ys[j[tile]:jEnd[tile]], _zs[k[tile]:kEnd[tile]])
+                    tileValues = self.calculateSD(points)
+                    np.clip(tileValues, -_band, _band, out=tileValues)
+                    block[...] = tileValues.reshape(block.shape)
+                    self.m_voxelsEvaluated += len(points)
+            if self.m_progress is not None:
+                self.m_progress(start + len(xs), len(_xs))
+            yield values
+
+    def cellIndices(self, _cells, _shape):
+        '''Find the flat voxel index of every voxel in a set of small cells.
+
+        Args:
+            _cells: A (C, 6) array of cells no larger than the leaf size
+            _shape: The number of voxels along each axis of the grid
+
+        Returns:
+            numpy.ndarray: The flat voxel indices in x, y, z order
+        '''
+
+        offsets = np.indices((self.m_leafSize,) * 3).reshape(3, -1).T
+        indices = _cells[:, np.newaxis, 0:3] + offsets[np.newaxis, :, :]
+        valid = (indices < _cells[:, np.newaxis, 3:6]).all(axis=2)
+        indices = indices[valid]
+        return np.ravel_multi_index((indices[:, 0], indices[:, 1], indices[:, 2]), _shape)
+
+    def iterateAxes(self, _xs, _ys, _zs):
+        '''Sample a grid a block of x planes at a time.
+
+        Args:
+            _xs: The x positions
+            _ys: The y positions
+            _zs: The z positions
+
+        Returns:
+            generator: An (M, 3) array of the points inside the mesh for each block, in the same order as SDFSampler.iterateAxes
+        '''
+
+        self.m_cellsEvaluated = 0
+        self.m_voxelsEvaluated = 0
+        for start in range(0, len(_xs), self.m_blockPlanes):
+            points = self.sampleBlock(_xs[start:start + self.m_blockPlanes], _ys, _zs)
+            if self.m_progress is not None:
+                self.m_progress(min(start + self.m_blockPlanes, len(_xs)), len(_xs))
+            yield points
+
+    def sampleBlock(self, _xs, _ys, _zs):
+        '''Sample a block of the grid by subdividing it.
+
+        Args:
+            _xs: The x positions
+            _ys: The y positions
+            _zs: The z positions
+
+        Returns:
+            numpy.ndarray: An (M, 3) array of points that lie inside the mesh in x, y, z order
+        '''
+
+        axes = [_xs, _ys, _zs]
+        shape = tuple(len(a) for a in axes)
+        if min(shape) == 0:
+            return np.zeros((0, 3), dtype=np.float64)
+
+        insideIndices = [np.zeros(0, dtype=np.int64)]
+        cells = np.array([[0, 0, 0, shape[0], shape[1], shape[2]]], dtype=np.int64)
+        while len(cells) > 0:
+            # Cells that are small enough are sampled at every voxel
+            leaf = (cells[:, 3:6] - cells[:, 0:3] <= self.m_leafSize).all(axis=1)
+            if leaf.any():
+                indices = self.cellIndices(cells[leaf], shape)
+                i, j, k = np.unravel_index(indices, shape)
+                points = np.column_stack((axes[0][i], axes[1][j], axes[2][k]))
+                values = self.calculateSD(points)
+                insideIndices.append(indices[values < 0])
+                self.m_voxelsEvaluated += len(indices)
+            cells = cells[~leaf]
+            if len(cells) == 0:
+                break
+
+            # Find the centre and size of each cell from the first and last voxel positions
+            first = np.column_stack([axes[a][cells[:, a]] for a in range(3)])
+            last = np.column_stack([axes[a][cells[:, a + 3] - 1] for a in range(3)])
+            centres = (first + last) * 0.5
+            halfDiagonals = np.sqrt(((last - first) ** 2).sum(axis=1)) * 0.5
+            # Pad the bounds slightly so rounding errors can not misclassify a cell
+            halfDiagonals += 1e-9 * (1.0 + np.abs(centres).max(axis=1))
+            lower, upper = self.distanceBounds(centres, halfDiagonals)
+            self.m_cellsEvaluated += len(cells)
+
+            # Fill the cells which are inside
+            for cell in cells[upper < 0.0]:
+                grid = np.mgrid[cell[0]:cell[3], cell[1]:cell[4], cell[2]:cell[5]].reshape(3, -1)
+                insideIndices.append(np.ravel_multi_index(grid, shape))
+
+            # Split the cells which cross the surface, the cells outside are discarded
+            crossing = (lower <= 0.0) & (upper >= 0.0)
+            cells = self.splitCells(cells[crossing])
+
+        indices = np.sort(np.concatenate(insideIndices))
+        i, j, k = np.unravel_index(indices, shape)
+        return np.column_stack((axes[0][i], axes[1][j], axes[2][k]))
@@ -0,0 +1,154 @@
+'''Export capsule files without Maya, many at once.
+
+The capsule files are written from Maya by the exporter with the "Capsule File" output.
+Each input is exported to a file of the same name in the output folder.
+
+Usage:
+    python BatchExport.py assets/*.caps --output-dir clouds --voxel-size 0.05 --jobs 8
+'''
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+import CapsuleFile
+import ResultCache
+import SDFExporter
+
+
+def exportFile(_task):
+    '''Export one capsule file.
+
+    This is a module level function so it can be sent to a process pool.
+
+    Args:
+        _task: A tuple of (input path, output folder, dictionary of SDFExporter.exportCapsules arguments, write a cProfile dump)
+
+    Returns:
+        tuple: The input path, the time taken in seconds, the ExportMonitor report and the error message, or None if it was exported
+    '''
+
+    inputPath, outputDir, options, profile = _task
+    start = time.time()
+    exporter = SDFExporter.SDFExporter()
+    try:
+        sdCapsuleData = CapsuleFile.CapsuleFile().read(inputPath)
+        filePath = os.path.join(outputDir, os.path.splitext(os.path.basename(inputPath))[0])
+        exporter.exportCapsules(filePath, sdCapsuleData, _profilePath=filePath + ".prof" if profile else None, **options)
+    except Exception as error:
+        # One bad input should not stop the rest of the batch
+        return inputPath, time.time() - start, exporter.m_monitor.report(), "%s: %s" % (type(error).__name__, error)
+    return inputPath, time.time() - start, exporter.m_monitor.report(), None
+
+
+def parseMirror(_value):
+    '''Parse the --mirror option.
+
+    Args:
+        _value: Either auto or axis=offset
+
+    Returns:
+        The value for the SDFExporter.exportCapsules _mirror argument
+    '''
+
+    if _value == "auto":
+        return _value
+    axis, separator, offset = _value.partition("=")
+    if axis not in ("x", "y", "z") or not separator:
+        raise argparse.ArgumentTypeError("expected auto or axis=offset, for example x=0")
+    try:
+        return "xyz".index(axis), float(offset)
+    except ValueError:
+        raise argparse.ArgumentTypeError("the offset must be a number")
+
+
+def parseArguments(_arguments):
+    '''Parse the command line.
+
+    Args:
+        _arguments: The command line arguments, without the program name
+
+    Returns:
+        argparse.Namespace: The options
+    '''
+
+    parser = argparse.ArgumentParser(description="Export point clouds, signed distance volumes or meshes from capsule files.")
+    parser.add_argument("inputs", nargs="+", help="The .caps or .json capsule files")
+    parser.add_argument("--output-dir", default=".", help="The folder to write to")
+    parser.add_argument("--voxel-size", type=float, default=0.5, help="The size of the voxels")
+    parser.add_argument("--smoothness", type=float, default=4.0, help="The smoothness constant (k) for the smin function")
+    parser.add_argument("--output", choices=("points", "voxels", "surface", "sparse", "dense", "mesh"), default="points", help="What to write")
+    parser.add_argument("--snap", action="store_true", help="Move the surface points onto the surface")
+    parser.add_argument("--normals", action="store_true", help="Write the normal of each surface point")
+    parser.add_argument("--ascii", action="store_true", help="Write .ply files in the ascii format")
+    parser.add_argument("--flavour", choices=("exponential", "polynomial"), default="exponential", help="The flavour of the smin function")
+    parser.add_argument("--no-adaptive", action="store_true", help="Sample every voxel instead of subdividing the grid")
+    parser.add_argument("--error-bound", type=float, default=1e-4, help="Leave out capsules which change the signed distance by less than this, 0 to use every capsule")
+    parser.add_argument("--jobs", type=int, default=multiprocessing.cpu_count(), help="The number of files exported at once")
+    parser.add_argument("--workers", type=int, default=1, help="The number of threads used to sample each file")
+    parser.add_argument("--mirror", type=parseMirror, help="Sample half of mirrored capsules, either auto to find the mirror plane or the plane as axis=offset, for example x=0")
+    parser.add_argument("--levels", type=int, default=1, help="Write point clouds progressively in this many levels, each with twice the voxel size of the next, the coarsest first. Can not be combined with --mirror and is never cached")
+    parser.add_argument("--cache-dir", help="Keep the sampled results in this folder, so exporting the same capsules and settings again skips the sampling")
+    parser.add_argument("--cache-size", type=float, default=1024.0, help="The largest size of the cache in megabytes, the least recently used results are removed")
+    parser.add_argument("--profile", action="store_true", help="Write the cProfile stats of each export next to its output, readable with python -m pstats")
+    args = parser.parse_args(_arguments)
+    if args.levels > 1 and args.mirror is not None:
+        parser.error("--levels can not be combined with --mirror")
+    return args
+
+
+def main(_arguments=None):
+    '''Export every input file.
+
+    Args:
+        _arguments: The command line arguments, by default sys.argv
+
+    Returns:
+        int: The exit code, 1 if any input failed
+    '''
+
+    args = parseArguments(sys.argv[1:] if _arguments is None else _arguments)
+    if not os.path.isdir(args.output_dir):
+        os.makedirs(args.output_dir)
+    options = {
+        "_voxelSize": args.voxel_size,
+        "_smoothness": args.smoothness,
+        "_adaptive": not args.no_adaptive,
+        "_errorBound": args.error_bound if args.error_bound > 0 else None,
+        "_workers": args.workers,
+        "_binary": not args.ascii,
+        "_output": args.output,
+        "_flavour": args.flavour,
+        "_snap": args.snap,
+        "_normals": args.normals,
+        "_mirror": args.mirror,
+        "_levels": args.levels,
+        "_cache": ResultCache.ResultCache(args.cache_dir, int(args.cache_size * 1024 * 1024)) if args.cache_dir else None
+    }
+    tasks = [(inputPath, args.output_dir, options, args.profile) for inputPath in args.inputs]
+
+    start = time.time()
+    failed = 0
+    jobs = max(1, min(args.jobs, len(tasks)))
+    pool = multiprocessing.Pool(jobs) if jobs > 1 else None
+    try:
+        results = pool.imap_unordered(exportFile, tasks) if pool is not None else (exportFile(task) for task in tasks)
+        for inputPath, seconds, report, error in results:
+            if error is None and report.get("cached"):
+                print("%s: %.2fs, written from the cache" % (inputPath, seconds))
+            elif error is None:
+                print("%s: %.2fs, %d of %d voxels inside, %.3g voxels/s" % (inputPath, seconds, report.get("inside", 0), report.get("voxels", 0), report.get("voxelsPerSecond", 0.0)))
+            else:
+                failed += 1
+                print("%s: failed, %s" % (inputPath, error))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    print("Exported %d of %d files in %.2fs" % (len(tasks) - failed, len(tasks), time.time() - start))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
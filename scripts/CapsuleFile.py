@@ -0,0 +1,78 @@
+import json
+import struct
+import numpy as np
+
+
+class CapsuleFile(object):
+    '''Class used for writing and reading the capsules of a set of NSpheres.
+
+    Each capsule is [parent position, parent radius, child position, child radius], the same data as PointCloudExporter.findLineSegments.
+    json: an object with a "capsules" list of 8 value lists, a .json file.
+    binary: a header of the magic and the number of capsules, then every value as float64 in capsule order, a .caps file.
+    The values are written exactly, so exporting a capsule file gives the same result as exporting in Maya.
+    '''
+
+    m_magic = b"CAPS"
+    m_version = 1
+    # magic, version, number of capsules
+    m_headerFormat = "<4sIQ"
+    m_headerSize = struct.calcsize(m_headerFormat)
+
+    def extension(self, _binary=True):
+        '''Find the file extension of a format.
+
+        Args:
+            _binary: The binary format instead of json
+
+        Returns:
+            str: The extension, including the dot
+        '''
+
+        return ".caps" if _binary else ".json"
+
+    def write(self, _filePath, _sdCapsuleData, _binary=True):
+        '''Write the capsules to a file.
+
+        Args:
+            _filePath: The path of the file, including the extension
+            _sdCapsuleData: A list of the sdCapsule data in the format [x, y, z, r, x, y, z, r, ...]
+            _binary: Write the binary format instead of json
+        '''
+
+        capsules = np.asarray(_sdCapsuleData, dtype=np.float64).reshape(-1, 8)
+        if _binary:
+            with open(_filePath, "wb") as outputFile:
+                outputFile.write(struct.pack(self.m_headerFormat, self.m_magic, self.m_version, len(capsules)))
+                outputFile.write(capsules.astype("<f8").tobytes())
+        else:
+            with open(_filePath, "w") as outputFile:
+                json.dump({"version": self.m_version, "capsules": capsules.tolist()}, outputFile)
+
+    def read(self, _filePath):
+        '''Read the capsules from a file in either format.
+
+        A json file can also be a list of capsules, or a flat list of values.
+
+        Args:
+            _filePath: The path of the file
+
+        Returns:
+            numpy.ndarray: An (N, 8) array where each row is [ax, ay, az, r1, bx, by, bz, r2]
+        '''
+
+        with open(_filePath, "rb") as inputFile:
+            data = inputFile.read()
+        if data[:4] == self.m_magic:
+            magic, version, count = struct.unpack(self.m_headerFormat, data[:self.m_headerSize])
+            if version != self.m_version:
+                raise IOError("Unknown capsule file version in " + _filePath)
+            values = np.frombuffer(data, dtype="<f8", count=count * 8, offset=self.m_headerSize)
+            return values.astype(np.float64).reshape(-1, 8)
+
+        capsules = json.loads(data.decode("utf-8"))
+        if isinstance(capsules, dict):
+            capsules = capsules["capsules"]
+        values = np.asarray(capsules, dtype=np.float64)
+        if values.size % 8 != 0:
+            raise IOError("The number of values is not a multiple of 8 in " + _filePath)
+        return values.reshape(-1, 8)
@@ -0,0 +1,98 @@
+import numpy as np
+import SmoothMin
+
+
+class CapsuleIndex(object):
+    '''Class used for finding the capsules that can affect the signed distance near a position.
+
+    The space is split into a uniform grid of buckets and each capsule is added to every bucket that its bounds overlap.
+    The bounds are expanded by a margin so that any capsule which is left out of a bucket is further away than the margin.
+    This never changes whether a position is inside, and changes the smin of positions on the surface by less than the error bound.
+    '''
+
+    def __init__(self, _capsules, _smoothness, _errorBound, _bucketSize=None, _flavour="exponential"):
+        '''Constructor
+
+        Args:
+            _capsules: An (N, 8) array where each row is [ax, ay, az, r1, bx, by, bz, r2]
+            _smoothness: The smoothness constant (k) for the smin function
+            _errorBound: The largest change in the signed distance allowed from leaving out capsules
+            _bucketSize: The size of each bucket, by default twice the average capsule radius
+            _flavour: The flavour of the smin function, either exponential or polynomial
+        '''
+
+        self.m_margin = self.findMargin(len(_capsules), _smoothness, _errorBound, _flavour)
+        radius = np.maximum(_capsules[:, 3], _capsules[:, 7])
+        if _bucketSize is None:
+            _bucketSize = 2.0 * radius.mean() if len(radius) > 0 else 1.0
+        self.m_bucketSize = float(_bucketSize)
+
+        # Bounds of each capsule, expanded by the margin
+        expand = (radius + self.m_margin)[:, np.newaxis]
+        lo = np.minimum(_capsules[:, 0:3], _capsules[:, 4:7]) - expand
+        hi = np.maximum(_capsules[:, 0:3], _capsules[:, 4:7]) + expand
+        self.m_origin = lo.min(axis=0) if len(lo) > 0 else np.zeros(3)
+        loBucket = np.floor((lo - self.m_origin) / self.m_bucketSize).astype(np.int64)
+        hiBucket = np.floor((hi - self.m_origin) / self.m_bucketSize).astype(np.int64)
+        self.m_shape = tuple(int(v) + 1 for v in hiBucket.max(axis=0)) if len(hi) > 0 else (1, 1, 1)
+
+        # Find every (bucket, capsule) pair and sort by bucket so each bucket is a contiguous run
+        buckets = [np.zeros(0, dtype=np.int64)]
+        ids = [np.zeros(0, dtype=np.int64)]
+        for i in range(len(_capsules)):
+            grid = np.mgrid[loBucket[i, 0]:hiBucket[i, 0] + 1, loBucket[i, 1]:hiBucket[i, 1] + 1, loBucket[i, 2]:hiBucket[i, 2] + 1].reshape(3, -1)
+            flat = np.ravel_multi_index(grid, self.m_shape)
+            buckets.append(flat)
+            ids.append(np.full(len(flat), i, dtype=np.int64))
+        buckets = np.concatenate(buckets)
+        ids = np.concatenate(ids)
+        order = np.argsort(buckets, kind="mergesort")
+        self.m_capsuleIds = ids[order]
+        counts = np.bincount(buckets, minlength=int(np.prod(self.m_shape)))
+        self.m_offsets = np.concatenate(([0], np.cumsum(counts)))
+
+    @staticmethod
+    def findMargin(_count, _smoothness, _errorBound, _flavour="exponential"):
+        '''Find how far the capsule bounds need to be expanded, see SmoothMin.margin.
+
+        Args:
+            _count: The number of capsules
+            _smoothness: The smoothness constant (k) for the smin function
+            _errorBound: The largest change in the signed distance allowed, or None to never leave out a capsule
+            _flavour: The flavour of the smin function, either exponential or polynomial
+
+        Returns:
+            float: The margin
+        '''
+
+        return SmoothMin.SmoothMin(_smoothness, _flavour).margin(_count, _errorBound)
+
+    def bucketIndices(self, _points):
+        '''Find the flat bucket index of each position.
+
+        Args:
+            _points: An (M, 3) array of positions
+
+        Returns:
+            numpy.ndarray: The bucket index of each position, or -1 if the position is outside the grid
+        '''
+
+        cell = np.floor((_points - self.m_origin) / self.m_bucketSize).astype(np.int64)
+        valid = ((cell >= 0) & (cell < np.array(self.m_shape))).all(axis=1)
+        indices = np.full(len(_points), -1, dtype=np.int64)
+        indices[valid] = np.ravel_multi_index(cell[valid].T, self.m_shape)
+        return indices
+
+    def capsulesInBucket(self, _bucket):
+        '''Find the capsules in a bucket.
+
+        Args:
+            _bucket: The flat bucket index
+
+        Returns:
+            numpy.ndarray: The indices of the capsules
+        '''
+
+        if _bucket < 0:
+            return self.m_capsuleIds[0:0]
+        return self.m_capsuleIds[self.m_offsets[_bucket]:self.m_offsets[_bucket + 1]]
@@ -0,0 +1,109 @@
+import math
+
+
+class DrawCache(object):
+    '''Class used for keeping the spheres drawn along an NSphere segment until the NSpheres move.
+
+    This class does not use Maya, so the drawing of an NSphere can be timed outside of a Maya session.
+    The spheres are only interpolated again when the position, parent position, scale, parent radius or sphere count changes.
+    The number of spheres is capped by the length of the segment on screen and by a maximum count,
+    but the spheres at both ends are always drawn so the bounding box does not depend on the count.
+    '''
+
+    def __init__(self, _maxSpheres=64, _pixelsPerSphere=4.0):
+        '''Constructor
+
+        Args:
+            _maxSpheres: The largest number of spheres drawn along a segment
+            _pixelsPerSphere: The smallest distance on screen, in pixels, between the spheres drawn along a segment
+        '''
+
+        self.m_maxSpheres = _maxSpheres
+        self.m_pixelsPerSphere = _pixelsPerSphere
+        self.m_key = None
+        # The centre of each sphere in the local space of the NSphere and its radius relative to the NSphere radius
+        self.m_centres = []
+        self.m_radii = []
+        # The min and max corners of the box around every sphere, in the local space of the NSphere
+        self.m_bounds = ((0.0, 0.0, 0.0), (0.0, 0.0, 0.0))
+        # The number of times the spheres were interpolated again
+        self.m_updates = 0
+
+    def sphereCount(self, _length, _pixelLength=None):
+        '''Find the number of spheres to draw along a segment.
+
+        Args:
+            _length: The length of the segment
+            _pixelLength: The length of the segment on screen in pixels, or None if it is not known
+
+        Returns:
+            int: The number of spheres
+        '''
+
+        count = min(int(_length) + 1, self.m_maxSpheres)
+        if _pixelLength is not None:
+            count = min(count, int(_pixelLength / self.m_pixelsPerSphere) + 1)
+        # Keep the spheres at both ends
+        return max(count, min(int(_length) + 1, 2))
+
+    def update(self, _position, _parentPosition, _scale, _parentRadius, _count):
+        '''Interpolate the spheres from the NSphere to its parent if anything changed since the last call.
+
+        With the full count the spheres are one unit apart, otherwise they are spread over the same distance.
+
+        Args:
+            _position: The (x, y, z) position of the NSphere
+            _parentPosition: The (x, y, z) position of the parent NSphere
+            _scale: The (x, y, z) scale of the NSphere
+            _parentRadius: The radius of the parent NSphere
+            _count: The number of spheres, from sphereCount
+
+        Returns:
+            bool: True if the spheres were interpolated again
+        '''
+
+        key = (tuple(_position), tuple(_parentPosition), tuple(_scale), _parentRadius, _count)
+        if key == self.m_key:
+            return False
+
+        radius = max(_scale)
+        offset = [p - q for p, q in zip(_parentPosition, _position)]
+        numUnits = math.sqrt(sum(o * o for o in offset))
+        unit = [o / numUnits for o in offset] if numUnits > 0 else [0.0, 0.0, 0.0]
+        radiusUnit = (_parentRadius - radius) / numUnits if numUnits > 0 else 0.0
+        # Spread the spheres over the same distance as one sphere per unit would cover
+        step = float(int(numUnits)) / (_count - 1) if _count > 1 else 0.0
+        self.m_centres = []
+        self.m_radii = []
+        for i in range(_count):
+            distance = step * i
+            # Negate the scale of the transform node
+            self.m_centres.append(tuple(u * distance / s for u, s in zip(unit, _scale)))
+            self.m_radii.append((radius + radiusUnit * distance) / radius)
+        self.m_bounds = (
+            tuple(min(c[axis] - r for c, r in zip(self.m_centres, self.m_radii)) for axis in range(3)),
+            tuple(max(c[axis] + r for c, r in zip(self.m_centres, self.m_radii)) for axis in range(3))
+        )
+        self.m_key = key
+        self.m_updates += 1
+        return True
+
+    def bounds(self, _position, _parentPosition, _scale, _parentRadius):
+        '''Find the box around every sphere drawn along a segment.
+
+        The box of the last update is used if the NSpheres have not moved, as it does not depend on the number of spheres.
+
+        Args:
+            _position: The (x, y, z) position of the NSphere
+            _parentPosition: The (x, y, z) position of the parent NSphere
+            _scale: The (x, y, z) scale of the NSphere
+            _parentRadius: The radius of the parent NSphere
+
+        Returns:
+            tuple, tuple: The min and max corners of the box in the local space of the NSphere
+        '''
+
+        if self.m_key is None or self.m_key[:4] != (tuple(_position), tuple(_parentPosition), tuple(_scale), _parentRadius):
+            length = math.sqrt(sum((p - q) ** 2 for p, q in zip(_parentPosition, _position)))
+            self.update(_position, _parentPosition, _scale, _parentRadius, self.sphereCount(length))
+        return self.m_bounds
@@ -0,0 +1,112 @@
+import threading
+import traceback
+import ExportMonitor
+
+
+class ExportJob(object):
+    '''Class used for running SDFExporter.exportCapsules on a worker thread.
+
+    The job is given the capsule data, so the worker never reads the scene and Maya can be used while it runs.
+    The progress and done callbacks are passed to a defer function so they are run on the main thread,
+    in Maya this is maya.utils.executeDeferred. With no defer function they are called from the worker thread.
+    Most of the sampling time is spent in NumPy, which releases the GIL, so the main thread stays responsive.
+    '''
+
+    def __init__(self, _exporter, _arguments, _onProgress=None, _onDone=None, _defer=None):
+        '''Constructor
+
+        Args:
+            _exporter: The SDFExporter, which must not be used by anything else until the job is done
+            _arguments: A dictionary of the SDFExporter.exportCapsules arguments, apart from _monitor
+            _onProgress: Called with the stage name and the fraction of the stage done, at most once per percent
+            _onDone: Called with this job when it has finished, been cancelled or failed
+            _defer: A function which is called with a callback and its arguments to run it on the main thread
+        '''
+
+        self.m_exporter = _exporter
+        self.m_arguments = _arguments
+        self.m_onProgress = _onProgress
+        self.m_onDone = _onDone
+        self.m_defer = _defer
+        self.m_monitor = ExportMonitor.ExportMonitor()
+        self.m_monitor.addListener(self.updateProgress)
+        # The last percentage reported, so the main thread is not sent a callback for every block
+        self.m_percent = None
+        # The result of exportCapsules, and how the job ended
+        self.m_result = None
+        self.m_cancelled = False
+        self.m_error = None
+        self.m_thread = threading.Thread(target=self.run, name="ExportJob")
+        # Quitting Maya does not wait for the export
+        self.m_thread.daemon = True
+
+    def start(self):
+        '''Start the export on the worker thread.'''
+
+        self.m_thread.start()
+
+    def cancel(self):
+        '''Stop the export the next time the sampling loop reports progress, the done callback is still called.'''
+
+        self.m_monitor.cancel()
+
+    def isRunning(self):
+        '''Find if the export is still running.
+
+        Returns:
+            bool: True until the worker thread has finished
+        '''
+
+        return self.m_thread.is_alive()
+
+    def wait(self, _timeout=None):
+        '''Wait for the worker thread to finish.
+
+        Args:
+            _timeout: The longest time to wait in seconds, or None to wait until it finishes
+
+        Returns:
+            bool: True if the job has finished
+        '''
+
+        self.m_thread.join(_timeout)
+        return not self.m_thread.is_alive()
+
+    def run(self):
+        '''Run the export, this is called on the worker thread.'''
+
+        try:
+            self.m_result = self.m_exporter.exportCapsules(_monitor=self.m_monitor, **self.m_arguments)
+        except ExportMonitor.ExportCancelled:
+            self.m_cancelled = True
+        except Exception:
+            # The error is reported by the done callback on the main thread
+            self.m_error = traceback.format_exc()
+        if self.m_onDone is not None:
+            self.call(self.m_onDone, self)
+
+    def updateProgress(self, _stage, _fraction):
+        '''Send the progress to the main thread when it changes by at least a percent.
+
+        Args:
+            _stage: The name of the stage
+            _fraction: The fraction of the stage done
+        '''
+
+        percent = (_stage, int(100 * _fraction))
+        if self.m_onProgress is not None and percent != self.m_percent:
+            self.m_percent = percent
+            self.call(self.m_onProgress, _stage, _fraction)
+
+    def call(self, _callback, *_args):
+        '''Call a callback on the main thread using the defer function.
+
+        Args:
+            _callback: The function to call
+            _args: The arguments of the function
+        '''
+
+        if self.m_defer is not None:
+            self.m_defer(_callback, *_args)
+        else:
+            _callback(*_args)
@@ -0,0 +1,172 @@
+import contextlib
+import time
+
+
+class ExportCancelled(Exception):
+    '''Raised in the sampling loop when an export is cancelled.'''
+
+
+class ExportMonitor(object):
+    '''Class used for timing the stages of an export, counting what was sampled and reporting the progress.
+
+    The samplers call progress after each block of x planes, so listeners are updated and cancellation is checked in the sampling loop.
+    With no listeners progress only checks a flag, so an export always has a monitor.
+    The time of a stage does not include the stages nested in it, so sampling and writing are timed apart when the points are streamed.
+    '''
+
+    def __init__(self):
+        '''Constructor'''
+
+        self.m_listeners = []
+        self.m_cancelled = False
+        self.m_counters = {}
+        self.m_seconds = {}
+        # The stages in the order they first finished, so nested stages come before the stage they are in
+        self.m_stages = []
+        # The [name, start time, time in nested stages] of each stage being timed
+        self.m_stack = []
+
+    def addListener(self, _listener):
+        '''Add a function which is called with the stage name and the fraction of the stage done.
+
+        The listener can call cancel to stop the export.
+
+        Args:
+            _listener: The function
+        '''
+
+        self.m_listeners.append(_listener)
+
+    def removeListener(self, _listener):
+        '''Remove a listener.
+
+        Args:
+            _listener: A function passed to addListener
+        '''
+
+        self.m_listeners.remove(_listener)
+
+    def cancel(self):
+        '''Stop the export the next time the sampling loop reports progress.'''
+
+        self.m_cancelled = True
+
+    def begin(self, _stage):
+        '''Start timing a stage.
+
+        Args:
+            _stage: The name of the stage
+        '''
+
+        self.m_stack.append([_stage, time.time(), 0.0])
+
+    def end(self):
+        '''Stop timing the last stage that was started.'''
+
+        stage, start, nested = self.m_stack.pop()
+        elapsed = time.time() - start
+        if stage not in self.m_seconds:
+            self.m_seconds[stage] = 0.0
+            self.m_stages.append(stage)
+        self.m_seconds[stage] += elapsed - nested
+        if self.m_stack:
+            self.m_stack[-1][2] += elapsed
+
+    @contextlib.contextmanager
+    def stage(self, _stage):
+        '''Time the code in a with block as a stage.
+
+        Args:
+            _stage: The name of the stage
+        '''
+
+        self.begin(_stage)
+        try:
+            yield
+        finally:
+            self.end()
+
+    def timed(self, _stage, _blocks, _counter=None, _count=None):
+        '''Time the work done to make each block of a generator as a stage.
+
+        Args:
+            _stage: The name of the stage
+            _blocks: An iterable of blocks
+            _counter: The name of the counter to add to for each block
+            _count: A function which finds the count of a block
+
+        Returns:
+            generator: The blocks
+        '''
+
+        iterator = iter(_blocks)
+        while True:
+            self.begin(_stage)
+            try:
+                block = next(iterator, None)
+            finally:
+                self.end()
+            if block is None:
+                return
+            if _counter is not None:
+                self.count(_counter, _count(block))
+            yield block
+
+    def progress(self, _done, _total):
+        '''Report the progress of the current stage.
+
+        Args:
+            _done: The amount of work done
+            _total: The total amount of work
+
+        Raises:
+            ExportCancelled: If cancel was called
+        '''
+
+        if self.m_cancelled:
+            raise ExportCancelled("The export was cancelled")
+        if self.m_listeners:
+            stage = self.m_stack[-1][0] if self.m_stack else None
+            fraction = min(1.0, _done / float(_total)) if _total > 0 else 1.0
+            for listener in self.m_listeners:
+                listener(stage, fraction)
+            if self.m_cancelled:
+                raise ExportCancelled("The export was cancelled")
+
+    def count(self, _name, _value):
+        '''Add to a counter.
+
+        Args:
+            _name: The name of the counter
+            _value: The amount to add
+        '''
+
+        self.m_counters[_name] = self.m_counters.get(_name, 0) + _value
+
+    def report(self):
+        '''Find the counters and the time of each stage.
+
+        Returns:
+            dict: The counters, the milliseconds of each stage and the voxels sampled per second
+        '''
+
+        report = dict(self.m_counters)
+        report["milliseconds"] = dict((stage, 1000.0 * seconds) for stage, seconds in self.m_seconds.items())
+        sampleSeconds = self.m_seconds.get("sample", 0.0)
+        if "voxels" in self.m_counters and sampleSeconds > 0.0:
+            report["voxelsPerSecond"] = self.m_counters["voxels"] / sampleSeconds
+        return report
+
+    def formatReport(self):
+        '''Format the report as lines of text.
+
+        Returns:
+            str: The counters and then the time of each stage in the order they were run
+        '''
+
+        report = self.report()
+        lines = ["%s: %d" % (name, report[name]) for name in sorted(self.m_counters)]
+        lines.extend("%s: %.1f ms" % (stage, report["milliseconds"][stage]) for stage in self.m_stages)
+        if "voxelsPerSecond" in report:
+            lines.append("voxels per second: %.3g" % report["voxelsPerSecond"])
+        return "\n".join(lines)
@@ -0,0 +1,268 @@
+import numpy as np
+import CapsuleIndex
+import SDFSampler
+
+
+class IncrementalSampler(object):
+    '''Class used for keeping the sampled signed distance grid between exports and only resampling the parts that changed.
+
+    The grid is split into blocks and each block is sampled using only the capsules whose bounds,
+    expanded by the smin margin, overlap the block. The value of a voxel therefore only depends on the capsules of its block,
+    so when capsules change only the blocks overlapping their old or new bounds are sampled again,
+    and the grid is identical to sampling every block from scratch.
+    The blocks are on a lattice of voxel indices from the origin, and the grid covers whole blocks around the bounding box
+    with padding blocks on each side. The grid is kept while the bounding box fits inside it,
+    so moving the NSpheres at the edge of the rig does not sample the whole grid again.
+    After update is called this class can be used in place of a sampler from PointCloudExporter.createSampler,
+    with the positions of the bounding box of the last update.
+    '''
+
+    def __init__(self, _blockSize=8, _paddingBlocks=1):
+        '''Constructor
+
+        Args:
+            _blockSize: The number of voxels along each side of a block
+            _paddingBlocks: The number of blocks added on each side of the bounding box when the whole grid is sampled
+        '''
+
+        self.m_blockSize = _blockSize
+        self.m_paddingBlocks = _paddingBlocks
+        self.m_capsules = None
+        self.m_settings = None
+        # The sample positions of the whole grid, and the voxel index of its first position along each axis
+        self.m_axes = None
+        self.m_origin = None
+        self.m_values = None
+        # The positions of the bounding box of the last update, and the range of voxels they are in the grid
+        self.m_viewAxes = None
+        self.m_view = None
+        self.m_margin = None
+        self.m_ranges = None
+        # The number of voxels sampled by the last call to update
+        self.m_voxelsSampled = 0
+        # Called with the number of blocks or x planes done and the total, see ExportMonitor.progress
+        self.m_progress = None
+
+    def update(self, _sdCapsuleData, _smoothness, _voxelSize, _boundingBox, _errorBound=1e-4, _flavour="exponential"):
+        '''Update the grid for a new set of capsules.
+
+        The whole grid is sampled if there is no previous grid, the settings changed, the number of capsules changed,
+        or the bounding box does not fit inside the grid.
+
+        Args:
+            _sdCapsuleData: A list of the sdCapsule data in the format [x, y, z, r, x, y, z, r, ...]
+            _smoothness: The smoothness constant (k) for the smin function
+            _voxelSize: The size of the voxels
+            _boundingBox: The bounding box of the NSpheres
+            _errorBound: The largest change in the signed distance allowed from leaving out capsules, or None to use every capsule
+            _flavour: The flavour of the smin function, either exponential or polynomial
+
+        Returns:
+            int: The number of voxels sampled
+        '''
+
+        sampler = SDFSampler.SDFSampler(_sdCapsuleData, _smoothness, _flavour=_flavour)
+        capsules = sampler.m_capsules
+        first, phase = self.lattice(_voxelSize, _boundingBox)
+        dims = SDFSampler.SDFSampler.dims(_voxelSize, _boundingBox)
+        settings = (float(_smoothness), float(_voxelSize), phase, _errorBound, _flavour, len(capsules))
+        self.m_voxelsSampled = 0
+        full = self.m_values is None or settings != self.m_settings or not self.fits(first, dims)
+
+        if full:
+            # The grid covers whole blocks, so a block has the same voxels and capsules whatever the bounding box
+            lo = first // self.m_blockSize - self.m_paddingBlocks
+            hi = -(-(first + np.asarray(dims)) // self.m_blockSize) + self.m_paddingBlocks
+            self.m_origin = lo * self.m_blockSize
+            # The positions are found from the bounding box in the same way as SDFSampler.axis, so they are the same as a normal export
+            self.m_axes = [_boundingBox[0][i] + np.arange(self.m_origin[i] - first[i], (hi[i] * self.m_blockSize) - first[i], dtype=np.int64).astype(np.float64) * _voxelSize for i in range(3)]
+            self.m_values = np.empty(tuple(len(a) for a in self.m_axes), dtype=np.float32)
+            self.m_margin = CapsuleIndex.CapsuleIndex.findMargin(len(capsules), float(_smoothness), _errorBound, _flavour)
+            self.m_ranges = self.blockRanges(capsules)
+            blocks = np.argwhere(np.ones(self.blockShape(), dtype=bool))
+        else:
+            changed = (capsules != self.m_capsules).any(axis=1)
+            newRanges = self.blockRanges(capsules)
+            # The blocks which overlap the old or new bounds of the changed capsules
+            affected = np.zeros(self.blockShape(), dtype=bool)
+            for ranges in (self.m_ranges[changed], newRanges[changed]):
+                for lo0, lo1, lo2, hi0, hi1, hi2 in ranges:
+                    affected[lo0:hi0 + 1, lo1:hi1 + 1, lo2:hi2 + 1] = True
+            self.m_ranges = newRanges
+            blocks = np.argwhere(affected)
+
+        # A copy is kept, as the sampler does not copy an array of capsules and the caller can change it before the next update
+        self.m_capsules = capsules.copy()
+        self.m_settings = settings
+        start = first - self.m_origin
+        self.m_view = tuple(slice(int(start[i]), int(start[i]) + dims[i]) for i in range(3))
+        self.m_viewAxes = sampler.axes(_voxelSize, _boundingBox)
+        for i, block in enumerate(blocks):
+            self.sampleBlock(sampler, block)
+            if self.m_progress is not None:
+                self.m_progress(i + 1, len(blocks))
+        return self.m_voxelsSampled
+
+    def lattice(self, _voxelSize, _boundingBox):
+        '''Find the voxel index of the first corner of the bounding box on the lattice of voxels from the origin.
+
+        The bounding box from findBoundingBox is a multiple of the voxel size, so it is on the lattice with no offset.
+
+        Args:
+            _voxelSize: The size of the voxels
+            _boundingBox: The bounding box of the NSpheres
+
+        Returns:
+            numpy.ndarray, tuple: The voxel index along each axis, and the offset of the lattice along each axis
+        '''
+
+        lo = np.asarray(_boundingBox[0], dtype=np.float64)
+        first = np.round(lo / _voxelSize).astype(np.int64)
+        offset = lo - first * _voxelSize
+        # Rounding errors in a multiple of the voxel size are not an offset
+        offset[np.abs(offset) < 1e-6 * _voxelSize] = 0.0
+        return first, tuple(offset.tolist())
+
+    def fits(self, _first, _dims):
+        '''Find if the voxels of a bounding box are inside the grid.
+
+        Args:
+            _first: The voxel index of the first corner of the bounding box
+            _dims: The number of voxels along each axis of the bounding box
+
+        Returns:
+            bool: If every voxel is in the grid
+        '''
+
+        if self.m_values is None:
+            return False
+        start = _first - self.m_origin
+        return bool((start >= 0).all() and (start + np.asarray(_dims) <= np.asarray(self.m_values.shape)).all())
+
+    def values(self):
+        '''Find the signed distances of the bounding box of the last update.
+
+        Returns:
+            numpy.ndarray: A view of the float32 grid of the voxels of the bounding box
+        '''
+
+        return self.m_values[self.m_view]
+
+    def blockShape(self):
+        '''Find the number of blocks along each axis.
+
+        Returns:
+            tuple: The number of blocks along each axis
+        '''
+
+        return tuple(-(-len(a) // self.m_blockSize) for a in self.m_axes)
+
+    def blockRanges(self, _capsules):
+        '''Find the range of blocks that the expanded bounds of each capsule overlap.
+
+        Args:
+            _capsules: An (N, 8) array of capsules
+
+        Returns:
+            numpy.ndarray: An (N, 6) array of the first and last block index along each axis
+        '''
+
+        radius = np.maximum(_capsules[:, 3], _capsules[:, 7])[:, np.newaxis] + self.m_margin
+        lo = np.minimum(_capsules[:, 0:3], _capsules[:, 4:7]) - radius
+        hi = np.maximum(_capsules[:, 0:3], _capsules[:, 4:7]) + radius
+        ranges = np.empty((len(_capsules), 6), dtype=np.int64)
+        for axis in range(3):
+            positions = self.m_axes[axis]
+            # Pad by one voxel so rounding can never leave out a capsule
+            first = np.searchsorted(positions, lo[:, axis], side="left") - 1
+            last = np.searchsorted(positions, hi[:, axis], side="right")
+            ranges[:, axis] = np.clip(first, 0, len(positions) - 1) // self.m_blockSize
+            ranges[:, axis + 3] = np.clip(last, 0, len(positions) - 1) // self.m_blockSize
+        return ranges
+
+    def sampleBlock(self, _sampler, _block):
+        '''Sample every voxel of a block using the capsules that overlap it.
+
+        Args:
+            _sampler: An SDFSampler of the current capsules
+            _block: The block index along each axis
+        '''
+
+        start = _block * self.m_blockSize
+        end = start + self.m_blockSize
+        axes = [a[s:e] for a, s, e in zip(self.m_axes, start, end)]
+        shape = tuple(len(a) for a in axes)
+        overlap = ((self.m_ranges[:, 0:3] <= _block) & (self.m_ranges[:, 3:6] >= _block)).all(axis=1)
+        capsules = _sampler.m_capsules[overlap]
+        if len(capsules) == 0:
+            values = np.full(shape, self.m_margin, dtype=np.float32)
+        else:
+            points = _sampler.gridPoints(axes[0], axes[1], axes[2])
+            values = _sampler.smin(_sampler.sdCapsules(points, capsules)).reshape(shape)
+        self.m_values[start[0]:end[0], start[1]:end[1], start[2]:end[2]] = values
+        self.m_voxelsSampled += int(np.prod(shape))
+
+    def axes(self, _voxelSize, _boundingBox):
+        '''Find the sample positions along each axis, which are those of the bounding box of the last update.
+
+        Args:
+            _voxelSize: The size of the voxels
+            _boundingBox: The bounding box of the NSpheres
+
+        Returns:
+            list: The x, y and z sample positions
+        '''
+
+        return self.m_viewAxes
+
+    def iterateSD(self, _voxelSize, _boundingBox, _planes=8):
+        '''Find the points inside the mesh from the grid, a block of x planes at a time.
+
+        Args:
+            _voxelSize: The size of the voxels
+            _boundingBox: The bounding box of the NSpheres
+            _planes: The number of x planes in each block
+
+        Returns:
+            generator: An (M, 3) array of the points inside the mesh for each block, in x, y, z order
+        '''
+
+        xs, ys, zs = self.m_viewAxes
+        grid = self.values()
+        for start in range(0, len(xs), _planes):
+            i, j, k = np.nonzero(grid[start:start + _planes] < 0)
+            yield np.column_stack((xs[start + i], ys[j], zs[k]))
+
+    def sampleSD(self, _voxelSize, _boundingBox):
+        '''Find all the points inside the mesh from the grid.
+
+        Args:
+            _voxelSize: The size of the voxels
+            _boundingBox: The bounding box of the NSpheres
+
+        Returns:
+            numpy.ndarray: An (M, 3) array of points that lie inside the mesh
+        '''
+
+        return np.concatenate([np.zeros((0, 3), dtype=np.float64)] + list(self.iterateSD(_voxelSize, _boundingBox)))
+
+    def iterateValues(self, _xs, _ys, _zs, _planes, _band=None):
+        '''Find the signed distance at every voxel from the grid, a block of x planes at a time.
+
+        Args:
+            _xs: The x positions, which must be those of the last update
+            _ys: The y positions
+            _zs: The z positions
+            _planes: The number of x planes in each block
+            _band: If set, the values are clamped to the range [-_band, _band]
+
+        Returns:
+            generator: A (planes, len(_ys), len(_zs)) float32 array of signed distances for each block
+        '''
+
+        grid = self.values()
+        for start in range(0, len(_xs), _planes):
+            values = grid[start:start + _planes]
+            if _band is not None:
+                values = np.clip(values, -_band, _band)
+            yield values
@@ -0,0 +1,367 @@
+import numpy as np
+
+
+class MirrorSampler(object):
+    '''Class used for sampling one half of a mirrored set of capsules and mirroring the result onto the other half.
+
+    The mirror plane is perpendicular to an axis. The grid positions on one side of the plane are mirrored onto grid positions
+    on the other side, so only the positions up to the seam, and any past the mirror of the first position, are sampled.
+    The points and values are the same as sampling the whole grid, in the same order.
+    If the capsules are not mirrored or the grid is not mirrored by the plane, the whole grid is sampled.
+    Mirroring across x planes keeps the sampled half until the mirrored planes are written,
+    mirroring across y or z planes is done within each block.
+    '''
+
+    # Mirroring across x planes keeps half of the result, so the other axes are tried first
+    m_axisOrder = (1, 2, 0)
+
+    def __init__(self, _sampler, _plane):
+        '''Constructor
+
+        Args:
+            _sampler: The sampler from SDFExporter.createSampler used to sample the half of the grid
+            _plane: The (axis, offset) of the mirror plane, from findPlane
+        '''
+
+        self.m_sampler = _sampler
+        self.m_axis, self.m_offset = _plane
+        # Called with the number of x planes sampled and the total after each block, see ExportMonitor.progress
+        self.m_progress = None
+        # The number of grid positions along the mirror axis copied instead of sampled in the last grid
+        self.m_positionsMirrored = 0
+
+    @classmethod
+    def findPlane(cls, _sdCapsuleData, _plane="auto", _tolerance=1e-6):
+        '''Find the mirror plane of the capsules.
+
+        Args:
+            _sdCapsuleData: A list of the sdCapsule data in the format [x, y, z, r, x, y, z, r, ...]
+            _plane: Either "auto" to try the plane through the middle of the capsules along each axis, or an (axis, offset) to check
+            _tolerance: The largest difference allowed between a capsule and the mirror of another, relative to the size of the capsules
+
+        Returns:
+            tuple: The (axis, offset) of the mirror plane, or None if the capsules are not mirrored
+        '''
+
+        capsules = np.asarray(_sdCapsuleData, dtype=np.float64).reshape(-1, 8)
+        if len(capsules) == 0:
+            return None
+        spheres = np.vstack((capsules[:, 0:4], capsules[:, 4:8]))
+        lo = (spheres[:, 0:3] - spheres[:, 3:4]).min(axis=0)
+        hi = (spheres[:, 0:3] + spheres[:, 3:4]).max(axis=0)
+        tolerance = _tolerance * (1.0 + np.abs(np.concatenate((lo, hi))).max())
+        if _plane == "auto":
+            planes = [(axis, 0.5 * (lo[axis] + hi[axis])) for axis in cls.m_axisOrder]
+        else:
+            planes = [(int(_plane[0]), float(_plane[1]))]
+        for axis, offset in planes:
+            if cls.isMirrored(capsules, axis, offset, tolerance):
+                return axis, offset
+        return None
+
+    @staticmethod
+    def isMirrored(_capsules, _axis, _offset, _tolerance, _maxElements=1 << 20):
+        '''Find if the mirror of every capsule is another capsule, in either direction.
+
+        Args:
+            _capsules: An (N, 8) array of capsules
+            _axis: The axis perpendicular to the mirror plane
+            _offset: The position of the mirror plane along the axis
+            _tolerance: The largest difference allowed in any value
+            _maxElements: The maximum number of capsule pairs to compare at once
+
+        Returns:
+            bool: True if the capsules are mirrored by the plane
+        '''
+
+        mirrored = _capsules.copy()
+        mirrored[:, [_axis, _axis + 4]] = 2.0 * _offset - mirrored[:, [_axis, _axis + 4]]
+        flipped = np.hstack((mirrored[:, 4:8], mirrored[:, 0:4]))
+        rows = max(1, _maxElements // len(_capsules))
+        for start in range(0, len(_capsules), rows):
+            nearest = None
+            for candidates in (mirrored[start:start + rows], flipped[start:start + rows]):
+                difference = np.abs(candidates[:, np.newaxis, :] - _capsules[np.newaxis, :, :]).max(axis=2).min(axis=1)
+                nearest = difference if nearest is None else np.minimum(nearest, difference)
+            if (nearest > _tolerance).any():
+                return False
+        return True
+
+    def axes(self, _voxelSize, _boundingBox):
+        '''Find the sample positions along each axis of the bounding box.
+
+        Args:
+            _voxelSize: The size of the voxels
+            _boundingBox: The bounding box of the NSpheres
+
+        Returns:
+            list: The x, y and z sample positions
+        '''
+
+        return self.m_sampler.axes(_voxelSize, _boundingBox)
+
+    def mirrorIndices(self, _positions):
+        '''Find the position each grid position along the mirror axis is sampled at.
+
+        Args:
+            _positions: The positions along the mirror axis
+
+        Returns:
+            numpy.ndarray: The index of the sampled position for each position, or None if the positions are not mirrored by the plane
+        '''
+
+        count = len(_positions)
+        if count < 2:
+            return None
+        step = (_positions[-1] - _positions[0]) / (count - 1)
+        # Position i is mirrored onto position total - i
+        total = 2.0 * (self.m_offset - _positions[0]) / step
+        rounded = int(round(total))
+        tolerance = 1e-6 * step
+        if abs(total - rounded) * step > tolerance or rounded < 1:
+            return None
+        indices = np.arange(count)
+        mirrored = rounded - indices
+        copied = (2 * indices > rounded) & (mirrored >= 0)
+        if not copied.any():
+            return None
+        if np.abs(_positions[mirrored[copied]] - (2.0 * self.m_offset - _positions[copied])).max() > tolerance:
+            return None
+        return np.where(copied, mirrored, indices)
+
+    def reportProgress(self, _start, _total):
+        '''Make a progress function for a part of the sampled positions.
+
+        Args:
+            _start: The number of x planes sampled before this part
+            _total: The number of x planes sampled in every part
+
+        Returns:
+            function: The progress function for the sampler, or None if no progress is reported
+        '''
+
+        if self.m_progress is None:
+            return None
+        progress = self.m_progress
+        return lambda _done, _count: progress(_start + _done, _total)
+
+    def iterateAxes(self, _xs, _ys, _zs):
+        '''Sample half of a grid and mirror the points inside the mesh.
+
+        Args:
+            _xs: The x positions
+            _ys: The y positions
+            _zs: The z positions
+
+        Returns:
+            generator: An (M, 3) array of the points inside the mesh for each block, in x, y, z order
+        '''
+
+        axes = [_xs, _ys, _zs]
+        source = self.mirrorIndices(axes[self.m_axis])
+        if source is None:
+            self.m_positionsMirrored = 0
+            self.m_sampler.m_progress = self.m_progress
+            for points in self.m_sampler.iterateAxes(_xs, _ys, _zs):
+                yield points
+            return
+        copied = source != np.arange(len(source))
+        self.m_positionsMirrored = int(np.count_nonzero(copied))
+        if self.m_axis == 0:
+            for points in self.iterateMirroredPlanes(_xs, _ys, _zs, source, copied):
+                yield points
+            return
+
+        sampled = np.flatnonzero(~copied)
+        half = list(axes)
+        half[self.m_axis] = axes[self.m_axis][sampled]
+        # The position each sampled position is copied to, or -1 if it is not copied
+        targets = np.flatnonzero(copied)
+        copiedTo = np.full(len(source), -1, dtype=np.int64)
+        copiedTo[source[targets]] = targets
+        self.m_sampler.m_progress = self.m_progress
+        for points in self.m_sampler.iterateAxes(*half):
+            # Find the grid index of each point, the positions are taken from the axes so they match exactly
+            indices = [np.searchsorted(axes[a], points[:, a]) for a in range(3)]
+            mirror = copiedTo[indices[self.m_axis]]
+            keep = mirror >= 0
+            mirroredPoints = points[keep].copy()
+            mirroredPoints[:, self.m_axis] = axes[self.m_axis][mirror[keep]]
+            allIndices = [np.concatenate((indices[a], mirror[keep] if a == self.m_axis else indices[a][keep])) for a in range(3)]
+            order = np.lexsort((allIndices[2], allIndices[1], allIndices[0]))
+            yield np.vstack((points, mirroredPoints))[order]
+
+    def iterateMirroredPlanes(self, _xs, _ys, _zs, _source, _copied):
+        '''Sample the x planes up to the seam, copy the mirrored planes and then sample any x planes past them.
+
+        Args:
+            _xs: The x positions
+            _ys: The y positions
+            _zs: The z positions
+            _source: The index of the sampled x plane for each x plane, from mirrorIndices
+            _copied: True for each x plane which is copied from its mirror
+
+        Returns:
+            generator: An (M, 3) array of the points inside the mesh for each block, in x, y, z order
+        '''
+
+        copiedIndices = np.flatnonzero(_copied)
+        first, last = copiedIndices[0], copiedIndices[-1] + 1
+        total = len(_xs) - len(copiedIndices)
+        # The points of each x plane which is mirrored, the planes are taken from the axes so they match exactly
+        kept = {}
+        needed = set(_source[copiedIndices].tolist())
+        self.m_sampler.m_progress = self.reportProgress(0, total)
+        for points in self.m_sampler.iterateAxes(_xs[:first], _ys, _zs):
+            planes = np.searchsorted(_xs, points[:, 0])
+            for plane in needed.intersection(np.unique(planes).tolist()):
+                kept[plane] = points[planes == plane]
+            yield points
+        for plane in copiedIndices:
+            points = kept.pop(_source[plane], None)
+            if points is not None:
+                points = points.copy()
+                points[:, 0] = _xs[plane]
+                yield points
+        if last < len(_xs):
+            self.m_sampler.m_progress = self.reportProgress(first, total)
+            for points in self.m_sampler.iterateAxes(_xs[last:], _ys, _zs):
+                yield points
+
+    def iterateValues(self, _xs, _ys, _zs, _planes, _band=None):
+        '''Sample the signed distance at every voxel of half of a grid and mirror it, a block of x planes at a time.
+
+        Args:
+            _xs: The x positions
+            _ys: The y positions
+            _zs: The z positions
+            _planes: The number of x planes in each block
+            _band: If set, the values are clamped to the range [-_band, _band]
+
+        Returns:
+            generator: A (planes, len(_ys), len(_zs)) float32 array of signed distances for each block
+        '''
+
+        axes = [_xs, _ys, _zs]
+        source = self.mirrorIndices(axes[self.m_axis])
+        if source is None:
+            self.m_positionsMirrored = 0
+            self.m_sampler.m_progress = self.m_progress
+            for values in self.m_sampler.iterateValues(_xs, _ys, _zs, _planes, _band):
+                yield values
+            return
+        copied = source != np.arange(len(source))
+        self.m_positionsMirrored = int(np.count_nonzero(copied))
+        if self.m_axis == 0:
+            for values in self.groupPlanes(self.mirroredPlaneValues(_xs, _ys, _zs, _planes, _band, source, copied), _planes):
+                yield values
+            return
+
+        sampled = np.flatnonzero(~copied)
+        # The position of each grid position in the sampled half
+        position = np.zeros(len(source), dtype=np.int64)
+        position[sampled] = np.arange(len(sampled))
+        half = list(axes)
+        half[self.m_axis] = axes[self.m_axis][sampled]
+        self.m_sampler.m_progress = self.m_progress
+        for values in self.m_sampler.iterateValues(half[0], half[1], half[2], _planes, _band):
+            yield np.take(values, position[source], axis=self.m_axis)
+
+    def mirroredPlaneValues(self, _xs, _ys, _zs, _planes, _band, _source, _copied):
+        '''Sample the x planes up to the seam, copy the mirrored planes and then sample any x planes past them.
+
+        Args:
+            _xs: The x positions
+            _ys: The y positions
+            _zs: The z positions
+            _planes: The number of x planes in each block sampled
+            _band: If set, the values are clamped to the range [-_band, _band]
+            _source: The index of the sampled x plane for each x plane, from mirrorIndices
+            _copied: True for each x plane which is copied from its mirror
+
+        Returns:
+            generator: A (len(_ys), len(_zs)) float32 array of signed distances for each x plane
+        '''
+
+        copiedIndices = np.flatnonzero(_copied)
+        first, last = copiedIndices[0], copiedIndices[-1] + 1
+        total = len(_xs) - len(copiedIndices)
+        needed = set(_source[copiedIndices].tolist())
+        kept = {}
+        plane = 0
+        self.m_sampler.m_progress = self.reportProgress(0, total)
+        for values in self.m_sampler.iterateValues(_xs[:first], _ys, _zs, _planes, _band):
+            for planeValues in values:
+                if plane in needed:
+                    kept[plane] = planeValues
+                plane += 1
+                yield planeValues
+        for plane in copiedIndices:
+            yield kept.pop(_source[plane])
+        if last < len(_xs):
+            self.m_sampler.m_progress = self.reportProgress(first, total)
+            for values in self.m_sampler.iterateValues(_xs[last:], _ys, _zs, _planes, _band):
+                for planeValues in values:
+                    yield planeValues
+
+    def groupPlanes(self, _planeValues, _planes):
+        '''Join x planes of signed distances into blocks.
+
+        Args:
+            _planeValues: An iterable of (Y, Z) arrays of signed distances, in x order
+            _planes: The number of x planes in each block
+
+        Returns:
+            generator: A (planes, Y, Z) array for each block, the last block can have fewer planes
+        '''
+
+        block = []
+        for values in _planeValues:
+            block.append(values)
+            if len(block) == _planes:
+                yield np.stack(block)
+                block = []
+        if block:
+            yield np.stack(block)
+
+    def iterateSD(self, _voxelSize, _boundingBox):
+        '''Sample half of the grid and mirror the points inside the mesh.
+
+        Args:
+            _voxelSize: The size of the voxels
+            _boundingBox: The bounding box of the NSpheres
+
+        Returns:
+            generator: An (M, 3) array of the points inside the mesh for each block
+        '''
+
+        return self.iterateAxes(*self.axes(_voxelSize, _boundingBox))
+
+    def sampleAxes(self, _xs, _ys, _zs):
+        '''Sample half of a grid and mirror it to find all the points inside the mesh.
+
+        Args:
+            _xs: The x positions
+            _ys: The y positions
+            _zs: The z positions
+
+        Returns:
+            numpy.ndarray: An (M, 3) array of points that lie inside the mesh, in x, y, z order
+        '''
+
+        inside = [np.zeros((0, 3), dtype=np.float64)]
+        inside.extend(self.iterateAxes(_xs, _ys, _zs))
+        return np.concatenate(inside)
+
+    def sampleSD(self, _voxelSize, _boundingBox):
+        '''Sample half of the grid and mirror it to find all the points inside the mesh.
+
+        Args:
+            _voxelSize: The size of the voxels
+            _boundingBox: The bounding box of the NSpheres
+
+        Returns:
+            numpy.ndarray: An (M, 3) array of points that lie inside the mesh
+        '''
+
+        return self.sampleAxes(*self.axes(_voxelSize, _boundingBox))
@@ -0,0 +1,180 @@
+import numpy as np
+import maya.api.OpenMaya as om
+
+
+class NSphereGraph(object):
+    '''Class used for finding the line segments of connected NSphere nodes.
+
+    The world space position and radius of each NSphere is read once from its transform and cached between exports.
+    A world matrix callback on each transform marks its data to be read again, so only the NSpheres that moved are read.
+    This includes NSpheres that moved because a parent transform changed, so grouped and parented rigs export correctly.
+    Maya can give a new node the hash code of a deleted node, so the data of deleted NSpheres is removed by a node removed callback,
+    and the handle of each NSphere is checked before its cached data is used.
+    '''
+
+    def __init__(self):
+        '''Constructor'''
+
+        # The [x, y, z, r] data of each NSphere, keyed by the hash code of the NSphere node
+        self.m_data = {}
+        # The callback id on the transform of each NSphere
+        self.m_callbacks = {}
+        # The handle of each NSphere, used to check the data is for the same node
+        self.m_handles = {}
+        # The id of the callback for when an NSphere is deleted, or None if it has not been added
+        self.m_removedCallback = None
+        # The NSpheres that need to be read again
+        self.m_dirty = set()
+        # The number of NSpheres read from Maya by the last call to findLineSegments
+        self.m_reads = 0
+
+    def clear(self):
+        '''Remove all the callbacks and cached data.'''
+
+        if self.m_callbacks:
+            om.MMessage.removeCallbacks(list(self.m_callbacks.values()))
+        if self.m_removedCallback is not None:
+            om.MMessage.removeCallback(self.m_removedCallback)
+        self.m_data = {}
+        self.m_callbacks = {}
+        self.m_handles = {}
+        self.m_dirty = set()
+        self.m_removedCallback = None
+
+    def removeNode(self, _key):
+        '''Remove the callback and cached data of an NSphere.
+
+        Args:
+            _key: The key of the NSphere node
+        '''
+
+        if _key in self.m_callbacks:
+            om.MMessage.removeCallback(self.m_callbacks.pop(_key))
+        self.m_data.pop(_key, None)
+        self.m_handles.pop(_key, None)
+        self.m_dirty.discard(_key)
+
+    def nodeRemoved(self, _node, _clientData):
+        '''Callback for when an NSphere is deleted, so its hash code can not match the cached data if it is given to a new node.
+
+        Args:
+            _node: The NSphere node
+            _clientData: Not used
+        '''
+
+        key = self.nodeKey(_node)
+        if key in self.m_handles:
+            self.removeNode(key)
+
+    def worldMatrixModified(self, _node, _modified, _key):
+        '''Callback for when the world matrix of the transform of an NSphere changes.
+
+        Args:
+            _node: The transform node
+            _modified: The flags of the parts of the matrix that changed
+            _key: The hash code of the NSphere node
+        '''
+
+        self.m_dirty.add(_key)
+
+    def nodeKey(self, _node):
+        '''Find the key of an NSphere node.
+
+        Args:
+            _node: The NSphere node
+
+        Returns:
+            int: The hash code of the node
+        '''
+
+        return om.MObjectHandle(_node).hashCode()
+
+    def nodeData(self, _node, _key):
+        '''Find the position and radius of an NSphere, reading it from Maya if it is not cached.
+
+        Args:
+            _node: The NSphere node
+            _key: The key of the node
+
+        Returns:
+            tuple: The (x, y, z, r) data
+        '''
+
+        handle = self.m_handles.get(_key)
+        if handle is not None and not (handle.isValid() and handle.isAlive() and handle.object() == _node):
+            # The key is the hash code of a deleted NSphere given to this node
+            self.removeNode(_key)
+        if _key in self.m_data and _key not in self.m_dirty:
+            return self.m_data[_key]
+
+        # Get the world matrix of the transform node
+        transformPath = om.MFnDagNode(om.MFnDagNode(_node).parent(0)).getPath()
+        matrix = om.MTransformationMatrix(transformPath.inclusiveMatrix())
+        pos = matrix.translation(om.MSpace.kWorld)
+        data = (pos.x, pos.y, pos.z, max(matrix.scale(om.MSpace.kWorld)))
+        self.m_data[_key] = data
+        self.m_handles[_key] = om.MObjectHandle(_node)
+        self.m_dirty.discard(_key)
+        self.m_reads += 1
+        if _key not in self.m_callbacks:
+            self.m_callbacks[_key] = om.MDagMessage.addWorldMatrixModifiedCallback(transformPath, self.worldMatrixModified, _key)
+        return data
+
+    def findLineSegments(self, _rootNode):
+        '''Find each pair of NSphere nodes and find line segments data.
+
+        Args:
+            _rootNode: The root NSphere node
+
+        Returns:
+            numpy.ndarray: An (N, 8) array where each row is [parent position, parent radius, child position, child radius]
+        '''
+
+        self.m_reads = 0
+        if self.m_removedCallback is None:
+            self.m_removedCallback = om.MDGMessage.addNodeRemovedCallback(self.nodeRemoved, "NSphere")
+        # Keys of the nodes that have been checked or are waiting to be checked, this is a hash set so the lookup is constant time
+        queuedN = set([self.nodeKey(_rootNode)])
+        # Nodes that need to be checked
+        uncheckedN = [_rootNode]
+        dependencyFn = om.MFnDependencyNode()
+        # The keys of the NSpheres found and the line segments as (parent key, child key)
+        found = set()
+        lineSegments = []
+
+        while (len(uncheckedN) > 0):
+            # Take the last node from the unchecked list
+            node = uncheckedN.pop()
+            dependencyFn.setObject(node)
+            key = self.nodeKey(node)
+            self.nodeData(node, key)
+            found.add(key)
+
+            # Find the parent and line segment
+            nPlug = om.MPlug(node, dependencyFn.attribute("parentN")).source()
+            if not nPlug.isNull:
+                parent = nPlug.node()
+                parentKey = self.nodeKey(parent)
+                self.nodeData(parent, parentKey)
+                found.add(parentKey)
+                lineSegments.append((parentKey, key))
+
+            # Find the child nodes
+            childPlugs = om.MPlug(node, dependencyFn.attribute("childN")).destinations()
+            for p in childPlugs:
+                n = p.node()
+                childKey = self.nodeKey(n)
+                if childKey not in queuedN:
+                    queuedN.add(childKey)
+                    uncheckedN.append(n)
+
+        # Remove the NSpheres which are no longer connected, or have been deleted
+        for key in list(self.m_data.keys()):
+            if key not in found:
+                self.removeNode(key)
+
+        capsules = np.empty((len(lineSegments), 8), dtype=np.float64)
+        for i, (parentKey, childKey) in enumerate(lineSegments):
+            capsules[i, 0:4] = self.m_data[parentKey]
+            capsules[i, 4:8] = self.m_data[childKey]
+        return capsules
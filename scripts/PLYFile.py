@@ -0,0 +1,250 @@
+import numpy as np
+
+
+class PLYFile(object):
+    '''Class used for writing and reading point cloud .ply files.
+
+    The points are written as float32 in either the ascii or the binary_little_endian format.
+    Point clouds can have a normal for each point, which is written as the nx, ny and nz properties.
+    '''
+
+    # Width of the vertex count when it is patched after streaming the points
+    m_countDigits = 12
+
+    def writeHeader(self, _file, _count, _binary=True, _faceCount=0, _normals=False):
+        '''Write the header.
+
+        Args:
+            _file: The file object, opened in binary mode
+            _count: The number of points, or None to write a fixed width placeholder that is patched by writeCount
+            _binary: Write the binary_little_endian format instead of ascii
+            _faceCount: The number of triangles
+            _normals: Each point is followed by its normal
+
+        Returns:
+            int: The offset in the file of the vertex count
+        '''
+
+        lines = [
+            "ply",
+            "format binary_little_endian 1.0" if _binary else "format ascii 1.0",
+            "comment point cloud data",
+            "element vertex " + self.formatCount(_count),
+            "property float x",
+            "property float y",
+            "property float z"
+        ]
+        if _normals:
+            lines.extend(["property float nx", "property float ny", "property float nz"])
+        lines.extend([
+            "element face " + str(_faceCount),
+            "property list uchar int vertex_indices",
+            "end_header"
+        ])
+        header = "\n".join(lines) + "\n"
+        countOffset = _file.tell() + header.index("element vertex ") + len("element vertex ")
+        _file.write(header.encode("ascii"))
+        return countOffset
+
+    def formatCount(self, _count):
+        '''Format the vertex count for the header.
+
+        Args:
+            _count: The number of points, or None for a placeholder
+
+        Returns:
+            str: The vertex count, zero padded to a fixed width if it is a placeholder
+        '''
+
+        if _count is None:
+            return "0" * self.m_countDigits
+        return str(_count)
+
+    def writeCount(self, _file, _countOffset, _count):
+        '''Patch the placeholder vertex count in the header.
+
+        Args:
+            _file: The file object, opened in binary mode
+            _countOffset: The offset returned by writeHeader
+            _count: The number of points
+        '''
+
+        position = _file.tell()
+        _file.seek(_countOffset)
+        _file.write(str(_count).zfill(self.m_countDigits).encode("ascii"))
+        _file.seek(position)
+
+    def writePoints(self, _file, _points, _binary=True, _normals=False):
+        '''Write a block of points with one call.
+
+        Args:
+            _file: The file object, opened in binary mode
+            _points: An (M, 3) array of points, or an (M, 6) array of points and normals
+            _binary: Write the binary_little_endian format instead of ascii
+            _normals: The points have normals
+        '''
+
+        columns = 6 if _normals else 3
+        points = np.ascontiguousarray(_points, dtype="<f4").reshape(-1, columns)
+        if _binary:
+            _file.write(points.tobytes())
+        elif len(points) > 0:
+            # 9 significant digits is enough to read back the same float32 values
+            text = "\n".join([" ".join(["%.9g"] * columns)] * len(points)) % tuple(points.ravel().tolist())
+            _file.write((text + "\n").encode("ascii"))
+
+    def write(self, _filePath, _points, _binary=True, _normals=False):
+        '''Write the points to a .ply file.
+
+        Args:
+            _filePath: The path of the file, including the extension
+            _points: An (M, 3) array of points, or an (M, 6) array of points and normals
+            _binary: Write the binary_little_endian format instead of ascii
+            _normals: The points have normals
+        '''
+
+        with open(_filePath, "wb") as outputFile:
+            self.writeHeader(outputFile, len(_points), _binary, _normals=_normals)
+            self.writePoints(outputFile, _points, _binary, _normals)
+
+    def writeFaces(self, _file, _faces, _binary=True):
+        '''Write a block of triangles with one call.
+
+        Args:
+            _file: The file object, opened in binary mode
+            _faces: An (F, 3) array of vertex indices
+            _binary: Write the binary_little_endian format instead of ascii
+        '''
+
+        faces = np.asarray(_faces).reshape(-1, 3)
+        if _binary:
+            # Each face is a uchar count followed by three int indices
+            record = np.dtype([("count", "u1"), ("indices", "<i4", (3,))])
+            data = np.empty(len(faces), dtype=record)
+            data["count"] = 3
+            data["indices"] = faces
+            _file.write(data.tobytes())
+        elif len(faces) > 0:
+            text = "\n".join(["3 %d %d %d"] * len(faces)) % tuple(faces.ravel().tolist())
+            _file.write((text + "\n").encode("ascii"))
+
+    def writeMesh(self, _filePath, _vertices, _faces, _binary=True):
+        '''Write a triangle mesh to a .ply file.
+
+        Args:
+            _filePath: The path of the file, including the extension
+            _vertices: A (V, 3) array of vertex positions
+            _faces: An (F, 3) array of vertex indices
+            _binary: Write the binary_little_endian format instead of ascii
+        '''
+
+        with open(_filePath, "wb") as outputFile:
+            self.writeHeader(outputFile, len(_vertices), _binary, len(_faces))
+            self.writePoints(outputFile, _vertices, _binary)
+            self.writeFaces(outputFile, _faces, _binary)
+
+    def writeStream(self, _filePath, _pointBlocks, _binary=True, _normals=False):
+        '''Write blocks of points to a .ply file as they are generated.
+
+        The header is written with a placeholder vertex count which is patched once every block has been written.
+
+        Args:
+            _filePath: The path of the file, including the extension
+            _pointBlocks: An iterable of (M, 3) arrays of points, or (M, 6) arrays of points and normals
+            _binary: Write the binary_little_endian format instead of ascii
+            _normals: The points have normals
+
+        Returns:
+            int: The number of points written
+        '''
+
+        count = 0
+        with open(_filePath, "wb") as outputFile:
+            countOffset = self.writeHeader(outputFile, None, _binary, _normals=_normals)
+            for points in _pointBlocks:
+                self.writePoints(outputFile, points, _binary, _normals)
+                count += len(points)
+            self.writeCount(outputFile, countOffset, count)
+        return count
+
+    def read(self, _filePath):
+        '''Read the points from a .ply file written by this class.
+
+        Args:
+            _filePath: The path of the file
+
+        Returns:
+            numpy.ndarray: An (M, 3) float32 array of points
+        '''
+
+        return self.readVertices(_filePath)[0][:, 0:3]
+
+    def readNormals(self, _filePath):
+        '''Read the normals from a point cloud .ply file written by this class.
+
+        Args:
+            _filePath: The path of the file
+
+        Returns:
+            numpy.ndarray: An (M, 3) float32 array of normals, or None if the points have no normals
+        '''
+
+        vertices = self.readVertices(_filePath)[0]
+        return vertices[:, 3:6] if vertices.shape[1] == 6 else None
+
+    def readMesh(self, _filePath):
+        '''Read the points and triangles from a .ply file written by this class.
+
+        Args:
+            _filePath: The path of the file
+
+        Returns:
+            numpy.ndarray, numpy.ndarray: An (M, 3) float32 array of points and an (F, 3) array of vertex indices
+        '''
+
+        vertices, faces = self.readVertices(_filePath)
+        return vertices[:, 0:3], faces
+
+    def readVertices(self, _filePath):
+        '''Read every vertex property and the triangles from a .ply file written by this class.
+
+        Args:
+            _filePath: The path of the file
+
+        Returns:
+            numpy.ndarray, numpy.ndarray: An (M, P) float32 array of the P float properties of each vertex and an (F, 3) array of vertex indices
+        '''
+
+        with open(_filePath, "rb") as inputFile:
+            binary = False
+            count = 0
+            faceCount = 0
+            # The number of float properties of each vertex, 3 for points and 6 for points with normals
+            columns = 0
+            element = None
+            while True:
+                line = inputFile.readline()
+                if not line:
+                    raise IOError("Missing end_header in " + _filePath)
+                words = line.decode("ascii").split()
+                if words[:1] == ["format"]:
+                    binary = words[1] == "binary_little_endian"
+                elif words[:2] == ["element", "vertex"]:
+                    count = int(words[2])
+                    element = "vertex"
+                elif words[:2] == ["element", "face"]:
+                    faceCount = int(words[2])
+                    element = "face"
+                elif words[:2] == ["property", "float"] and element == "vertex":
+                    columns += 1
+                elif words[:1] == ["end_header"]:
+                    break
+            if binary:
+                points = np.frombuffer(inputFile.read(count * columns * 4), dtype="<f4")
+                record = np.dtype([("count", "u1"), ("indices", "<i4", (3,))])
+                faces = np.frombuffer(inputFile.read(faceCount * record.itemsize), dtype=record)["indices"]
+            else:
+                words = inputFile.read().split()
+                points = np.array(words[:count * columns], dtype=np.float32)
+                faces = np.array(words[count * columns:count * columns + faceCount * 4], dtype=np.int64).reshape(-1, 4)[:, 1:]
+        return points.reshape(-1, columns), faces.reshape(-1, 3)
@@ -1,21 +1,146 @@
-import math
+import numpy as np
 import maya.api.OpenMaya as om
-import maya.cmds as mc
+import maya.utils
+import CapsuleFile
+import ExportJob
+import ExportMonitor
+import NSphereGraph
+import SDFCache
+import SDFExporter
+import SmoothMin
+
+
+class PointCloudExporter(SDFExporter.SDFExporter):
+    '''Class used for calculating the point cloud data and exporting to a file.
+
+    The capsules are found from the selected NSpheres in Maya, and SDFExporter samples and writes them.
+    '''
+
+    def __init__(self):
+        '''Constructor'''
+
+        SDFExporter.SDFExporter.__init__(self)
+        # The NSphere data is cached between exports
+        self.m_graph = NSphereGraph.NSphereGraph()
+        # The running ExportJob, only one export can use the sampled grid at a time
+        self.m_job = None
+        self.m_onDone = None
+
+    def export(self, _folderPath, _fileName, _voxelSize, _smoothness, _adaptive=True, _errorBound=1e-4, _workers=1, _binary=True, _output="points", _incremental=False, _flavour="exponential", _monitor=None, _profilePath=None, _snap=False, _normals=False, _cache=None, _mirror=None, _levels=1):
+        if self.m_job is not None:
+            print "Error. An export is already running."
+            return
+        snapshot = self.snapshot(_folderPath, _fileName, _voxelSize, _smoothness, _errorBound, _binary, _output, _flavour)
+        if snapshot is not None:
+            fileDir, lineSegments = snapshot
+            try:
+                voxels = self.exportCapsules(fileDir, lineSegments, _voxelSize, _smoothness, _adaptive, _errorBound, _workers, _binary, _output, _incremental, _flavour, _monitor, _profilePath, _snap, _normals, _cache, _mirror, _levels)
+            except ExportMonitor.ExportCancelled:
+                print "Export cancelled."
+                return
+            if voxels is not None:
+                print "Sampled " + str(voxels) + " voxels."
+            print self.m_monitor.formatReport()
+            print "File written."
+
+    def exportAsync(self, _folderPath, _fileName, _voxelSize, _smoothness, _adaptive=True, _errorBound=1e-4, _workers=1, _binary=True, _output="points", _incremental=False, _flavour="exponential", _profilePath=None, _snap=False, _normals=False, _cache=None, _mirror=None, _levels=1, _onProgress=None, _onDone=None):
+        '''Export on a worker thread so Maya can be used while the file is sampled and written.
+
+        The NSpheres are read on this thread before the worker starts, so the worker never touches the scene.
+        The callbacks are run on the main thread with maya.utils.executeDeferred.
 
+        Args:
+            The same as export, and
+            _onProgress: Called with the stage name and the fraction of the stage done
+            _onDone: Called with the ExportJob when it has finished, after the result is printed
 
-class PointCloudExporter(object):
-    '''Class used for calculating the point cloud data and exporting to a file.'''
+        Returns:
+            ExportJob: The running job, or None if nothing needed to be sampled
+        '''
+
+        if self.m_job is not None:
+            print "Error. An export is already running."
+            return None
+        snapshot = self.snapshot(_folderPath, _fileName, _voxelSize, _smoothness, _errorBound, _binary, _output, _flavour)
+        if snapshot is None:
+            return None
+        fileDir, lineSegments = snapshot
+        arguments = {
+            "_filePath": fileDir,
+            "_sdCapsuleData": lineSegments,
+            "_voxelSize": _voxelSize,
+            "_smoothness": _smoothness,
+            "_adaptive": _adaptive,
+            "_errorBound": _errorBound,
+            "_workers": _workers,
+            "_binary": _binary,
+            "_output": _output,
+            "_incremental": _incremental,
+            "_flavour": _flavour,
+            "_profilePath": _profilePath,
+            "_snap": _snap,
+            "_normals": _normals,
+            "_cache": _cache,
+            "_mirror": _mirror,
+            "_levels": _levels
+        }
+        self.m_onDone = _onDone
+        self.m_job = ExportJob.ExportJob(self, arguments, _onProgress, self.finishJob, maya.utils.executeDeferred)
+        self.m_job.start()
+        return self.m_job
+
+    def finishJob(self, _job):
+        '''Print the result of an ExportJob, this is called on the main thread when it is done.
+
+        Args:
+            _job: The ExportJob
+        '''
+
+        self.m_job = None
+        if _job.m_cancelled:
+            print "Export cancelled."
+        elif _job.m_error is not None:
+            print "Error. The export failed."
+            print _job.m_error
+        else:
+            if _job.m_result is not None:
+                print "Sampled " + str(_job.m_result) + " voxels."
+            print _job.m_monitor.formatReport()
+            print "File written."
+        if self.m_onDone is not None:
+            self.m_onDone(_job)
+
+    def snapshot(self, _folderPath, _fileName, _voxelSize, _smoothness, _errorBound, _binary, _output, _flavour):
+        '''Read the capsules of the selected NSpheres, writing the file straight away if it does not need sampling.
+
+        Args:
+            The same as export
+
+        Returns:
+            tuple: The path of the file without the extension and the line segments data, or None if there is nothing to sample
+        '''
 
-    def export(self, _folderPath, _fileName, _voxelSize, _smoothness):
         rootNode = self.findFromSelection()
-        if rootNode is not None:
-            lineSegments = self.findLineSegments(rootNode)
-            if len(lineSegments) > 7:
-                bbox = self.findBoundingBox(lineSegments, _voxelSize)
-                points = self.sampleSD(lineSegments, _voxelSize, _smoothness, bbox)
-                fileDir = _folderPath + "/" + _fileName
-                self.write(fileDir, points)
-                print "File written."
+        if rootNode is None:
+            return None
+        lineSegments = self.findLineSegments(rootNode)
+        if len(lineSegments) <= 7:
+            return None
+        fileDir = _folderPath + "/" + _fileName
+        # Write the capsules so they can be exported without Maya by BatchExport
+        if _output == "capsules":
+            capsuleFile = CapsuleFile.CapsuleFile()
+            capsuleFile.write(fileDir + capsuleFile.extension(_binary), lineSegments, _binary)
+            print "File written."
+            return None
+        # Use the points of an NSphereSDF node if it has already sampled the same NSpheres
+        useCache = _output == "points" and _flavour == SmoothMin.SmoothMin.m_exponential
+        cachedPoints = self.findCachedPoints(rootNode, lineSegments, _voxelSize, _smoothness, _errorBound) if useCache else None
+        if cachedPoints is not None:
+            self.writeStream(fileDir, [cachedPoints], _binary)
+            print "File written."
+            return None
+        return fileDir, lineSegments
 
     def findFromSelection(self):
         '''Find the first selected object'''
@@ -31,6 +156,8 @@ class PointCloudExporter(object):
     def findLineSegments(self, _rootNode):
         '''Find each pair of NSphere nodes and find line segments data.
 
+        The world space position and radius of each NSphere is cached and only read again when its transform moves.
+
         Args:
             _rootNode: The root NSphere node
 
@@ -38,132 +165,37 @@ class PointCloudExporter(object):
             list: The line segments data as one list with the format[position, radius, position, radius]
         '''
 
-        # Nodes that have already been checked
-        checkedN = om.MObjectArray()
-        # Nodes that need to be checked
-        uncheckedN = om.MObjectArray()
-        uncheckedN.append(_rootNode)
-
-        # Create a dependency node and DAG node function set
-        dependencyFn = om.MFnDependencyNode()
-        dagFn = om.MFnDagNode()
-
-        # Store the line segments data as [parent position, parent radius, child position, child radius]
-        # Note position is not a list or tuple, it is 3 values
-        lineSegments = []
-
-        # Loop through the node tree and find the line segments and children
-        while (len(uncheckedN) > 0):
-            # Add the last node to the checked list and remove from unchecked list
-            node = uncheckedN[-1]
-            uncheckedN.remove(-1)
-            checkedN.append(node)
-
-            # Set the dependency node to the last item in the unchecked list
-            dependencyFn.setObject(node)
-            # print dependencyFn.name()
-
-            # Find the parent and line segment
-            parentNAttr = dependencyFn.attribute("parentN")
-            nPlug = om.MPlug(node, parentNAttr).source()
-            if not nPlug.isNull:
-                # Get the parent NSphere node
-                n = nPlug.node()
-                dagFn.setObject(n)
-                # Get the transform node
-                p = dagFn.parent(0)
-                dagFn.setObject(p)
-                transformName = dagFn.name()
-                # Get the data from the node
-                pos = mc.getAttr(transformName + ".translate")[0]
-                parentData = [i for i in pos]
-                parentData.append(max(mc.getAttr(transformName + ".scale")[0]))
-
-                # Get the current NSphere and find the transform
-                dagFn.setObject(node)
-                p = dagFn.parent(0)
-                dagFn.setObject(p)
-                transformName = dagFn.name()
-                # Get the data
-                pos = mc.getAttr(transformName + ".translate")[0]
-                childData = [i for i in pos]
-                childData.append(max(mc.getAttr(transformName + ".scale")[0]))
-
-                # Add to the line segments data
-                lineSegments += parentData
-                lineSegments += childData
-
-            # Find the child nodes
-            childNAttr = dependencyFn.attribute("childN")
-            nPlug = om.MPlug(node, childNAttr)
-            childPlugs = nPlug.destinations()
-            for p in childPlugs:
-                n = p.node()
-                if n not in checkedN:
-                    uncheckedN.append(n)
-
-        # Return the list of line segments data
-        return lineSegments
-
-    def findBoundingBox(self, _sdCapsuleData, _voxelSize):
-        '''Find the bounding box from the sd capsule data.
+        return self.m_graph.findLineSegments(_rootNode).ravel().tolist()
 
-        Args:
-            _sdCapsuleData: A list of the sdCapsule data.
-            _voxelSize: The size of the voxels
-
-        Returns:
-            tuple, tuple: The min and max coordinate (x,y,z) for the bounding box as a multiple of the voxel size.
-        '''
-
-        # Note the list is in the format [x, y, z, r, x, y, z, r, ...]
-        # Split list into list of lists, i.e [[x,y,z,r, x,y,z,r], ...]
-        # This is 8 values long as it is the [parent, child] data.
-        # Only the child data is needed as parents can be children of other nodes and can often be duplicated.
-        sdData = zip(*[iter(_sdCapsuleData)] * 8)
-        # Get the x,y,z values from the sdData after adding/subtracting the radius at each point
-        # This is a list of tuples as [(x-r, x+r, y-r, y+r, z-r, z+r)]
-        xyz = [(d[4] - d[7], d[4] + d[7], d[5] - d[7], d[5] + d[7], d[6] - d[7], d[6] + d[7]) for d in sdData]
-        # Add the first element of sdCapsuleData to this list as it is never a child
-        xyz += [(_sdCapsuleData[0] - _sdCapsuleData[3], _sdCapsuleData[0] + _sdCapsuleData[3], _sdCapsuleData[1] - _sdCapsuleData[3], _sdCapsuleData[1] + _sdCapsuleData[3], _sdCapsuleData[2] - _sdCapsuleData[3], _sdCapsuleData[2] + _sdCapsuleData[3])]
-        # Transpose this list so it is a list of tuples [(x-r), (x+r), (y-r), (y+r), (z-r), (z+r)]
-        xyzT = map(tuple, map(None, *xyz))
-        # Find the min/max of all the values
-        xyzMin = [max(xyzT[i]) if i % 2 else min(xyzT[i]) for i in range(6)]
-        # Scale this list so it is a multiple of the voxel size
-        # This extends each value to the next mutliple of the voxel (larger value if positive, smaller value if negative)
-        xyz = [math.ceil(v / _voxelSize) * _voxelSize if v > 0 else math.floor(v / _voxelSize) * _voxelSize for v in xyzMin]
-
-        # Calculate the min and max coordinates as the min/max from the lists
-        minBB = (xyz[0], xyz[2], xyz[4])
-        maxBB = (xyz[1], xyz[3], xyz[5])
-
-        return minBB, maxBB
-
-    def sampleSD(self, _sdCapsuleData, _voxelSize, _smoothness, _boundingBox):
-        '''Sample the grid to find all the signed distances.
+    def findCachedPoints(self, _rootNode, _sdCapsuleData, _voxelSize, _smoothness, _errorBound):
+        '''Find the points cached by an NSphereSDF node connected to the root NSphere.
 
         Args:
-            _sdCapsuleData: The signed distance capsule data.
-            _voxelSize: The size of the voxels.
+            _rootNode: The root NSphere node
+            _sdCapsuleData: The line segments data found from the root NSphere
+            _voxelSize: The size of the voxels
             _smoothness: The smoothness constant (k) for the smin function
-            _boundingBox: The bounding box of the ZSpheres
+            _errorBound: Leave out capsules which change the signed distance by less than this, or None to use every capsule
 
         Returns:
-            list: Points that lie inside the mesh
+            numpy.ndarray: An (M, 3) array of points that lie inside the mesh, or None if no node has the same NSpheres and settings
         '''
 
-        # Create an empty list of points
-        points = []
-        # Loop through the space and fill the dict
-        for x in self.frange(_boundingBox[0][0], _boundingBox[1][0], _voxelSize):
-            for y in self.frange(_boundingBox[0][1], _boundingBox[1][1], _voxelSize):
-                for z in self.frange(_boundingBox[0][2], _boundingBox[1][2], _voxelSize):
-                    value = self.calculateSD((x, y, z), _sdCapsuleData, _smoothness)
-                    if value < 0:
-                        points.append((x, y, z))
-
-        return points
+        capsules = set(map(tuple, np.reshape(_sdCapsuleData, (-1, 8)).tolist()))
+        outPlug = om.MFnDependencyNode(_rootNode).findPlug("outSdCapsule", False)
+        for destination in outPlug.destinations():
+            nodeFn = om.MFnDependencyNode(destination.node())
+            if nodeFn.typeName != "NSphereSDF":
+                continue
+            settings = [nodeFn.findPlug(name, False).asDouble() for name in ("voxelSize", "smoothness", "errorBound")]
+            if settings != [_voxelSize, _smoothness, _errorBound or 0.0]:
+                continue
+            # Reading the plug samples the points again if a connected NSphere is dirty
+            nodeFn.findPlug("outPointCount", False).asInt()
+            cache = SDFCache.SDFCache.m_caches.get(om.MObjectHandle(destination.node()).hashCode())
+            if cache is not None and cache.m_capsules is not None and set(map(tuple, cache.m_capsules.tolist())) == capsules:
+                return cache.m_points
+        return None
 
     def calculateSD(self, _pos, _sdCapsuleData, _k):
         '''Calculate the signed distance at a position
@@ -224,6 +256,7 @@ class PointCloudExporter(object):
         This is based of the function smin from:
         http://iquilezles.org/www/articles/smin/smin.htm
         And is generalised to n dimensions, where n is the length of the input list _values
+        The smallest value is subtracted before taking the exponentials, see SmoothMin, so large k does not overflow
 
         Args:
             _k: Power constant
@@ -232,18 +265,14 @@ class PointCloudExporter(object):
         Returns:
             float: The smooth min from the list of values
         '''
-        minV = min(_values)
-        minusK = -_k
-        res = 0
-        for value in _values:
-            res += math.exp(minusK * value)
-
-        result = math.log(res) / _k
-        return math.copysign(result, minV)
+        return SmoothMin.SmoothMin(_k).smin(_values)
 
     def frange(self, _start, _end, _step):
         '''Float range function.
 
+        Each value is found from its integer index instead of adding the step each time, so rounding errors do not build up.
+        The number of values is the same as SDFSampler.axis so the grids match.
+
         Args:
             _start: The start of the range
             _end: The end of the range
@@ -253,28 +282,6 @@ class PointCloudExporter(object):
             generator: The float range generator
         '''
 
-        value = _start
-        while value < _end:
-            yield value
-            value += _step
-
-    def write(self, _filePath, _points):
-        # Create the output ply file
-        outputFile = file(_filePath + ".ply", "w")
-        # Write the header
-        self.writeLine(outputFile, "ply")
-        self.writeLine(outputFile, "format ascii 1.0")
-        self.writeLine(outputFile, "comment point cloud data")
-        self.writeLine(outputFile, "element vertex " + str(len(_points)))
-        self.writeLine(outputFile, "property float x")
-        self.writeLine(outputFile, "property float y")
-        self.writeLine(outputFile, "property float z")
-        self.writeLine(outputFile, "element face 0")
-        self.writeLine(outputFile, "property list uchar int vertex_indices")
-        self.writeLine(outputFile, "end_header")
-        # Loop through the points and write them
-        for p in _points:
-            self.writeLine(outputFile, "{0} {1} {2}".format(str(p[0]), str(p[1]), str(p[2])))
-
-    def writeLine(self, _file, _text=""):
-        _file.write(_text + "\n")
+        count = max(0, int(np.ceil((_end - _start) / _step - 1e-6)))
+        for index in range(count):
+            yield _start + index * _step
@@ -1,5 +1,9 @@
+import multiprocessing
 import maya.cmds as mc
+import maya.mel as mel
+import ExportMonitor
 import PointCloudExport
+import ResultCache
 
 
 class UI(object):
@@ -9,6 +13,9 @@ class UI(object):
         self.pce = PointCloudExport.PointCloudExporter()
         self.m_windowTitle = "Point Cloud Exporter"
         self.m_window = mc.window()
+        self.m_monitor = None
+        # The sampled results are kept on disk so exporting the same NSpheres again skips the sampling
+        self.m_cache = ResultCache.ResultCache()
 
     def start(self):
         self.close()
@@ -18,6 +25,11 @@ class UI(object):
     def close(self):
         if (mc.window(self.m_window, exists=True)):
             mc.deleteUI(self.m_window)
+        # Stop a background export, its done callback checks the controls still exist
+        if self.pce.m_job is not None:
+            self.pce.m_job.cancel()
+        # Remove the callbacks used to cache the NSphere data
+        self.pce.m_graph.clear()
 
     def reloadUI(self):
         self.m_window = mc.window(title=self.m_windowTitle, rtf=True)
@@ -25,12 +37,41 @@ class UI(object):
         mc.separator(h=5)
         self.m_directory = mc.textFieldButtonGrp(label="Folder Path:", pht="Folder path", buttonLabel="Pick", buttonCommand=self.pickFolder)
         self.m_fileName = mc.textFieldGrp(label="File Name:", pht="File name")
+        self.m_outputControl = mc.optionMenuGrp(label="Output:")
+        mc.menuItem(label="Point Cloud")
+        mc.menuItem(label="Voxel Point Cloud")
+        mc.menuItem(label="Surface Point Cloud")
+        mc.menuItem(label="Sparse SDF Volume")
+        mc.menuItem(label="Dense SDF Volume")
+        mc.menuItem(label="Mesh")
+        mc.menuItem(label="Capsule File")
+        self.m_formatControl = mc.optionMenuGrp(label="Format:")
+        mc.menuItem(label="Binary")
+        mc.menuItem(label="ASCII")
+        self.m_snapControl = mc.checkBoxGrp(label="Snap to Surface", value1=True)
+        self.m_normalsControl = mc.checkBoxGrp(label="Normals", value1=True)
         mc.separator(h=5)
         self.m_voxelSizeControl = mc.floatSliderGrp(label="Voxel Size", field=True, minValue=0.0001, maxValue=1.0, value=0.5, step=0.0001)
         mc.separator(h=5)
         self.m_smoothnessControl = mc.floatSliderGrp(label="Smoothness", field=True, minValue=1.0, maxValue=50.0, value=4.0)
+        self.m_flavourControl = mc.optionMenuGrp(label="Smooth Min:")
+        mc.menuItem(label="Exponential")
+        mc.menuItem(label="Polynomial")
+        mc.separator(h=5)
+        self.m_adaptiveControl = mc.checkBoxGrp(label="Adaptive Sampling", value1=True)
+        self.m_incrementalControl = mc.checkBoxGrp(label="Incremental", value1=False)
+        self.m_mirrorControl = mc.checkBoxGrp(label="Mirror Sampling", value1=False)
+        self.m_levelsControl = mc.intSliderGrp(label="Progressive Levels", field=True, minValue=1, maxValue=8, value=1)
+        mc.separator(h=5)
+        cpuCount = multiprocessing.cpu_count()
+        self.m_workersControl = mc.intSliderGrp(label="Workers", field=True, minValue=1, maxValue=max(2, cpuCount), value=cpuCount)
+        self.m_profileControl = mc.checkBoxGrp(label="Profile", value1=False)
+        self.m_backgroundControl = mc.checkBoxGrp(label="Export in Background", value1=False)
+        self.m_cacheControl = mc.checkBoxGrp(label="Cache Results", value1=False)
         mc.separator(h=5)
         mc.button(label="Export", command=self.export)
+        self.m_cancelButton = mc.button(label="Cancel", command=self.cancel, enable=False)
+        self.m_progressControl = mc.progressBar(maxValue=100)
         mc.separator(h=5)
         mc.setParent("..")
 
@@ -46,5 +87,66 @@ class UI(object):
         fileName = mc.textFieldGrp(self.m_fileName, query=True, text=True)
         voxelSize = mc.floatSliderGrp(self.m_voxelSizeControl, query=True, value=True)
         smoothness = mc.floatSliderGrp(self.m_smoothnessControl, query=True, value=True)
+        flavour = mc.optionMenuGrp(self.m_flavourControl, query=True, value=True).lower()
+        adaptive = mc.checkBoxGrp(self.m_adaptiveControl, query=True, value1=True)
+        incremental = mc.checkBoxGrp(self.m_incrementalControl, query=True, value1=True)
+        # Only half of a mirrored rig is sampled, other rigs are sampled as usual
+        mirror = "auto" if mc.checkBoxGrp(self.m_mirrorControl, query=True, value1=True) else None
+        workers = mc.intSliderGrp(self.m_workersControl, query=True, value=True)
+        binary = mc.optionMenuGrp(self.m_formatControl, query=True, value=True) == "Binary"
+        outputs = {"Point Cloud": "points", "Voxel Point Cloud": "voxels", "Surface Point Cloud": "surface", "Sparse SDF Volume": "sparse", "Dense SDF Volume": "dense", "Mesh": "mesh", "Capsule File": "capsules"}
+        output = outputs[mc.optionMenuGrp(self.m_outputControl, query=True, value=True)]
+        # Point clouds can be written as a series of levels, the coarsest first, the other outputs are written at the voxel size
+        levels = mc.intSliderGrp(self.m_levelsControl, query=True, value=True) if output in ("points", "voxels") else 1
+        if levels > 1 and (incremental or mirror is not None):
+            # Each level is refined from the previous one, so the levels can not be updated incrementally or mirrored
+            print "Progressive levels sample the whole rig, Incremental and Mirror Sampling are not used"
+            incremental = False
+            mirror = None
+        profile = mc.checkBoxGrp(self.m_profileControl, query=True, value1=True)
+        snap = mc.checkBoxGrp(self.m_snapControl, query=True, value1=True)
+        normals = mc.checkBoxGrp(self.m_normalsControl, query=True, value1=True)
+        background = mc.checkBoxGrp(self.m_backgroundControl, query=True, value1=True)
+        cache = self.m_cache if mc.checkBoxGrp(self.m_cacheControl, query=True, value1=True) else None
         if folderDir != "" and fileName != "":
-            self.pce.export(folderDir, fileName, voxelSize, smoothness)
+            # The cProfile stats can be read with python -m pstats
+            profilePath = folderDir + "/" + fileName + ".prof" if profile else None
+            if background:
+                # The NSpheres are read now and the sampling runs on a worker thread, so Maya can be used until it is done
+                job = self.pce.exportAsync(folderDir, fileName, voxelSize, smoothness, adaptive, _workers=workers, _binary=binary, _output=output, _incremental=incremental, _flavour=flavour, _profilePath=profilePath, _snap=snap, _normals=normals, _cache=cache, _mirror=mirror, _levels=levels, _onProgress=self.updateJobProgress, _onDone=self.jobDone)
+                if job is not None:
+                    mc.button(self.m_cancelButton, edit=True, enable=True)
+                return
+            self.m_monitor = ExportMonitor.ExportMonitor()
+            self.m_monitor.addListener(self.updateProgress)
+            # The main progress bar lets the export be cancelled with Esc
+            self.m_mainProgressBar = mel.eval("$tmp = $gMainProgressBar")
+            mc.progressBar(self.m_mainProgressBar, edit=True, beginProgress=True, isInterruptable=True, status="Exporting", maxValue=100)
+            try:
+                self.pce.export(folderDir, fileName, voxelSize, smoothness, adaptive, _workers=workers, _binary=binary, _output=output, _incremental=incremental, _flavour=flavour, _monitor=self.m_monitor, _profilePath=profilePath, _snap=snap, _normals=normals, _cache=cache, _mirror=mirror, _levels=levels)
+            finally:
+                mc.progressBar(self.m_mainProgressBar, edit=True, endProgress=True)
+                mc.progressBar(self.m_progressControl, edit=True, progress=0)
+
+    def updateProgress(self, _stage, _fraction):
+        # Called from the sampling loop by the ExportMonitor
+        if mc.progressBar(self.m_mainProgressBar, query=True, isCancelled=True):
+            self.m_monitor.cancel()
+        progress = int(100 * _fraction)
+        mc.progressBar(self.m_mainProgressBar, edit=True, progress=progress, status="Exporting: " + _stage)
+        mc.progressBar(self.m_progressControl, edit=True, progress=progress)
+
+    def cancel(self, *args):
+        if self.pce.m_job is not None:
+            self.pce.m_job.cancel()
+
+    def updateJobProgress(self, _stage, _fraction):
+        # Called on the main thread with maya.utils.executeDeferred while a background export runs
+        if mc.progressBar(self.m_progressControl, exists=True):
+            mc.progressBar(self.m_progressControl, edit=True, progress=int(100 * _fraction))
+
+    def jobDone(self, _job):
+        # Called on the main thread when a background export has finished, been cancelled or failed
+        if mc.button(self.m_cancelButton, exists=True):
+            mc.button(self.m_cancelButton, edit=True, enable=False)
+            mc.progressBar(self.m_progressControl, edit=True, progress=0)
@@ -0,0 +1,287 @@
+import math
+import multiprocessing.pool
+import numpy as np
+import SDFSampler
+import VoxelPoints
+
+
+class ProgressiveSampler(object):
+    '''Class used for sampling the grid as a series of levels, from a coarse grid to the voxel size, refining only near the surface.
+
+    Each level has twice the voxel size of the next, and every level covers the same cells,
+    so the corners and the centre of a cell of one level are on the grid of the next level.
+    The smin function takes the sign of the smallest capsule distance, and the smallest capsule distance is Lipschitz continuous,
+    so the distances at the centre and corners of a cell bound it within the cell, as in AdaptiveSampler.
+    Cells which are provably inside are filled and cells which are provably outside are skipped.
+    Only the positions of the next level in the cells which may cross the surface are sampled,
+    and the corners and centres already sampled are not sampled again.
+    The points of the last level are the same as sampling the whole grid, in the same order.
+    '''
+
+    # The number of voxels of each level along each side of a voxel of the previous level
+    m_ratio = 2
+
+    def __init__(self, _sampler, _levels=3, _maxElements=1 << 20, _workers=1):
+        '''Constructor
+
+        Args:
+            _sampler: The AdaptiveSampler used to sample the positions and find the Lipschitz constant of the capsules
+            _levels: The number of levels, including the last level at the voxel size
+            _maxElements: The maximum number of positions to find or sample at once
+            _workers: The number of threads the positions of each level are sampled by, split into chunks
+        '''
+
+        self.m_sampler = _sampler
+        self.m_levels = max(1, int(_levels))
+        self.m_maxElements = _maxElements
+        self.m_workers = max(1, int(_workers))
+        # The thread pool while the levels are sampled with more than one worker
+        self.m_pool = None
+        self.m_lipschitz = float(_sampler.m_lipschitz.max()) if len(_sampler.m_lipschitz) > 0 else 1.0
+        # A capsule left out by the index is further than the margin, so the smallest distance is at least the margin
+        self.m_margin = _sampler.m_index.m_margin if _sampler.m_index is not None else float("inf")
+        # Called with the number of positions sampled and the total of each level, see ExportMonitor.progress
+        self.m_progress = None
+        # Counters from the last levels sampled
+        self.m_voxelsSampled = []
+        self.m_voxelsReused = 0
+
+    def strides(self):
+        '''Find the number of voxels along each side of a voxel of each level.
+
+        Returns:
+            list: The stride of each level, the coarsest first and 1 last
+        '''
+
+        return [self.m_ratio ** (self.m_levels - 1 - level) for level in range(self.m_levels)]
+
+    def levelAxes(self, _voxelSize, _boundingBox, _stride, _counts):
+        '''Find the sample positions along each axis of a level.
+
+        The positions are found from the index on the grid at the voxel size, so they are the same as the positions of SDFSampler.axis.
+
+        Args:
+            _voxelSize: The size of the voxels of the last level
+            _boundingBox: The bounding box of the NSpheres
+            _stride: The stride of the level
+            _counts: The number of positions along each axis
+
+        Returns:
+            list: The x, y and z sample positions
+        '''
+
+        return [_boundingBox[0][i] + (np.arange(_counts[i], dtype=np.int64) * _stride).astype(np.float64) * _voxelSize for i in range(3)]
+
+    def uniqueKeys(self, _cells, _offsets, _scale, _counts):
+        '''Find the flat indices of positions at offsets from the first corner of cells, without repeats.
+
+        Args:
+            _cells: A (C, 3) array of the first corner of each cell
+            _offsets: A (K, 3) array of offsets from the first corner
+            _scale: The number of positions along each side of a cell
+            _counts: The number of positions along each axis
+
+        Returns:
+            numpy.ndarray: The sorted flat indices
+        '''
+
+        rows = max(1, self.m_maxElements // len(_offsets))
+        keys = [np.zeros(0, dtype=np.int64)]
+        for start in range(0, len(_cells), rows):
+            positions = (_cells[start:start + rows, np.newaxis, :] * _scale + _offsets[np.newaxis, :, :]).reshape(-1, 3)
+            keys.append(np.unique(np.ravel_multi_index(positions.T, _counts)))
+        return np.unique(np.concatenate(keys))
+
+    def lookup(self, _keys, _known):
+        '''Find the values of positions which have already been sampled.
+
+        Args:
+            _keys: The sorted flat indices of the positions
+            _known: The sorted flat indices, signed distances and smallest capsule distances of the positions sampled, or None
+
+        Returns:
+            numpy.ndarray, numpy.ndarray: If each position was sampled, and the index into _known of those that were
+        '''
+
+        if _known is None or len(_known[0]) == 0:
+            return np.zeros(len(_keys), dtype=bool), np.zeros(0, dtype=np.int64)
+        found = np.minimum(np.searchsorted(_known[0], _keys), len(_known[0]) - 1)
+        match = _known[0][found] == _keys
+        return match, found[match]
+
+    def sampleKeys(self, _keys, _axes, _counts, _known=None):
+        '''Sample positions, using the values of the positions which have already been sampled.
+
+        Args:
+            _keys: The sorted flat indices of the positions
+            _axes: The sample positions of the level
+            _counts: The number of positions along each axis of the level
+            _known: The sorted flat indices, signed distances and smallest capsule distances of the positions sampled, or None
+
+        Returns:
+            tuple: The flat indices, signed distances and smallest capsule distances of the positions
+        '''
+
+        values = np.empty(len(_keys), dtype=np.float64)
+        nearest = np.empty(len(_keys), dtype=np.float64)
+        reused, found = self.lookup(_keys, _known)
+        if len(found) > 0:
+            values[reused] = _known[1][found]
+            nearest[reused] = _known[2][found]
+        self.m_voxelsReused += len(found)
+        sample = np.flatnonzero(~reused)
+        rows = max(1, self.m_maxElements)
+        if self.m_pool is not None:
+            # Several chunks for each worker so they finish at about the same time
+            rows = max(1, min(rows, -(-len(sample) // (4 * self.m_workers))))
+        chunks = [sample[start:start + rows] for start in range(0, len(sample), rows)]
+        tasks = [(_keys[indices], _axes, _counts) for indices in chunks]
+        results = self.m_pool.imap(self.sampleChunk, tasks) if self.m_pool is not None else (self.sampleChunk(task) for task in tasks)
+        done = 0
+        # The chunks are returned in order, and the progress is reported from this thread so the monitor can cancel the export
+        for indices, (chunkValues, chunkNearest) in zip(chunks, results):
+            values[indices] = chunkValues
+            nearest[indices] = chunkNearest
+            done += len(indices)
+            if self.m_progress is not None:
+                self.m_progress(done, len(sample))
+        self.m_voxelsSampled[-1] += len(sample)
+        return _keys, values, nearest
+
+    def sampleChunk(self, _task):
+        '''Sample a chunk of positions, run by the workers.
+
+        Args:
+            _task: The flat indices of the positions, the sample positions of the level and the number of positions along each axis
+
+        Returns:
+            numpy.ndarray, numpy.ndarray: The signed distances and smallest capsule distances of the positions
+        '''
+
+        keys, axes, counts = _task
+        positions = np.unravel_index(keys, counts)
+        points = np.column_stack([axes[i][positions[i]] for i in range(3)])
+        nearest = np.empty(len(keys), dtype=np.float64)
+        values = self.m_sampler.calculateSD(points, nearest)
+        return values, nearest
+
+    def classifyCells(self, _centre, _corners, _stride, _voxelSize, _boundingBox):
+        '''Find the cells which are provably inside or outside from the smallest capsule distance at their centre and corners.
+
+        Every position in a cell is within half the diagonal of the centre, and of a corner.
+
+        Args:
+            _centre: The smallest capsule distance at the centre of each cell
+            _corners: A (C, 8) array of the smallest capsule distance at the corners of each cell
+            _stride: The stride of the level of the cells
+            _voxelSize: The size of the voxels of the last level
+            _boundingBox: The bounding box of the NSpheres
+
+        Returns:
+            numpy.ndarray, numpy.ndarray: For each cell, if it is inside and if it is outside
+        '''
+
+        halfDiagonal = 0.5 * math.sqrt(3.0) * _stride * _voxelSize
+        # Pad the bounds slightly so rounding errors can not misclassify a cell
+        change = self.m_lipschitz * halfDiagonal + 1e-9 * (1.0 + np.abs(np.asarray(_boundingBox)).max())
+        upper = np.minimum(_centre, _corners.max(axis=1))
+        lower = np.maximum(np.minimum(_centre, self.m_margin), np.minimum(_corners, self.m_margin).min(axis=1))
+        return upper + change < 0.0, lower - change > 0.0
+
+    def iterateLevels(self, _voxelSize, _boundingBox):
+        '''Sample each level, the coarsest first.
+
+        Args:
+            _voxelSize: The size of the voxels of the last level
+            _boundingBox: The bounding box of the NSpheres
+
+        Returns:
+            generator: The stride, the number of voxels along each axis and the VoxelPoints of the points inside the mesh of each level
+        '''
+
+        if self.m_workers > 1:
+            self.m_pool = multiprocessing.pool.ThreadPool(self.m_workers)
+        try:
+            for level in self.sampleLevels(_voxelSize, _boundingBox):
+                yield level
+        finally:
+            # Closing the generator early, when the export is cancelled, also stops the workers
+            if self.m_pool is not None:
+                self.m_pool.terminate()
+                self.m_pool.join()
+                self.m_pool = None
+
+    def sampleLevels(self, _voxelSize, _boundingBox):
+        '''Sample each level, the coarsest first, see iterateLevels.
+
+        Args:
+            _voxelSize: The size of the voxels of the last level
+            _boundingBox: The bounding box of the NSpheres
+
+        Returns:
+            generator: The stride, the number of voxels along each axis and the VoxelPoints of the points inside the mesh of each level
+        '''
+
+        fineDims = SDFSampler.SDFSampler.dims(_voxelSize, _boundingBox)
+        strides = self.strides()
+        self.m_voxelsSampled = []
+        self.m_voxelsReused = 0
+        # The cells of the first level cover the grid at the voxel size, the last cell can extend past it
+        firstCells = np.array([max(1, -(-(n - 1) // strides[0])) for n in fineDims], dtype=np.int64)
+        corners = np.indices((2, 2, 2)).reshape(3, -1).T
+        children = np.indices((self.m_ratio,) * 3).reshape(3, -1).T
+        block = np.indices((self.m_ratio + 1,) * 3).reshape(3, -1).T
+        insideCells = []
+        crossing = None
+        known = None
+        for level, stride in enumerate(strides):
+            self.m_voxelsSampled.append(0)
+            counts = tuple(int(n) for n in firstCells * (strides[0] // stride) + 1)
+            dims = tuple((n - 1) // stride + 1 if n > 0 else 0 for n in fineDims)
+            if min(fineDims) == 0:
+                yield stride, dims, VoxelPoints.VoxelPoints(np.zeros((0, 3), dtype=np.uint16), _boundingBox[0], _voxelSize * stride)
+                continue
+            axes = self.levelAxes(_voxelSize, _boundingBox, stride, counts)
+
+            # Sample every position of the first level, and the positions in the cells of the previous level which may cross the surface
+            if crossing is None:
+                keys = np.arange(int(np.prod(counts)), dtype=np.int64)
+            else:
+                keys = self.uniqueKeys(crossing, block, self.m_ratio, counts)
+            sampled = self.sampleKeys(keys, axes, counts, known)
+
+            # The points inside are the positions sampled with a negative signed distance and every position in the cells inside
+            inside = [sampled[0][sampled[1] < 0.0]]
+            for cells, cellStride in insideCells:
+                inside.append(self.uniqueKeys(cells, np.indices((cellStride // stride + 1,) * 3).reshape(3, -1).T, cellStride // stride, counts))
+            indices = np.column_stack(np.unravel_index(np.unique(np.concatenate(inside)), counts))
+            # The positions past the grid at the voxel size are only used to bound the cells
+            indices = indices[(indices < np.asarray(dims)).all(axis=1)]
+            yield stride, dims, VoxelPoints.VoxelPoints(indices.astype(VoxelPoints.VoxelPoints.indexType(dims)), _boundingBox[0], _voxelSize * stride)
+            if level == len(strides) - 1:
+                break
+
+            # Bound the cells of this level from their corners and centres, the centres are on the grid of the next level
+            if crossing is None:
+                cells = np.indices(tuple(firstCells)).reshape(3, -1).T
+            else:
+                cells = (crossing[:, np.newaxis, :] * self.m_ratio + children[np.newaxis, :, :]).reshape(-1, 3)
+            nextCounts = tuple((n - 1) * self.m_ratio + 1 for n in counts)
+            nextAxes = self.levelAxes(_voxelSize, _boundingBox, stride // self.m_ratio, nextCounts)
+            centres = self.sampleKeys(np.ravel_multi_index((cells * self.m_ratio + self.m_ratio // 2).T, nextCounts), nextAxes, nextCounts)
+            crossing = [np.zeros((0, 3), dtype=np.int64)]
+            rows = max(1, self.m_maxElements // len(corners))
+            for start in range(0, len(cells), rows):
+                rowCells = cells[start:start + rows]
+                cornerKeys = np.ravel_multi_index((rowCells[:, np.newaxis, :] + corners[np.newaxis, :, :]).reshape(-1, 3).T, counts)
+                cornerNearest = sampled[2][np.searchsorted(sampled[0], cornerKeys)].reshape(-1, len(corners))
+                isInside, isOutside = self.classifyCells(centres[2][start:start + rows], cornerNearest, stride, _voxelSize, _boundingBox)
+                insideCells.append((rowCells[isInside], stride))
+                crossing.append(rowCells[~isInside & ~isOutside])
+            crossing = np.concatenate(crossing)
+
+            # The positions sampled in this level and the centres are on the grid of the next level
+            scaled = np.ravel_multi_index((np.column_stack(np.unravel_index(sampled[0], counts)) * self.m_ratio).T, nextCounts)
+            keys = np.concatenate((scaled, centres[0]))
+            order = np.argsort(keys, kind="mergesort")
+            known = (keys[order], np.concatenate((sampled[1], centres[1]))[order], np.concatenate((sampled[2], centres[2]))[order])
@@ -0,0 +1,213 @@
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import numpy as np
+import ResultWriter
+
+
+class ResultCache(object):
+    '''Class used for keeping sampled results on disk, so exporting the same capsules with the same settings again skips the sampling.
+
+    Each result is stored in a file named by a hash of the capsules and the settings, so the same content always has the same name.
+    The file is a header of the magic, version, value type and shape, then every value, a .res file.
+    Signed distances are stored as float32, and points as the uint16 or uint32 voxel indices of VoxelPoints.
+    Files are written to a temporary name and renamed, so a reader never sees a partly written file.
+    A result can be written a block at a time with a ResultWriter, so it is never kept in memory.
+    Two writers of the same key write the same content, so whichever rename happens last is kept.
+    Opening a file updates its modified time, and the least recently used files are removed once the size limit is reached.
+    '''
+
+    m_magic = b"RESC"
+    m_version = 2
+    m_extension = ".res"
+    # The value types, stored in the header as the index into this tuple
+    m_types = ("<f4", "<u2", "<u4")
+    # magic, version, value type, number of dimensions, shape
+    m_headerFormat = "<4sIII3Q"
+    m_headerSize = struct.calcsize(m_headerFormat)
+
+    def __init__(self, _folderPath=None, _maxBytes=1 << 30):
+        '''Constructor
+
+        Args:
+            _folderPath: The folder the results are kept in, by default a folder in the temporary directory
+            _maxBytes: The largest total size of the results before the least recently used are removed
+        '''
+
+        if _folderPath is None:
+            _folderPath = os.path.join(tempfile.gettempdir(), "NSphereResultCache")
+        self.m_folderPath = _folderPath
+        self.m_maxBytes = _maxBytes
+
+    def key(self, _sdCapsuleData, _voxelSize, _smoothness, _settings):
+        '''Find the key of a result.
+
+        Args:
+            _sdCapsuleData: A list of the sdCapsule data in the format [x, y, z, r, x, y, z, r, ...]
+            _voxelSize: The size of the voxels
+            _smoothness: The smoothness constant (k) for the smin function
+            _settings: A dictionary of the other settings which change the result, the values must be json types
+
+        Returns:
+            str: The hex digest of the capsules and settings
+        '''
+
+        capsules = np.ascontiguousarray(_sdCapsuleData, dtype="<f8").reshape(-1, 8)
+        settings = dict(_settings)
+        settings["version"] = self.m_version
+        settings["voxelSize"] = float(_voxelSize)
+        settings["smoothness"] = float(_smoothness)
+        digest = hashlib.sha1()
+        digest.update(capsules.tobytes())
+        digest.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()
+
+    def path(self, _key):
+        '''Find the path of the file of a result.
+
+        Args:
+            _key: The key from key
+
+        Returns:
+            str: The path of the file
+        '''
+
+        return os.path.join(self.m_folderPath, _key + self.m_extension)
+
+    def load(self, _key):
+        '''Read a result, marking it as the most recently used.
+
+        Args:
+            _key: The key from key
+
+        Returns:
+            numpy.ndarray: The values, or None if the result is not in the cache
+        '''
+
+        filePath = self.path(_key)
+        try:
+            with open(filePath, "rb") as inputFile:
+                data = inputFile.read()
+            os.utime(filePath, None)
+        except (IOError, OSError):
+            # Not written yet, or removed by another process
+            return None
+        if len(data) < self.m_headerSize:
+            return None
+        magic, version, valueType, dims, x, y, z = struct.unpack(self.m_headerFormat, data[:self.m_headerSize])
+        if magic != self.m_magic or version != self.m_version or valueType >= len(self.m_types):
+            return None
+        dtype = np.dtype(self.m_types[valueType])
+        shape = (x, y, z)[:dims]
+        count = int(np.prod(shape))
+        if len(data) != self.m_headerSize + count * dtype.itemsize:
+            return None
+        return np.frombuffer(data, dtype=dtype, count=count, offset=self.m_headerSize).reshape(shape)
+
+    def valueType(self, _dtype):
+        '''Find the type a value is stored as.
+
+        Args:
+            _dtype: The type of the values
+
+        Returns:
+            str: uint16 or uint32 for unsigned integers of up to 4 bytes, otherwise float32
+        '''
+
+        dtype = np.dtype(_dtype)
+        if dtype.kind == "u" and dtype.itemsize <= 4:
+            return "<u2" if dtype.itemsize <= 2 else "<u4"
+        return "<f4"
+
+    def makeFolder(self):
+        '''Make the folder the results are kept in if it does not exist.'''
+
+        if not os.path.isdir(self.m_folderPath):
+            try:
+                os.makedirs(self.m_folderPath)
+            except OSError:
+                # Made by another process
+                if not os.path.isdir(self.m_folderPath):
+                    raise
+
+    def writer(self, _key, _dtype, _rowShape=()):
+        '''Start writing a result a block at a time, see ResultWriter.
+
+        Args:
+            _key: The key from key
+            _dtype: The type of the values, see valueType
+            _rowShape: The shape of each row, the blocks are joined along the first axis
+
+        Returns:
+            ResultWriter.ResultWriter: The writer, commit adds the result to the cache
+        '''
+
+        return ResultWriter.ResultWriter(self, _key, _dtype, _rowShape)
+
+    def store(self, _key, _values):
+        '''Write a result and remove the least recently used results if the cache is too large.
+
+        Args:
+            _key: The key from key
+            _values: An array of 1 to 3 dimensions, unsigned integer arrays are stored as uint16 or uint32 and others as float32
+
+        Returns:
+            int: The number of results removed
+        '''
+
+        values = np.asarray(_values)
+        if values.ndim == 0:
+            raise ValueError("A result must have at least 1 dimension")
+        writer = self.writer(_key, values.dtype, values.shape[1:])
+        try:
+            writer.append(values)
+        except Exception:
+            writer.abort()
+            raise
+        return writer.commit()
+
+    def evict(self):
+        '''Remove the least recently used results until the total size is within the limit.
+
+        Returns:
+            int: The number of results removed
+        '''
+
+        entries = []
+        for name in os.listdir(self.m_folderPath):
+            if not name.endswith(self.m_extension):
+                continue
+            filePath = os.path.join(self.m_folderPath, name)
+            try:
+                status = os.stat(filePath)
+            except OSError:
+                continue
+            entries.append((status.st_mtime, status.st_size, filePath))
+        entries.sort()
+        total = sum(entry[1] for entry in entries)
+        removed = 0
+        for modified, size, filePath in entries:
+            if total <= self.m_maxBytes:
+                break
+            try:
+                os.remove(filePath)
+                removed += 1
+            except OSError:
+                # Removed by another process
+                pass
+            total -= size
+        return removed
+
+    def clear(self):
+        '''Remove every result.'''
+
+        if not os.path.isdir(self.m_folderPath):
+            return
+        for name in os.listdir(self.m_folderPath):
+            if name.endswith(self.m_extension):
+                try:
+                    os.remove(os.path.join(self.m_folderPath, name))
+                except OSError:
+                    pass
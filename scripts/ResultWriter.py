@@ -0,0 +1,78 @@
+import os
+import struct
+import tempfile
+import numpy as np
+
+
+class ResultWriter(object):
+    '''Class used for writing a result to a ResultCache a block at a time, so the result is never kept in memory.
+
+    Each block is converted to the value type of the result and appended to a temporary file as it is written.
+    The header is written with the shape once every block has been appended, and the file is renamed to the name of the key.
+    '''
+
+    def __init__(self, _cache, _key, _dtype, _rowShape=()):
+        '''Constructor, opening the temporary file.
+
+        Args:
+            _cache: The ResultCache
+            _key: The key from ResultCache.key
+            _dtype: The type of the values, see ResultCache.valueType
+            _rowShape: The shape of each row, the blocks are joined along the first axis
+        '''
+
+        if len(_rowShape) > 2:
+            raise ValueError("A result can have at most 3 dimensions")
+        self.m_cache = _cache
+        self.m_key = _key
+        self.m_dtype = np.dtype(_cache.valueType(_dtype))
+        self.m_rowShape = tuple(int(n) for n in _rowShape)
+        self.m_rows = 0
+        _cache.makeFolder()
+        handle, self.m_temporaryPath = tempfile.mkstemp(suffix=".tmp", dir=_cache.m_folderPath)
+        self.m_file = os.fdopen(handle, "wb")
+        # The header is written by commit once the shape is known
+        self.m_file.write(b"\0" * _cache.m_headerSize)
+
+    def append(self, _values):
+        '''Append a block of rows.
+
+        Args:
+            _values: An array which can be reshaped to rows of the row shape
+        '''
+
+        values = np.ascontiguousarray(_values, dtype=self.m_dtype).reshape((-1,) + self.m_rowShape)
+        self.m_file.write(values.tobytes())
+        self.m_rows += len(values)
+
+    def commit(self):
+        '''Write the header, add the file to the cache and remove the least recently used results if the cache is too large.
+
+        Returns:
+            int: The number of results removed
+        '''
+
+        cache = self.m_cache
+        shape = [self.m_rows] + list(self.m_rowShape) + [0] * (2 - len(self.m_rowShape))
+        try:
+            self.m_file.seek(0)
+            self.m_file.write(struct.pack(cache.m_headerFormat, cache.m_magic, cache.m_version, cache.m_types.index(self.m_dtype.str), len(self.m_rowShape) + 1, shape[0], shape[1], shape[2]))
+            self.m_file.close()
+            filePath = cache.path(self.m_key)
+            try:
+                os.rename(self.m_temporaryPath, filePath)
+            except OSError:
+                # Windows does not replace files, but a result with the same key has the same content
+                if not os.path.exists(filePath):
+                    raise
+        finally:
+            self.abort()
+        return cache.evict()
+
+    def abort(self):
+        '''Close and remove the temporary file without adding it to the cache.'''
+
+        if not self.m_file.closed:
+            self.m_file.close()
+        if os.path.exists(self.m_temporaryPath):
+            os.remove(self.m_temporaryPath)
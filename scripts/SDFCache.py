@@ -0,0 +1,91 @@
+import numpy as np
+import IncrementalSampler
+import SDFExporter
+
+
+class SDFCache(object):
+    '''Class used for keeping the sampled points of a set of NSpheres until the NSpheres or settings change.
+
+    This class does not use Maya, so it holds the logic of the NSphereSDF node and can be used outside of a Maya session.
+    The grid is kept in an IncrementalSampler, so when the NSpheres change only the voxels near them are sampled again.
+    Each cache is registered by a key so the exporter can use the points of a node instead of sampling them again.
+    The cache is unregistered when its node is deleted, so its grid is freed and a new node given the same key does not find it.
+    '''
+
+    # The caches of each NSphereSDF node, keyed by the hash code of the node
+    m_caches = {}
+
+    def __init__(self):
+        '''Constructor'''
+
+        self.m_sampler = IncrementalSampler.IncrementalSampler()
+        # The capsules and settings the points were sampled with
+        self.m_capsules = None
+        self.m_settings = None
+        self.m_points = np.zeros((0, 3), dtype=np.float64)
+        # The number of times the points were sampled again
+        self.m_updates = 0
+
+    def register(self, _key):
+        '''Register the cache so the exporter can find it from the node.
+
+        Args:
+            _key: The hash code of the NSphereSDF node
+        '''
+
+        SDFCache.m_caches[_key] = self
+
+    @staticmethod
+    def unregister(_key):
+        '''Remove the cache of a deleted node.
+
+        Args:
+            _key: The hash code of the NSphereSDF node
+        '''
+
+        SDFCache.m_caches.pop(_key, None)
+
+    def findLineSegments(self, _spheres, _parents):
+        '''Find the line segments data from a list of NSpheres.
+
+        Args:
+            _spheres: A list of the (x, y, z, r) data of each NSphere
+            _parents: The index of the parent of each NSphere in _spheres, or -1 if it has no parent
+
+        Returns:
+            list: The line segments data as one list with the format [position, radius, position, radius]
+        '''
+
+        spheres = np.asarray(_spheres, dtype=np.float64).reshape(-1, 4)
+        parents = np.asarray(_parents, dtype=np.int64).reshape(-1)
+        children = np.nonzero(parents >= 0)[0]
+        return np.hstack((spheres[parents[children]], spheres[children])).ravel().tolist()
+
+    def points(self, _sdCapsuleData, _smoothness, _voxelSize, _errorBound=1e-4):
+        '''Find the points inside the mesh, sampling them again only if the capsules or settings changed.
+
+        Args:
+            _sdCapsuleData: A list of the sdCapsule data in the format [x, y, z, r, x, y, z, r, ...]
+            _smoothness: The smoothness constant (k) for the smin function
+            _voxelSize: The size of the voxels
+            _errorBound: The largest change in the signed distance allowed from leaving out capsules, or None to use every capsule
+
+        Returns:
+            numpy.ndarray: An (M, 3) array of points that lie inside the mesh
+        '''
+
+        capsules = np.asarray(_sdCapsuleData, dtype=np.float64).reshape(-1, 8)
+        settings = (float(_smoothness), float(_voxelSize), _errorBound)
+        if self.m_capsules is not None and settings == self.m_settings and np.array_equal(capsules, self.m_capsules):
+            return self.m_points
+
+        if len(capsules) == 0:
+            self.m_points = np.zeros((0, 3), dtype=np.float64)
+        else:
+            bbox = SDFExporter.SDFExporter().findBoundingBox(capsules, _voxelSize)
+            self.m_sampler.update(capsules.ravel(), _smoothness, _voxelSize, bbox, _errorBound)
+            self.m_points = self.m_sampler.sampleSD(_voxelSize, bbox)
+        self.m_capsules = capsules.copy()
+        self.m_settings = settings
+        self.m_updates += 1
+        return self.m_points
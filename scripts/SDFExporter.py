@@ -0,0 +1,561 @@
+import cProfile
+import os
+import numpy as np
+import AdaptiveSampler
+import ExportMonitor
+import IncrementalSampler
+import MirrorSampler
+import PLYFile
+import ProgressiveSampler
+import SDFSampler
+import SDFVolume
+import SurfaceBand
+import SurfaceNets
+import TiledSampler
+import VoxelFile
+import VoxelPoints
+
+
+class SDFExporter(object):
+    '''Class used for sampling the signed distance field of capsules and writing it to a file.
+
+    This class does not use Maya, so it can export capsule files on machines without Maya, see BatchExport.
+    PointCloudExporter finds the capsules from the NSpheres in Maya and uses this class to export them.
+    '''
+
+    def __init__(self):
+        '''Constructor'''
+
+        # The sampled grid is kept between exports so only the parts near moved NSpheres are sampled again
+        self.m_incremental = IncrementalSampler.IncrementalSampler()
+        # The monitor of the last export, with the counters and the time of each stage
+        self.m_monitor = ExportMonitor.ExportMonitor()
+
+    def exportCapsules(self, _filePath, _sdCapsuleData, _voxelSize, _smoothness, _adaptive=True, _errorBound=1e-4, _workers=1, _binary=True, _output="points", _incremental=False, _flavour="exponential", _monitor=None, _profilePath=None, _snap=False, _normals=False, _cache=None, _mirror=None, _levels=1):
+        '''Sample the signed distance field of the capsules and write it to a file.
+
+        Args:
+            _filePath: The path of the file without the extension
+            _sdCapsuleData: The sdCapsule data, either a flat list in the format [x, y, z, r, x, y, z, r, ...] or an (N, 8) array from CapsuleFile.read
+            _voxelSize: The size of the voxels
+            _smoothness: The smoothness constant (k) for the smin function
+            _adaptive: Subdivide the grid and only sample the voxels near the surface
+            _errorBound: Leave out capsules which change the signed distance by less than this, or None to use every capsule
+            _workers: The number of threads used to sample tiles of the grid
+            _binary: Write the binary_little_endian format instead of ascii
+            _output: Either "points", "voxels", "surface", "mesh", "sparse" or "dense"
+            _incremental: Only sample the voxels near the capsules that changed since the last export.
+                          The grid is kept in m_incremental and sampled in blocks on this thread, so _adaptive, _workers and _mirror are not used.
+            _flavour: The flavour of the smin function, either exponential or polynomial
+            _monitor: The ExportMonitor which times the stages and reports the progress, by default a new one kept in m_monitor
+            _profilePath: If set, the export is run with cProfile and the stats are written to this file.
+                          Only this thread is profiled, so use one worker to profile the sampling.
+            _snap: Move the surface points onto the surface
+            _normals: Write the normal of each surface point
+            _cache: A ResultCache, when it has the result of the same capsules and settings it is written without sampling.
+                    Progressive exports are not cached, so every level is always sampled and written.
+            _mirror: Either None to sample the whole grid, "auto" to find a mirror plane of the capsules,
+                     or the (axis, offset) of a mirror plane. Only half of the grid is sampled if the capsules are mirrored by the plane.
+            _levels: The number of levels of a progressive export of a point cloud, see writeLevels.
+                     Each level is written as soon as it is sampled, so the coarse levels can be used while the finer levels are sampled.
+                     The levels are always refined only near the surface, so _adaptive has no effect,
+                     and they can not be combined with _incremental or _mirror.
+
+        Returns:
+            int: The number of voxels sampled, or None if it is not known
+
+        Raises:
+            ExportMonitor.ExportCancelled: If the monitor was cancelled. The partly written file is removed,
+                                           and the file of the last export and the levels already written are kept.
+        '''
+
+        # The capsules are one row each whether they were given as a flat list or as rows
+        capsules = np.asarray(_sdCapsuleData, dtype=np.float64)
+        if capsules.size % 8 != 0:
+            raise ValueError("The number of capsule values is not a multiple of 8")
+        capsules = capsules.reshape(-1, 8)
+        if len(capsules) == 0:
+            raise ValueError("There are no capsules to export")
+        if _output not in ("points", "voxels", "surface", "mesh", "sparse", "dense"):
+            raise ValueError("Unknown output: " + str(_output))
+        if _levels > 1 and _output not in ("points", "voxels"):
+            raise ValueError("Only point clouds can be exported progressively")
+        if _levels > 1 and (_incremental or _mirror is not None):
+            raise ValueError("Progressive exports can not be incremental or mirrored")
+        self.m_monitor = _monitor if _monitor is not None else ExportMonitor.ExportMonitor()
+        profile = None
+        if _profilePath is not None:
+            profile = cProfile.Profile()
+            profile.enable()
+        try:
+            return self.runExport(_filePath, capsules, _voxelSize, _smoothness, _adaptive, _errorBound, _workers, _binary, _output, _incremental, _flavour, _snap, _normals, _cache, _mirror, _levels)
+        except ExportMonitor.ExportCancelled:
+            # Only the files still under their temporary names were written by this export
+            for lod in range(max(1, _levels)):
+                partPath = self.partPath(self.levelPath(_filePath, lod)) + self.extension(_output)
+                if os.path.exists(partPath):
+                    os.remove(partPath)
+            raise
+        finally:
+            if profile is not None:
+                profile.disable()
+                profile.dump_stats(_profilePath)
+
+    def runExport(self, _filePath, _sdCapsuleData, _voxelSize, _smoothness, _adaptive, _errorBound, _workers, _binary, _output, _incremental, _flavour, _snap, _normals, _cache, _mirror, _levels=1):
+        '''Sample and write the capsules, timing each stage with m_monitor.
+
+        Args:
+            The same as exportCapsules, apart from _sdCapsuleData which is an (N, 8) array
+
+        Returns:
+            int: The number of voxels sampled, or None if it is not known
+        '''
+
+        monitor = self.m_monitor
+        # The file is written under a temporary name and renamed once it is complete,
+        # so the file of the last export is only replaced by a complete file
+        partPath = self.partPath(_filePath)
+        outputPath = _filePath + self.extension(_output)
+        monitor.count("capsules", len(_sdCapsuleData))
+        with monitor.stage("boundingBox"):
+            bbox = self.findBoundingBox(_sdCapsuleData, _voxelSize)
+        key = None
+        # The cache only has the last level, so progressive exports are not cached
+        if _cache is not None and _levels <= 1:
+            # The number of workers and incremental sampling do not change the result
+            settings = {"adaptive": bool(_adaptive), "errorBound": _errorBound, "output": _output, "flavour": _flavour}
+            if _output == "surface":
+                settings.update({"snap": bool(_snap), "normals": bool(_normals)})
+            key = _cache.key(_sdCapsuleData, _voxelSize, _smoothness, settings)
+            with monitor.stage("cache"):
+                cached = _cache.load(key)
+            if cached is not None:
+                monitor.count("cached", 1)
+                self.writeCached(partPath, cached, _voxelSize, bbox, _binary, _output, _normals)
+                self.replaceFile(partPath + self.extension(_output), outputPath)
+                return None
+        voxels = None
+        if _levels > 1:
+            with monitor.stage("setup"):
+                sampler = ProgressiveSampler.ProgressiveSampler(AdaptiveSampler.AdaptiveSampler(_sdCapsuleData, _smoothness, _errorBound=_errorBound, _flavour=_flavour), _levels, _workers=_workers)
+            sampler.m_progress = monitor.progress
+            dims = SDFSampler.SDFSampler.dims(_voxelSize, bbox)
+            monitor.count("voxels", int(np.prod(dims)))
+            return self.writeLevels(_filePath, sampler, _voxelSize, bbox, _binary, _output)
+        if _incremental:
+            self.m_incremental.m_progress = monitor.progress
+            try:
+                with monitor.stage("sample"):
+                    voxels = self.m_incremental.update(_sdCapsuleData, _smoothness, _voxelSize, bbox, _errorBound, _flavour)
+            finally:
+                self.m_incremental.m_progress = None
+            sampler = self.m_incremental
+        else:
+            with monitor.stage("setup"):
+                sampler = self.createSampler(_sdCapsuleData, _smoothness, _adaptive, _errorBound, _workers, _flavour, _mirror)
+            sampler.m_progress = monitor.progress
+        dims = tuple(len(a) for a in sampler.axes(_voxelSize, bbox))
+        monitor.count("voxels", int(np.prod(dims)))
+
+        # Each block is added to the cache as it is written, so the result is never kept in memory
+        writer = self.cacheWriter(_cache, key, _output, dims, _normals) if _cache is not None else None
+        try:
+            if _output in ("points", "voxels"):
+                with monitor.stage("write"):
+                    blocks = monitor.timed("sample", sampler.iterateSD(_voxelSize, bbox), "inside", len)
+                    # The points are on the grid, so their voxel indices are cached instead of their positions
+                    blocks = self.record(blocks, writer, lambda points: VoxelPoints.VoxelPoints.fromPoints(points, bbox[0], _voxelSize, dims).m_indices)
+                    if _output == "points":
+                        self.writeStream(partPath, blocks, _binary)
+                    else:
+                        VoxelFile.VoxelFile().writeStream(partPath + ".vpc", blocks, dims, bbox[0], _voxelSize)
+            elif _output == "surface":
+                # The sampler used for the gradients can find the signed distance at any position, which the incremental grid can not
+                with monitor.stage("setup"):
+                    surfaceSampler = SDFSampler.SDFSampler(_sdCapsuleData, _smoothness, _errorBound=_errorBound, _flavour=_flavour)
+                with monitor.stage("write"):
+                    self.writeSurface(partPath, sampler, surfaceSampler, _voxelSize, bbox, _binary, _snap, _normals, writer)
+            elif _output == "mesh":
+                self.writeMesh(partPath, sampler, _voxelSize, bbox, _binary, _writer=writer)
+            else:
+                with monitor.stage("write"):
+                    self.writeVolume(partPath, sampler, _voxelSize, bbox, _output == "sparse", _writer=writer)
+            self.replaceFile(partPath + self.extension(_output), outputPath)
+        except Exception:
+            if writer is not None:
+                writer.abort()
+            raise
+        if writer is not None:
+            with monitor.stage("cache"):
+                writer.commit()
+        return voxels
+
+    def extension(self, _output):
+        '''Find the file extension of an output.
+
+        Args:
+            _output: Either "points", "voxels", "surface", "mesh", "sparse" or "dense"
+
+        Returns:
+            str: The extension, including the dot
+        '''
+
+        if _output in ("sparse", "dense"):
+            return ".sdf"
+        return ".vpc" if _output == "voxels" else ".ply"
+
+    def findBoundingBox(self, _sdCapsuleData, _voxelSize):
+        '''Find the bounding box from the sd capsule data.
+
+        Args:
+            _sdCapsuleData: A list of the sdCapsule data.
+            _voxelSize: The size of the voxels
+
+        Returns:
+            tuple, tuple: The min and max coordinate (x,y,z) for the bounding box as a multiple of the voxel size.
+        '''
+
+        # Each row is the [parent, child] data.
+        # Both ends are used, as the capsules can be in any order so the root is not always the parent of the first capsule.
+        capsules = np.asarray(_sdCapsuleData, dtype=np.float64).reshape(-1, 8)
+        spheres = np.vstack((capsules[:, 0:4], capsules[:, 4:8]))
+        # Find the min/max of all the positions after adding/subtracting the radius
+        lo = (spheres[:, 0:3] - spheres[:, 3:4]).min(axis=0)
+        hi = (spheres[:, 0:3] + spheres[:, 3:4]).max(axis=0)
+        # Scale the values so they are a multiple of the voxel size
+        # This extends each value to the next mutliple of the voxel (larger value if positive, smaller value if negative)
+        values = np.concatenate((lo, hi))
+        values = np.where(values > 0, np.ceil(values / _voxelSize) * _voxelSize, np.floor(values / _voxelSize) * _voxelSize)
+        return tuple(values[0:3].tolist()), tuple(values[3:6].tolist())
+
+    def createSampler(self, _sdCapsuleData, _smoothness, _adaptive=True, _errorBound=1e-4, _workers=1, _flavour="exponential", _mirror=None):
+        '''Create the sampler for the signed distance field.
+
+        Args:
+            _sdCapsuleData: The signed distance capsule data.
+            _smoothness: The smoothness constant (k) for the smin function
+            _adaptive: Subdivide the grid and only sample the voxels near the surface
+            _errorBound: Leave out capsules which change the signed distance by less than this, or None to use every capsule
+            _workers: The number of threads used to sample tiles of the grid
+            _flavour: The flavour of the smin function, either exponential or polynomial
+            _mirror: Either None, "auto" or the (axis, offset) of a mirror plane, see MirrorSampler.findPlane
+
+        Returns:
+            SDFSampler: The sampler
+        '''
+
+        if _adaptive:
+            sampler = AdaptiveSampler.AdaptiveSampler(_sdCapsuleData, _smoothness, _errorBound=_errorBound, _flavour=_flavour)
+        else:
+            sampler = SDFSampler.SDFSampler(_sdCapsuleData, _smoothness, _errorBound=_errorBound, _flavour=_flavour)
+        if _workers > 1:
+            sampler = TiledSampler.TiledSampler(sampler, _workers)
+        # The capsules which are not mirrored by the plane are sampled with the whole grid
+        plane = MirrorSampler.MirrorSampler.findPlane(_sdCapsuleData, _mirror) if _mirror is not None else None
+        if plane is not None:
+            sampler = MirrorSampler.MirrorSampler(sampler, plane)
+        return sampler
+
+    def sampleSD(self, _sdCapsuleData, _voxelSize, _smoothness, _boundingBox, _adaptive=True, _errorBound=1e-4, _workers=1, _flavour="exponential"):
+        '''Sample the grid to find all the signed distances.
+
+        Args:
+            _sdCapsuleData: The signed distance capsule data.
+            _voxelSize: The size of the voxels.
+            _smoothness: The smoothness constant (k) for the smin function
+            _boundingBox: The bounding box of the ZSpheres
+            _adaptive: Subdivide the grid and only sample the voxels near the surface
+            _errorBound: Leave out capsules which change the signed distance by less than this, or None to use every capsule
+            _workers: The number of threads used to sample tiles of the grid
+            _flavour: The flavour of the smin function, either exponential or polynomial
+
+        Returns:
+            numpy.ndarray: An (M, 3) array of points that lie inside the mesh
+        '''
+
+        sampler = self.createSampler(_sdCapsuleData, _smoothness, _adaptive, _errorBound, _workers, _flavour)
+        return sampler.sampleSD(_voxelSize, _boundingBox)
+
+    def write(self, _filePath, _points, _binary=True):
+        '''Write the points to a .ply file.
+
+        Args:
+            _filePath: The path of the file without the extension
+            _points: An (M, 3) array of points
+            _binary: Write the binary_little_endian format instead of ascii
+        '''
+
+        PLYFile.PLYFile().write(_filePath + ".ply", _points, _binary)
+
+    def writeStream(self, _filePath, _pointBlocks, _binary=True):
+        '''Write blocks of points to a .ply file as they are sampled.
+
+        Args:
+            _filePath: The path of the file without the extension
+            _pointBlocks: An iterable of (M, 3) arrays of points
+            _binary: Write the binary_little_endian format instead of ascii
+
+        Returns:
+            int: The number of points written
+        '''
+
+        return PLYFile.PLYFile().writeStream(_filePath + ".ply", _pointBlocks, _binary)
+
+    def partPath(self, _filePath):
+        '''Find the path a file is written to before it is complete.
+
+        Args:
+            _filePath: The path of the file without the extension
+
+        Returns:
+            str: The temporary path of the file without the extension
+        '''
+
+        return _filePath + ".part"
+
+    def replaceFile(self, _temporaryPath, _outputPath):
+        '''Rename a complete file from its temporary path, replacing the file of the last export.
+
+        Args:
+            _temporaryPath: The path the file was written to
+            _outputPath: The path of the file
+        '''
+
+        # Windows does not replace files when renaming
+        if os.path.exists(_outputPath):
+            os.remove(_outputPath)
+        os.rename(_temporaryPath, _outputPath)
+
+    def levelPath(self, _filePath, _lod):
+        '''Find the path of a level of a progressive export.
+
+        Args:
+            _filePath: The path of the file without the extension
+            _lod: The number of levels coarser than the voxel size, 0 for the last level
+
+        Returns:
+            str: The path of the file of the level without the extension, the last level is written to the path of the export
+        '''
+
+        return _filePath if _lod == 0 else "%s_lod%d" % (_filePath, _lod)
+
+    def writeLevels(self, _filePath, _sampler, _voxelSize, _boundingBox, _binary=True, _output="points"):
+        '''Write each level of a progressive export as soon as it is sampled, the coarsest first.
+
+        The last level is written to the usual file and the coarser levels to the files from levelPath, so file_lod1 has twice the voxel size.
+        Each file is written under a temporary name and renamed, so a reader waiting for it never loads a partly written file.
+        If the export is cancelled the levels already written are kept.
+
+        Args:
+            _filePath: The path of the file without the extension
+            _sampler: The ProgressiveSampler
+            _voxelSize: The size of the voxels of the last level
+            _boundingBox: The bounding box of the NSpheres
+            _binary: Write the binary_little_endian format instead of ascii
+            _output: Either "points" or "voxels"
+
+        Returns:
+            int: The number of voxels sampled
+        '''
+
+        monitor = self.m_monitor
+        levels = monitor.timed("sample", _sampler.iterateLevels(_voxelSize, _boundingBox))
+        for level, (stride, dims, points) in enumerate(levels):
+            lod = _sampler.m_levels - 1 - level
+            outputPath = self.levelPath(_filePath, lod) + self.extension(_output)
+            temporaryPath = self.partPath(self.levelPath(_filePath, lod)) + self.extension(_output)
+            with monitor.stage("write"):
+                if _output == "voxels":
+                    VoxelFile.VoxelFile().write(temporaryPath, points, dims, _boundingBox[0], points.m_voxelSize)
+                else:
+                    PLYFile.PLYFile().writeStream(temporaryPath, [points.points()], _binary)
+                self.replaceFile(temporaryPath, outputPath)
+            monitor.count("levels", 1)
+            if lod == 0:
+                monitor.count("inside", len(points))
+        monitor.count("sampled", sum(_sampler.m_voxelsSampled))
+        monitor.count("reused", _sampler.m_voxelsReused)
+        return sum(_sampler.m_voxelsSampled)
+
+    def writeSurface(self, _filePath, _sampler, _surfaceSampler, _voxelSize, _boundingBox, _binary=True, _snap=False, _normals=False, _writer=None):
+        '''Write the points within a voxel of the surface to a .ply file as they are sampled.
+
+        Args:
+            _filePath: The path of the file without the extension
+            _sampler: The sampler from createSampler
+            _surfaceSampler: An SDFSampler used to snap the points and find their normals
+            _voxelSize: The size of the voxels
+            _boundingBox: The bounding box of the NSpheres
+            _binary: Write the binary_little_endian format instead of ascii
+            _snap: Move the points onto the surface
+            _normals: Write the normal of each point
+            _writer: If set, a ResultWriter each block of points is added to
+
+        Returns:
+            int: The number of points written
+        '''
+
+        xs, ys, zs = _sampler.axes(_voxelSize, _boundingBox)
+        surface = SurfaceBand.SurfaceBand(_surfaceSampler, _voxelSize, _snap, _normals)
+        # The values are clamped to the band so the adaptive sampler can skip the tiles far from the surface
+        blocks = self.timedValues(_sampler.iterateValues(xs, ys, zs, 8, _voxelSize))
+        points = self.m_monitor.timed("refine", surface.iterateSurface(blocks, xs, ys, zs), "surface", len)
+        return PLYFile.PLYFile().writeStream(_filePath + ".ply", self.record(points, _writer), _binary, _normals)
+
+    def writeVolume(self, _filePath, _sampler, _voxelSize, _boundingBox, _sparse=True, _tileSize=8, _bandVoxels=3, _writer=None):
+        '''Sample the signed distance at every voxel and write it to a .sdf volume file.
+
+        Args:
+            _filePath: The path of the file without the extension
+            _sampler: The sampler from createSampler
+            _voxelSize: The size of the voxels
+            _boundingBox: The bounding box of the NSpheres
+            _sparse: Only write the tiles within the narrow band
+            _tileSize: The number of voxels along each side of a tile
+            _bandVoxels: The width of the narrow band in voxels
+            _writer: If set, a ResultWriter each block of signed distances is added to
+        '''
+
+        xs, ys, zs = _sampler.axes(_voxelSize, _boundingBox)
+        band = _bandVoxels * _voxelSize if _sparse else None
+        blocks = self.timedValues(_sampler.iterateValues(xs, ys, zs, _tileSize, band))
+        self.writeVolumeBlocks(_filePath, self.record(blocks, _writer), (len(xs), len(ys), len(zs)), _boundingBox[0], _voxelSize, band, _tileSize)
+
+    def writeVolumeBlocks(self, _filePath, _blocks, _dims, _origin, _voxelSize, _band=None, _tileSize=8):
+        '''Write blocks of signed distances to a .sdf volume file.
+
+        Args:
+            _filePath: The path of the file without the extension
+            _blocks: An iterable of (_tileSize, dims[1], dims[2]) arrays of signed distances in x order
+            _dims: The number of voxels along each axis
+            _origin: The position of the first voxel
+            _voxelSize: The size of the voxels
+            _band: The width of the narrow band of a sparse volume, or None for a dense volume
+            _tileSize: The number of voxels along each side of a tile
+        '''
+
+        volume = SDFVolume.SDFVolume()
+        if _band is not None:
+            volume.writeSparse(_filePath + ".sdf", _blocks, _dims, _origin, _voxelSize, _tileSize, _band)
+        else:
+            volume.writeDense(_filePath + ".sdf", _blocks, _dims, _origin, _voxelSize)
+
+    def writeMesh(self, _filePath, _sampler, _voxelSize, _boundingBox, _binary=True, _bandVoxels=3, _writer=None):
+        '''Sample the signed distance near the surface, mesh it and write the mesh to a .ply file.
+
+        Args:
+            _filePath: The path of the file without the extension
+            _sampler: The sampler from createSampler
+            _voxelSize: The size of the voxels
+            _boundingBox: The bounding box of the NSpheres
+            _binary: Write the binary_little_endian format instead of ascii
+            _bandVoxels: The width of the narrow band in voxels, the values further from the surface are not needed
+            _writer: If set, a ResultWriter each block of signed distances is added to
+        '''
+
+        xs, ys, zs = _sampler.axes(_voxelSize, _boundingBox)
+        blocks = list(self.record(self.timedValues(_sampler.iterateValues(xs, ys, zs, 8, _bandVoxels * _voxelSize)), _writer))
+        values = np.concatenate(blocks, axis=0) if blocks else np.zeros((0, len(ys), len(zs)), dtype=np.float32)
+        self.meshValues(_filePath, values, _voxelSize, _boundingBox, _binary)
+
+    def meshValues(self, _filePath, _values, _voxelSize, _boundingBox, _binary=True):
+        '''Mesh a grid of signed distances and write the mesh to a .ply file.
+
+        Args:
+            _filePath: The path of the file without the extension
+            _values: An (X, Y, Z) array of signed distances
+            _voxelSize: The size of the voxels
+            _boundingBox: The bounding box of the NSpheres
+            _binary: Write the binary_little_endian format instead of ascii
+        '''
+
+        with self.m_monitor.stage("mesh"):
+            vertices, faces = SurfaceNets.SurfaceNets().mesh(_values, _boundingBox[0], _voxelSize)
+        self.m_monitor.count("vertices", len(vertices))
+        self.m_monitor.count("faces", len(faces))
+        with self.m_monitor.stage("write"):
+            PLYFile.PLYFile().writeMesh(_filePath + ".ply", vertices, faces, _binary)
+
+    def timedValues(self, _blocks):
+        '''Time the sampling of blocks of signed distances and count the voxels inside the mesh.
+
+        Args:
+            _blocks: An iterable of arrays of signed distances
+
+        Returns:
+            generator: The blocks
+        '''
+
+        return self.m_monitor.timed("sample", _blocks, "inside", lambda values: int(np.count_nonzero(values < 0)))
+
+    def record(self, _blocks, _writer, _convert=None):
+        '''Add each block to the cache as it is passed on.
+
+        Args:
+            _blocks: An iterable of blocks
+            _writer: The ResultWriter the blocks are added to, or None to not cache them
+            _convert: If set, a function which finds the values cached for a block
+
+        Returns:
+            generator: The blocks
+        '''
+
+        for block in _blocks:
+            if _writer is not None:
+                _writer.append(_convert(block) if _convert is not None else block)
+            yield block
+
+    def cacheWriter(self, _cache, _key, _output, _dims, _normals=False):
+        '''Start writing the result of an export to the cache.
+
+        Args:
+            _cache: The ResultCache
+            _key: The key of the result
+            _output: Either "points", "voxels", "surface", "mesh", "sparse" or "dense"
+            _dims: The number of voxels along each axis
+            _normals: The surface points have normals
+
+        Returns:
+            ResultWriter.ResultWriter: The writer of the voxel indices of the points, the surface points, or the signed distances in x, y, z order
+        '''
+
+        if _output in ("points", "voxels"):
+            return _cache.writer(_key, VoxelPoints.VoxelPoints.indexType(_dims), (3,))
+        if _output == "surface":
+            return _cache.writer(_key, np.float32, (6 if _normals else 3,))
+        return _cache.writer(_key, np.float32, _dims[1:])
+
+    def writeCached(self, _filePath, _values, _voxelSize, _boundingBox, _binary, _output, _normals=False, _tileSize=8, _bandVoxels=3):
+        '''Write a result from the cache without sampling.
+
+        Args:
+            _filePath: The path of the file without the extension
+            _values: The array written by the writer from cacheWriter
+            _voxelSize: The size of the voxels
+            _boundingBox: The bounding box of the NSpheres
+            _binary: Write the binary_little_endian format instead of ascii
+            _output: Either "points", "voxels", "surface", "mesh", "sparse" or "dense"
+            _normals: The surface points have normals
+            _tileSize: The number of voxels along each side of a tile, the same as writeVolume
+            _bandVoxels: The width of the narrow band in voxels, the same as writeVolume
+        '''
+
+        monitor = self.m_monitor
+        if _output == "mesh":
+            self.meshValues(_filePath, _values, _voxelSize, _boundingBox, _binary)
+            return
+        with monitor.stage("write"):
+            if _output == "points":
+                monitor.count("inside", len(_values))
+                self.writeStream(_filePath, [VoxelPoints.VoxelPoints(_values, _boundingBox[0], _voxelSize).points()], _binary)
+            elif _output == "voxels":
+                monitor.count("inside", len(_values))
+                points = VoxelPoints.VoxelPoints(_values, _boundingBox[0], _voxelSize)
+                VoxelFile.VoxelFile().write(_filePath + ".vpc", points, SDFSampler.SDFSampler.dims(_voxelSize, _boundingBox), _boundingBox[0], _voxelSize)
+            elif _output == "surface":
+                monitor.count("surface", len(_values))
+                PLYFile.PLYFile().writeStream(_filePath + ".ply", [_values], _binary, _normals)
+            else:
+                band = _bandVoxels * _voxelSize if _output == "sparse" else None
+                blocks = [_values[start:start + _tileSize] for start in range(0, len(_values), _tileSize)]
+                self.writeVolumeBlocks(_filePath, blocks, _values.shape, _boundingBox[0], _voxelSize, band, _tileSize)
@@ -0,0 +1,332 @@
+import numpy as np
+import CapsuleIndex
+import SmoothMin
+
+
+class SDFSampler(object):
+    '''Class used for sampling the signed distance field of the capsules with NumPy.
+
+    This class does not use Maya, so it can be used outside of a Maya session.
+    The capsule data is packed once into an (N, 8) array and the grid is evaluated a slab at a time.
+    '''
+
+    def __init__(self, _sdCapsuleData, _smoothness, _maxElements=1 << 20, _errorBound=None, _flavour="exponential"):
+        '''Constructor
+
+        Args:
+            _sdCapsuleData: A list of the sdCapsule data in the format [x, y, z, r, x, y, z, r, ...]
+            _smoothness: The smoothness constant (k) for the smin function
+            _maxElements: The maximum number of voxel/capsule pairs to evaluate at once
+            _errorBound: If set, only combine the capsules which change the signed distance by more than this
+            _flavour: The flavour of the smin function, either exponential or polynomial
+        '''
+
+        self.m_capsules = self.packCapsules(_sdCapsuleData)
+        self.m_smoothness = float(_smoothness)
+        self.m_kernel = SmoothMin.SmoothMin(self.m_smoothness, _flavour)
+        self.m_maxElements = _maxElements
+        self.m_index = None
+        # Called with the number of x planes sampled and the total after each block, see ExportMonitor.progress
+        self.m_progress = None
+        if _errorBound is not None:
+            self.m_index = CapsuleIndex.CapsuleIndex(self.m_capsules, self.m_smoothness, _errorBound, _flavour=_flavour)
+
+    def packCapsules(self, _sdCapsuleData):
+        '''Pack the capsule data into a contiguous array.
+
+        Args:
+            _sdCapsuleData: A list of the sdCapsule data in the format [x, y, z, r, x, y, z, r, ...]
+
+        Returns:
+            numpy.ndarray: An (N, 8) array where each row is [ax, ay, az, r1, bx, by, bz, r2]
+        '''
+
+        capsules = np.ascontiguousarray(_sdCapsuleData, dtype=np.float64)
+        return capsules.reshape(-1, 8)
+
+    @staticmethod
+    def axisCount(_start, _end, _step):
+        '''Find the number of sample positions along one axis.
+
+        The count is found from the length of the range, so it does not drift with the number of steps like adding the step each time.
+        The bounding box from findBoundingBox is a multiple of the voxel size, so the count is exact.
+
+        Args:
+            _start: The start of the range
+            _end: The end of the range, which is not sampled
+            _step: The distance between positions
+
+        Returns:
+            int: The number of positions
+        '''
+
+        # A range which is a whole number of steps, apart from rounding, does not get an extra position at the end
+        return max(0, int(np.ceil((_end - _start) / _step - 1e-6)))
+
+    def axis(self, _start, _end, _step):
+        '''Find the sample positions along one axis.
+
+        Each position is found from its integer index, so the positions can be found again from the start, step and index.
+
+        Args:
+            _start: The start of the range
+            _end: The end of the range, which is not sampled
+            _step: The distance between positions
+
+        Returns:
+            numpy.ndarray: The sample positions
+        '''
+
+        return _start + np.arange(self.axisCount(_start, _end, _step), dtype=np.float64) * _step
+
+    def sdCapsules(self, _points, _capsules=None):
+        '''Vectorised signed distance capsule function.
+
+        This is the same function as PointCloudExporter.sdCapsule evaluated for every point and capsule.
+
+        Args:
+            _points: An (M, 3) array of positions
+            _capsules: An (N, 8) array of capsules, by default all the capsules
+
+        Returns:
+            numpy.ndarray: An (M, N) array of signed distances
+        '''
+
+        if _capsules is None:
+            _capsules = self.m_capsules
+        a = _capsules[:, 0:3]
+        r1 = _capsules[:, 3]
+        ba = _capsules[:, 4:7] - a
+        r2 = _capsules[:, 7]
+        baba = np.einsum("ij,ij->i", ba, ba)
+        # Guard against capsules where both ends are at the same position
+        baba[baba == 0.0] = 1.0
+
+        pa = _points[:, np.newaxis, :] - a[np.newaxis, :, :]
+        h = np.einsum("mnj,nj->mn", pa, ba) / baba
+        np.clip(h, 0.0, 1.0, out=h)
+        pa -= ba[np.newaxis, :, :] * h[:, :, np.newaxis]
+        return np.sqrt(np.einsum("mnj,mnj->mn", pa, pa)) - r1 - h * (r2 - r1)
+
+    def smin(self, _values):
+        '''Vectorised smooth min function.
+
+        This is the same function as PointCloudExporter.smin applied to each row, using the flavour of the sampler.
+
+        Args:
+            _values: An (M, N) array of values
+
+        Returns:
+            numpy.ndarray: The smooth min of each row
+        '''
+
+        return self.m_kernel.sminRows(_values)
+
+    def calculateSD(self, _points, _nearest=None):
+        '''Calculate the signed distance at many positions, in chunks to bound the memory.
+
+        Args:
+            _points: An (M, 3) array of positions
+            _nearest: If set, an array of M values which is filled with the smallest capsule distance at each position
+
+        Returns:
+            numpy.ndarray: The signed distance at each position
+        '''
+
+        if self.m_index is not None:
+            return self.calculateCulledSD(_points, _nearest)
+        rows = max(1, self.m_maxElements // max(1, len(self.m_capsules)))
+        values = np.empty(len(_points), dtype=np.float64)
+        for start in range(0, len(_points), rows):
+            end = start + rows
+            distances = self.sdCapsules(_points[start:end])
+            values[start:end] = self.smin(distances)
+            if _nearest is not None:
+                _nearest[start:end] = distances.min(axis=1)
+        return values
+
+    def calculateCulledSD(self, _points, _nearest=None):
+        '''Calculate the signed distance at many positions using only the nearby capsules.
+
+        Each capsule left out is further than the index margin from the position, so the sign is unchanged.
+        Positions with no capsules within the margin are given the margin as their signed distance.
+
+        Args:
+            _points: An (M, 3) array of positions
+            _nearest: If set, an array of M values which is filled with the smallest distance of the nearby capsules,
+                      or the margin if there are none
+
+        Returns:
+            numpy.ndarray: The signed distance at each position
+        '''
+
+        values = np.full(len(_points), self.m_index.m_margin, dtype=np.float64)
+        if _nearest is not None:
+            _nearest[:] = self.m_index.m_margin
+        buckets = self.m_index.bucketIndices(_points)
+        # Group the positions by bucket
+        order = np.argsort(buckets, kind="mergesort")
+        starts = np.flatnonzero(np.diff(buckets[order])) + 1
+        for group in np.split(order, starts):
+            if len(group) == 0:
+                continue
+            capsules = self.m_capsules[self.m_index.capsulesInBucket(buckets[group[0]])]
+            if len(capsules) == 0:
+                continue
+            rows = max(1, self.m_maxElements // len(capsules))
+            for start in range(0, len(group), rows):
+                indices = group[start:start + rows]
+                distances = self.sdCapsules(_points[indices], capsules)
+                values[indices] = self.smin(distances)
+                if _nearest is not None:
+                    _nearest[indices] = distances.min(axis=1)
+        return values
+
+    def gridPoints(self, _xs, _ys, _zs):
+        '''Find every position of a grid in x, y, z order.
+
+        Args:
+            _xs: The x positions
+            _ys: The y positions
+            _zs: The z positions
+
+        Returns:
+            numpy.ndarray: An (len(_xs) * len(_ys) * len(_zs), 3) array of positions
+        '''
+
+        grid = np.empty((len(_xs), len(_ys), len(_zs), 3), dtype=np.float64)
+        grid[..., 0] = _xs[:, np.newaxis, np.newaxis]
+        grid[..., 1] = _ys[np.newaxis, :, np.newaxis]
+        grid[..., 2] = _zs[np.newaxis, np.newaxis, :]
+        return grid.reshape(-1, 3)
+
+    def axes(self, _voxelSize, _boundingBox):
+        '''Find the sample positions along each axis of the bounding box.
+
+        Args:
+            _voxelSize: The size of the voxels
+            _boundingBox: The bounding box of the NSpheres
+
+        Returns:
+            list: The x, y and z sample positions
+        '''
+
+        return [self.axis(_boundingBox[0][i], _boundingBox[1][i], _voxelSize) for i in range(3)]
+
+    @staticmethod
+    def dims(_voxelSize, _boundingBox):
+        '''Find the number of sample positions along each axis of the bounding box, without finding the positions.
+
+        Args:
+            _voxelSize: The size of the voxels
+            _boundingBox: The bounding box of the NSpheres
+
+        Returns:
+            tuple: The number of voxels along each axis
+        '''
+
+        return tuple(SDFSampler.axisCount(_boundingBox[0][i], _boundingBox[1][i], _voxelSize) for i in range(3))
+
+    def slabs(self, _xs, _ys, _zs):
+        '''Split the grid into slabs of x planes.
+
+        Args:
+            _xs: The x positions
+            _ys: The y positions
+            _zs: The z positions
+
+        Returns:
+            generator: The positions of each slab as an (M, 3) array
+        '''
+
+        # Use as many x planes per slab as will fit, the rows are chunked again in calculateSD
+        planeSize = max(1, len(_ys) * len(_zs) * len(self.m_capsules))
+        planes = max(1, self.m_maxElements // planeSize)
+        for start in range(0, len(_xs), planes):
+            yield self.gridPoints(_xs[start:start + planes], _ys, _zs)
+
+    def iterateAxes(self, _xs, _ys, _zs):
+        '''Sample a grid a slab at a time.
+
+        Args:
+            _xs: The x positions
+            _ys: The y positions
+            _zs: The z positions
+
+        Returns:
+            generator: An (M, 3) array of the points inside the mesh for each slab, in x, y, z order
+        '''
+
+        planeSize = max(1, len(_ys) * len(_zs))
+        done = 0
+        for points in self.slabs(_xs, _ys, _zs):
+            values = self.calculateSD(points)
+            done += len(points) // planeSize
+            if self.m_progress is not None:
+                self.m_progress(done, len(_xs))
+            yield points[values < 0]
+
+    def iterateSD(self, _voxelSize, _boundingBox):
+        '''Sample the grid a slab at a time, so the memory used depends on the slab size and not the number of points.
+
+        Args:
+            _voxelSize: The size of the voxels
+            _boundingBox: The bounding box of the NSpheres
+
+        Returns:
+            generator: An (M, 3) array of the points inside the mesh for each slab
+        '''
+
+        return self.iterateAxes(*self.axes(_voxelSize, _boundingBox))
+
+    def iterateValues(self, _xs, _ys, _zs, _planes, _band=None):
+        '''Sample the signed distance at every voxel of a grid, a block of x planes at a time.
+
+        Args:
+            _xs: The x positions
+            _ys: The y positions
+            _zs: The z positions
+            _planes: The number of x planes in each block
+            _band: If set, the values are clamped to the range [-_band, _band]
+
+        Returns:
+            generator: A (planes, len(_ys), len(_zs)) float32 array of signed distances for each block
+        '''
+
+        for start in range(0, len(_xs), _planes):
+            xs = _xs[start:start + _planes]
+            values = self.calculateSD(self.gridPoints(xs, _ys, _zs)).astype(np.float32)
+            if _band is not None:
+                np.clip(values, -_band, _band, out=values)
+            if self.m_progress is not None:
+                self.m_progress(start + len(xs), len(_xs))
+            yield values.reshape(len(xs), len(_ys), len(_zs))
+
+    def sampleAxes(self, _xs, _ys, _zs):
+        '''Sample a grid to find all the points inside the mesh.
+
+        Args:
+            _xs: The x positions
+            _ys: The y positions
+            _zs: The z positions
+
+        Returns:
+            numpy.ndarray: An (M, 3) array of points that lie inside the mesh
+        '''
+
+        inside = [np.zeros((0, 3), dtype=np.float64)]
+        inside.extend(self.iterateAxes(_xs, _ys, _zs))
+        return np.concatenate(inside)
+
+    def sampleSD(self, _voxelSize, _boundingBox):
+        '''Sample the grid to find all the points inside the mesh.
+
+        Args:
+            _voxelSize: The size of the voxels
+            _boundingBox: The bounding box of the NSpheres
+
+        Returns:
+            numpy.ndarray: An (M, 3) array of points that lie inside the mesh
+        '''
+
+        return self.sampleAxes(*self.axes(_voxelSize, _boundingBox))
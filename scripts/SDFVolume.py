@@ -0,0 +1,131 @@
+import struct
+import numpy as np
+
+
+class SDFVolume(object):
+    '''Class used for writing and reading signed distance volumes.
+
+    The file starts with a header of the grid origin, voxel size and dimensions. Then either:
+    dense: every value as float32 in x, y, z order, so the values can be memory mapped.
+    sparse: only the tiles within the narrow band as float32 tiles, followed by a uint8 state for every tile.
+    Tiles which are not stored are filled with -band if they are inside and +band if they are outside.
+    '''
+
+    m_magic = b"SDFV"
+    m_version = 1
+    m_dense = 0
+    m_sparse = 1
+    # Tile states in a sparse file
+    m_outside = 0
+    m_inside = 1
+    m_narrowBand = 2
+    # magic, version, kind, dims, origin, voxel size, tile size, band, number of narrow band tiles
+    m_headerFormat = "<4sII3i3ddifQ"
+    m_headerSize = struct.calcsize(m_headerFormat)
+
+    def writeHeader(self, _file, _kind, _dims, _origin, _voxelSize, _tileSize=0, _band=0.0, _tileCount=0):
+        '''Write the header.
+
+        Args:
+            _file: The file object, opened in binary mode
+            _kind: Either m_dense or m_sparse
+            _dims: The number of voxels along each axis
+            _origin: The position of the first voxel
+            _voxelSize: The size of the voxels
+            _tileSize: The number of voxels along each side of a tile
+            _band: The width of the narrow band
+            _tileCount: The number of narrow band tiles stored
+        '''
+
+        _file.seek(0)
+        _file.write(struct.pack(self.m_headerFormat, self.m_magic, self.m_version, _kind, _dims[0], _dims[1], _dims[2], _origin[0], _origin[1], _origin[2], _voxelSize, _tileSize, _band, _tileCount))
+
+    def writeDense(self, _filePath, _blocks, _dims, _origin, _voxelSize):
+        '''Write every value of the volume.
+
+        Args:
+            _filePath: The path of the file, including the extension
+            _blocks: An iterable of (planes, dims[1], dims[2]) arrays of signed distances in x order
+            _dims: The number of voxels along each axis
+            _origin: The position of the first voxel
+            _voxelSize: The size of the voxels
+        '''
+
+        with open(_filePath, "wb") as outputFile:
+            self.writeHeader(outputFile, self.m_dense, _dims, _origin, _voxelSize)
+            for values in _blocks:
+                outputFile.write(np.ascontiguousarray(values, dtype="<f4").tobytes())
+
+    def writeSparse(self, _filePath, _blocks, _dims, _origin, _voxelSize, _tileSize, _band):
+        '''Write only the tiles of the volume within the narrow band.
+
+        Args:
+            _filePath: The path of the file, including the extension
+            _blocks: An iterable of (_tileSize, dims[1], dims[2]) arrays of signed distances clamped to [-_band, _band], in x order
+            _dims: The number of voxels along each axis
+            _origin: The position of the first voxel
+            _voxelSize: The size of the voxels
+            _tileSize: The number of voxels along each side of a tile
+            _band: The width of the narrow band
+        '''
+
+        tileDims = [-(-d // _tileSize) for d in _dims]
+        states = []
+        tileCount = 0
+        with open(_filePath, "wb") as outputFile:
+            self.writeHeader(outputFile, self.m_sparse, _dims, _origin, _voxelSize, _tileSize, _band)
+            for values in _blocks:
+                # Pad the block to whole tiles with the outside value
+                padded = np.full((_tileSize, tileDims[1] * _tileSize, tileDims[2] * _tileSize), _band, dtype="<f4")
+                padded[:values.shape[0], :values.shape[1], :values.shape[2]] = values
+                tiles = padded.reshape(_tileSize, tileDims[1], _tileSize, tileDims[2], _tileSize).transpose(1, 3, 0, 2, 4)
+                tiles = tiles.reshape(tileDims[1] * tileDims[2], -1)
+                blockStates = np.full(len(tiles), self.m_narrowBand, dtype=np.uint8)
+                blockStates[(tiles >= _band).all(axis=1)] = self.m_outside
+                blockStates[(tiles <= -_band).all(axis=1)] = self.m_inside
+                narrowBand = tiles[blockStates == self.m_narrowBand]
+                outputFile.write(np.ascontiguousarray(narrowBand).tobytes())
+                tileCount += len(narrowBand)
+                states.append(blockStates)
+            outputFile.write(np.concatenate([np.zeros(0, dtype=np.uint8)] + states).tobytes())
+            self.writeHeader(outputFile, self.m_sparse, _dims, _origin, _voxelSize, _tileSize, _band, tileCount)
+
+    def read(self, _filePath, _mmap=False):
+        '''Read a volume.
+
+        Args:
+            _filePath: The path of the file
+            _mmap: Memory map the values of a dense file instead of reading them
+
+        Returns:
+            numpy.ndarray, tuple, float: The (nx, ny, nz) float32 signed distances, the origin and the voxel size
+        '''
+
+        with open(_filePath, "rb") as inputFile:
+            header = struct.unpack(self.m_headerFormat, inputFile.read(self.m_headerSize))
+            magic, version, kind = header[0:3]
+            dims = header[3:6]
+            origin = header[6:9]
+            voxelSize, tileSize, band, tileCount = header[9:13]
+            if magic != self.m_magic or version != self.m_version:
+                raise IOError("Not a signed distance volume: " + _filePath)
+
+            if kind == self.m_dense:
+                if _mmap:
+                    values = np.memmap(_filePath, dtype="<f4", mode="r", offset=self.m_headerSize, shape=dims)
+                else:
+                    values = np.frombuffer(inputFile.read(int(np.prod(dims)) * 4), dtype="<f4").reshape(dims)
+                return values, origin, voxelSize
+
+            tileDims = [-(-d // tileSize) for d in dims]
+            tileVoxels = tileSize ** 3
+            narrowBand = np.frombuffer(inputFile.read(tileCount * tileVoxels * 4), dtype="<f4").reshape(-1, tileVoxels)
+            states = np.frombuffer(inputFile.read(), dtype=np.uint8)
+
+        tiles = np.empty((len(states), tileVoxels), dtype=np.float32)
+        tiles[states == self.m_outside] = band
+        tiles[states == self.m_inside] = -band
+        tiles[states == self.m_narrowBand] = narrowBand
+        tiles = tiles.reshape(tileDims[0], tileDims[1], tileDims[2], tileSize, tileSize, tileSize).transpose(0, 3, 1, 4, 2, 5)
+        values = tiles.reshape(tileDims[0] * tileSize, tileDims[1] * tileSize, tileDims[2] * tileSize)
+        return values[:dims[0], :dims[1], :dims[2]], origin, voxelSize
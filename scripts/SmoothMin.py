@@ -0,0 +1,150 @@
+import math
+import numpy as np
+
+
+class SmoothMin(object):
+    '''Class used for finding the smooth min of many signed distances.
+
+    exponential: the same function as PointCloudExporter.smin, log(sum(exp(-k * d))) / k with the sign of the smallest distance.
+    The smallest distance is subtracted before taking the exponentials so the sum can not overflow or underflow,
+    and the terms which add less than the tolerance to the sum are skipped.
+    polynomial: the polynomial smin from http://iquilezles.org/www/articles/smin/smin.htm folded over the distances in increasing order.
+    The blend width is 4 * log(2) / k, so two equal distances are blended by the same amount as the exponential smin.
+    Distances further than the blend width from the result do not change it, so the fold stops at the first of these.
+    Both flavours keep the sign of the smallest distance, so a point is inside when any distance is negative.
+    '''
+
+    m_exponential = "exponential"
+    m_polynomial = "polynomial"
+    m_flavours = (m_exponential, m_polynomial)
+
+    def __init__(self, _smoothness, _flavour="exponential", _tolerance=1e-9):
+        '''Constructor
+
+        Args:
+            _smoothness: The smoothness constant (k) for the smin function
+            _flavour: Either m_exponential or m_polynomial
+            _tolerance: The largest total of the exponential terms that can be skipped
+        '''
+
+        if _flavour not in self.m_flavours:
+            raise ValueError("Unknown smin flavour: " + str(_flavour))
+        self.m_smoothness = float(_smoothness)
+        self.m_flavour = _flavour
+        self.m_tolerance = _tolerance
+        self.m_blendWidth = 4.0 * math.log(2.0) / self.m_smoothness
+
+    def cutoff(self, _count):
+        '''Find the scaled distance above the smallest distance after which exponential terms are skipped.
+
+        Args:
+            _count: The number of distances
+
+        Returns:
+            float: The cutoff of k * (d - min(d))
+        '''
+
+        return math.log(max(1, _count) / self.m_tolerance)
+
+    def smin(self, _values):
+        '''Smooth min of a list of values.
+
+        Args:
+            _values: List of values to find smooth min from
+
+        Returns:
+            float: The smooth min from the list of values
+        '''
+
+        if self.m_flavour == self.m_polynomial:
+            values = sorted(_values)
+            minV = values[0]
+            result = minV
+            for value in values[1:]:
+                # The result is never more than the values already folded in, and the rest of the values are larger
+                difference = value - result
+                if difference >= self.m_blendWidth:
+                    break
+                h = (self.m_blendWidth - difference) / self.m_blendWidth
+                result -= h * h * self.m_blendWidth * 0.25
+            return math.copysign(result, minV)
+
+        k = self.m_smoothness
+        minV = min(_values)
+        # Values above the threshold add less than the tolerance in total, so their exponentials are skipped
+        threshold = minV + self.cutoff(len(_values)) / k
+        res = 0.0
+        for value in _values:
+            if value <= threshold:
+                res += math.exp(k * (minV - value))
+        return math.copysign(math.log(res) / k - minV, minV)
+
+    def sminRows(self, _values):
+        '''Smooth min of each row of an array.
+
+        Args:
+            _values: An (M, N) array of values
+
+        Returns:
+            numpy.ndarray: The smooth min of each row
+        '''
+
+        values = np.asarray(_values, dtype=np.float64)
+        minV = values.min(axis=1)
+        if self.m_flavour == self.m_polynomial:
+            values = np.sort(values, axis=1)
+            result = values[:, 0].copy()
+            for column in range(1, values.shape[1]):
+                difference = values[:, column] - result
+                blend = difference < self.m_blendWidth
+                if not blend.any():
+                    break
+                h = (self.m_blendWidth - difference[blend]) / self.m_blendWidth
+                result[blend] -= h * h * self.m_blendWidth * 0.25
+            return np.copysign(result, minV)
+
+        k = self.m_smoothness
+        scaled = values - minV[:, np.newaxis]
+        scaled *= k
+        near = scaled <= self.cutoff(values.shape[1])
+        terms = np.zeros_like(scaled)
+        np.negative(scaled, out=scaled)
+        np.exp(scaled, out=terms, where=near)
+        return np.copysign(np.log(terms.sum(axis=1)) / k - minV, minV)
+
+    def offset(self, _count):
+        '''Find how far the smooth min can be below the smallest distance.
+
+        Args:
+            _count: The number of distances
+
+        Returns:
+            float: The largest difference
+        '''
+
+        if self.m_flavour == self.m_polynomial:
+            return max(0, _count - 1) * self.m_blendWidth * 0.25
+        return math.log(max(1, _count)) / self.m_smoothness
+
+    def margin(self, _count, _errorBound):
+        '''Find how far a distance can be above the surface before leaving it out changes the smooth min by less than the error bound.
+
+        exponential: a distance of at least the margin adds at most exp(-k * margin) to the sum.
+        On the surface the sum is close to 1, so leaving out every such distance changes the result by at most count * exp(-k * margin) / k.
+        polynomial: a distance at least the blend width above the smallest distance does not change the result.
+
+        Args:
+            _count: The number of distances
+            _errorBound: The largest change in the smooth min allowed, or None to never leave out a distance
+
+        Returns:
+            float: The margin
+        '''
+
+        if _errorBound is None:
+            return float("inf")
+        if _count == 0:
+            return 0.0
+        if self.m_flavour == self.m_polynomial:
+            return self.m_blendWidth
+        return max(0.0, math.log(_count / (self.m_smoothness * _errorBound)) / self.m_smoothness)
@@ -0,0 +1,108 @@
+import numpy as np
+
+
+class SurfaceBand(object):
+    '''Class used for finding the points near the surface of the mesh, instead of every point inside it.
+
+    The points kept are the voxels where the absolute signed distance is less than the band, so the number of points
+    grows with the area of the surface rather than the volume. The points can be moved onto the surface
+    with Newton steps along the gradient of the signed distance, which are only taken when they move a point closer, and the normalised gradient,
+    turned to point away from the nearest capsule, is the normal of each point.
+    The gradient is found with central differences, using a sampler with every capsule near the points.
+    '''
+
+    def __init__(self, _sampler, _band, _snap=False, _normals=False, _snapSteps=2):
+        '''Constructor
+
+        Args:
+            _sampler: The SDFSampler used to find the signed distance near the points
+            _band: The largest absolute signed distance of the points kept, normally the voxel size
+            _snap: Move the points onto the surface
+            _normals: Add the normal of each point, so each block is an (M, 6) array
+            _snapSteps: The number of Newton steps used to move each point onto the surface
+        '''
+
+        self.m_sampler = _sampler
+        self.m_band = float(_band)
+        self.m_snap = _snap
+        self.m_normals = _normals
+        self.m_snapSteps = _snapSteps
+        # Small enough for an accurate gradient, but large enough that the error bound of the sampler is not amplified
+        self.m_step = 0.25 * self.m_band
+
+    def iterateSurface(self, _blocks, _xs, _ys, _zs):
+        '''Find the points within the band from blocks of signed distances.
+
+        Args:
+            _blocks: An iterable of (planes, len(_ys), len(_zs)) arrays of signed distances, from a sampler's iterateValues
+            _xs: The x positions
+            _ys: The y positions
+            _zs: The z positions
+
+        Returns:
+            generator: An (M, 3) array of points, or (M, 6) array of points and normals, for each block in x, y, z order
+        '''
+
+        start = 0
+        for values in _blocks:
+            i, j, k = np.nonzero(np.abs(values) < self.m_band)
+            points = np.column_stack((_xs[start + i], _ys[j], _zs[k]))
+            start += len(values)
+            yield self.refine(points, values[i, j, k].astype(np.float64))
+
+    def refine(self, _points, _values):
+        '''Snap the points onto the surface and add their normals, if they are wanted.
+
+        Args:
+            _points: An (M, 3) array of points
+            _values: The signed distance at each point
+
+        Returns:
+            numpy.ndarray: An (M, 3) array of points, or (M, 6) array of points and normals
+        '''
+
+        points = _points
+        if len(points) == 0:
+            return np.zeros((0, 6 if self.m_normals else 3), dtype=np.float64)
+        if self.m_snap:
+            values = _values
+            for step in range(self.m_snapSteps):
+                gradients = self.gradients(points)
+                lengths = np.sqrt((gradients * gradients).sum(axis=1))
+                # A flat gradient only happens far inside the mesh, where the points are not moved
+                valid = lengths > 1e-6
+                directions = gradients / np.where(valid, lengths, 1.0)[:, np.newaxis]
+                # The smin keeps the sign of the nearest capsule, so the gradient is not reliable where the capsules blend.
+                # Each step is kept within the band and only taken if it moves the point closer to the surface
+                distances = np.where(valid, np.clip(values / np.where(valid, lengths, 1.0), -self.m_band, self.m_band), 0.0)
+                candidates = points - directions * distances[:, np.newaxis]
+                candidateValues = self.m_sampler.calculateSD(candidates)
+                closer = np.abs(candidateValues) < np.abs(values)
+                points = np.where(closer[:, np.newaxis], candidates, points)
+                values = np.where(closer, candidateValues, values)
+        if not self.m_normals:
+            return points
+        gradients = self.gradients(points)
+        lengths = np.sqrt((gradients * gradients).sum(axis=1))
+        normals = gradients / np.maximum(lengths, 1e-12)[:, np.newaxis]
+        # Between the blended surface and the capsules the smin is the absolute value of the blend, so its gradient points inward.
+        # The normals are turned to point away from the nearest capsule
+        nearest = np.empty(2 * len(points), dtype=np.float64)
+        self.m_sampler.calculateSD(np.vstack((points + normals * self.m_step, points - normals * self.m_step)), nearest)
+        normals[nearest[:len(points)] < nearest[len(points):]] *= -1.0
+        return np.hstack((points, normals))
+
+    def gradients(self, _points):
+        '''Find the gradient of the signed distance with central differences.
+
+        Args:
+            _points: An (M, 3) array of points
+
+        Returns:
+            numpy.ndarray: An (M, 3) array of gradients
+        '''
+
+        offsets = np.vstack((np.eye(3), -np.eye(3))) * self.m_step
+        samples = (_points[:, np.newaxis, :] + offsets).reshape(-1, 3)
+        values = self.m_sampler.calculateSD(samples).reshape(-1, 6)
+        return (values[:, 0:3] - values[:, 3:6]) / (2.0 * self.m_step)
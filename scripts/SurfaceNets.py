@@ -0,0 +1,82 @@
+import numpy as np
+
+
+class SurfaceNets(object):
+    '''Class used for meshing a signed distance volume with the surface nets method.
+
+    A vertex is placed in every cell where the sign changes, at the average of the edge crossings,
+    and a quad is made around every grid edge where the sign changes.
+    The volume is padded with outside values, so the mesh is always closed.
+    '''
+
+    # The corners of a cell as offsets from its first corner
+    m_corners = np.array([(i, j, k) for i in range(2) for j in range(2) for k in range(2)])
+    # The edges of a cell as pairs of corner indices
+    m_edges = np.array([(0, 1), (2, 3), (4, 5), (6, 7), (0, 2), (1, 3), (4, 6), (5, 7), (0, 4), (1, 5), (2, 6), (3, 7)])
+
+    def mesh(self, _values, _origin, _voxelSize):
+        '''Create a mesh of the zero level set of a signed distance volume.
+
+        Args:
+            _values: An (nx, ny, nz) array of signed distances, negative inside
+            _origin: The position of the first voxel
+            _voxelSize: The size of the voxels
+
+        Returns:
+            numpy.ndarray, numpy.ndarray: A (V, 3) array of vertex positions and an (F, 3) array of triangle vertex indices
+        '''
+
+        # Pad the volume so the surface can not touch the boundary
+        outside = max(float(np.abs(_values).max()) if _values.size else 0.0, _voxelSize)
+        values = np.pad(np.asarray(_values, dtype=np.float64), 1, "constant", constant_values=outside)
+        inside = values < 0
+        cellShape = tuple(n - 1 for n in values.shape)
+
+        # Find the cells with both inside and outside corners
+        cornerInside = np.stack([inside[i:i + cellShape[0], j:j + cellShape[1], k:k + cellShape[2]] for i, j, k in self.m_corners], axis=-1)
+        insideCount = cornerInside.sum(axis=-1)
+        active = (insideCount > 0) & (insideCount < 8)
+        cells = np.argwhere(active)
+        vertexIndex = np.full(cellShape, -1, dtype=np.int64)
+        vertexIndex[active] = np.arange(len(cells))
+
+        # Place each vertex at the average of the edge crossings in its cell
+        corners = cells[:, np.newaxis, :] + self.m_corners[np.newaxis, :, :]
+        cornerValues = values[corners[..., 0], corners[..., 1], corners[..., 2]]
+        v0 = cornerValues[:, self.m_edges[:, 0]]
+        v1 = cornerValues[:, self.m_edges[:, 1]]
+        crossing = (v0 < 0) != (v1 < 0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.where(crossing, v0 / (v0 - v1), 0.0)
+        p0 = self.m_corners[self.m_edges[:, 0]]
+        p1 = self.m_corners[self.m_edges[:, 1]]
+        edgePoints = p0[np.newaxis, :, :] + t[:, :, np.newaxis] * (p1 - p0)[np.newaxis, :, :]
+        local = (edgePoints * crossing[:, :, np.newaxis]).sum(axis=1) / crossing.sum(axis=1)[:, np.newaxis]
+        # Remove the padding from the index before converting to a position
+        vertices = (cells + local - 1.0) * _voxelSize + np.asarray(_origin, dtype=np.float64)
+
+        # Make a quad around every edge where the sign changes
+        faces = [np.zeros((0, 3), dtype=np.int64)]
+        for axis in range(3):
+            u, v = (axis + 1) % 3, (axis + 2) % 3
+            n = list(values.shape)
+            n[axis] -= 1
+            start = inside[:n[0], :n[1], :n[2]]
+            shift = [0, 0, 0]
+            shift[axis] = 1
+            end = inside[shift[0]:shift[0] + n[0], shift[1]:shift[1] + n[1], shift[2]:shift[2] + n[2]]
+            edges = np.argwhere(start != end)
+            # The four cells around the edge, counter clockwise when looking down the axis
+            quad = []
+            for du, dv in ((1, 1), (0, 1), (0, 0), (1, 0)):
+                cell = edges.copy()
+                cell[:, u] -= du
+                cell[:, v] -= dv
+                quad.append(vertexIndex[cell[:, 0], cell[:, 1], cell[:, 2]])
+            quad = np.column_stack(quad)
+            # Reverse the quads where the outside is at the start of the edge so the faces point outwards
+            flip = ~start[edges[:, 0], edges[:, 1], edges[:, 2]]
+            quad[flip] = quad[flip][:, ::-1]
+            faces.append(quad[:, [0, 1, 2]])
+            faces.append(quad[:, [0, 2, 3]])
+        return vertices, np.concatenate(faces)
@@ -0,0 +1,227 @@
+import collections
+import copy
+import multiprocessing
+import multiprocessing.pool
+import numpy as np
+
+
+def sampleTile(_task):
+    '''Sample one tile of the grid.
+
+    This is a module level function so it can be sent to a process pool.
+
+    Args:
+        _task: A tuple of (sampler, xs, ys, zs)
+
+    Returns:
+        numpy.ndarray: An (M, 3) array of points that lie inside the mesh
+    '''
+
+    sampler, xs, ys, zs = _task
+    return sampler.sampleAxes(xs, ys, zs)
+
+
+def sampleTileValues(_task):
+    '''Sample the signed distance at every voxel of one tile of the grid.
+
+    Args:
+        _task: A tuple of (sampler, xs, ys, zs, planes, band)
+
+    Returns:
+        list: The blocks of signed distances from the sampler
+    '''
+
+    sampler, xs, ys, zs, planes, band = _task
+    return list(sampler.iterateValues(xs, ys, zs, planes, band))
+
+
+class TiledSampler(object):
+    '''Class used for splitting the grid into tiles and sampling them in parallel.
+
+    The tiles are slabs of x planes, so joining the results in tile order gives the same points as sampling the whole grid.
+    The sampler does not use Maya, so the workers never touch the scene.
+    '''
+
+    def __init__(self, _sampler, _workers=None, _useProcesses=False, _tilesPerWorker=4, _maxTilePlanes=16):
+        '''Constructor
+
+        Args:
+            _sampler: The SDFSampler (or subclass) used to sample each tile
+            _workers: The number of workers, by default the number of CPUs
+            _useProcesses: Use a process pool instead of a thread pool. Threads are safer inside Maya.
+            _tilesPerWorker: The number of tiles for each worker, so the work is balanced when tiles take different times
+            _maxTilePlanes: The largest number of x planes in a tile, which bounds the memory used when streaming
+        '''
+
+        self.m_sampler = _sampler
+        self.m_workers = _workers if _workers else multiprocessing.cpu_count()
+        self.m_useProcesses = _useProcesses
+        self.m_tilesPerWorker = max(1, _tilesPerWorker)
+        self.m_maxTilePlanes = max(1, _maxTilePlanes)
+        # Called with the number of x planes sampled and the total after each tile, see ExportMonitor.progress
+        self.m_progress = None
+
+    def axes(self, _voxelSize, _boundingBox):
+        '''Find the sample positions along each axis of the bounding box.
+
+        Args:
+            _voxelSize: The size of the voxels
+            _boundingBox: The bounding box of the NSpheres
+
+        Returns:
+            list: The x, y and z sample positions
+        '''
+
+        return self.m_sampler.axes(_voxelSize, _boundingBox)
+
+    def tiles(self, _xs):
+        '''Split the x positions into tiles.
+
+        Args:
+            _xs: The x positions
+
+        Returns:
+            list: The x positions of each tile
+        '''
+
+        count = max(self.m_workers * self.m_tilesPerWorker, -(-len(_xs) // self.m_maxTilePlanes))
+        count = min(len(_xs), count)
+        if count <= 1:
+            return [_xs]
+        return np.array_split(_xs, count)
+
+    def iterateAxes(self, _xs, _ys, _zs):
+        '''Sample a grid a tile at a time.
+
+        Args:
+            _xs: The x positions
+            _ys: The y positions
+            _zs: The z positions
+
+        Returns:
+            generator: An (M, 3) array of the points inside the mesh for each tile, in the same order as the sampler
+        '''
+
+        tasks = [(self.taskSampler(), xs, _ys, _zs) for xs in self.tiles(_xs)]
+        done = 0
+        for task, points in zip(tasks, self.runTasks(sampleTile, tasks)):
+            done += len(task[1])
+            if self.m_progress is not None:
+                self.m_progress(done, len(_xs))
+            yield points
+
+    def iterateValues(self, _xs, _ys, _zs, _planes, _band=None):
+        '''Sample the signed distance at every voxel of a grid, a tile at a time.
+
+        The tiles are whole blocks of x planes so the blocks are the same as the sampler would give.
+
+        Args:
+            _xs: The x positions
+            _ys: The y positions
+            _zs: The z positions
+            _planes: The number of x planes in each block
+            _band: If set, the values are clamped to the range [-_band, _band]
+
+        Returns:
+            generator: A (planes, len(_ys), len(_zs)) float32 array of signed distances for each block
+        '''
+
+        tasks = [(self.taskSampler(), _xs[start:start + _planes], _ys, _zs, _planes, _band) for start in range(0, len(_xs), _planes)]
+        done = 0
+        for blocks in self.runTasks(sampleTileValues, tasks):
+            for values in blocks:
+                done += len(values)
+                if self.m_progress is not None:
+                    self.m_progress(done, len(_xs))
+                yield values
+
+    def taskSampler(self):
+        '''Copy the sampler for one task.
+
+        Each task has its own shallow copy of the sampler so counters are not shared between threads.
+        The progress is reported from this thread as the tiles are taken in order, so the copies do not report it.
+
+        Returns:
+            SDFSampler: The copy of the sampler
+        '''
+
+        sampler = copy.copy(self.m_sampler)
+        sampler.m_progress = None
+        return sampler
+
+    def runTasks(self, _function, _tasks):
+        '''Run the tasks in the pool.
+
+        Only a few tasks per worker are queued at once, so the memory used depends on the tile size and not the number of points.
+
+        Args:
+            _function: The module level function to run for each task
+            _tasks: The list of arguments for each task
+
+        Returns:
+            generator: The result of each task, in the same order as the tasks
+        '''
+
+        if self.m_workers <= 1 or len(_tasks) <= 1:
+            for task in _tasks:
+                yield _function(task)
+            return
+
+        if self.m_useProcesses:
+            pool = multiprocessing.Pool(self.m_workers)
+        else:
+            pool = multiprocessing.pool.ThreadPool(self.m_workers)
+        try:
+            # The results are taken in the order the tasks were queued, so the output is deterministic
+            pending = collections.deque()
+            for task in _tasks:
+                pending.append(pool.apply_async(_function, (task,)))
+                if len(pending) >= 2 * self.m_workers:
+                    yield pending.popleft().get()
+            while pending:
+                yield pending.popleft().get()
+        finally:
+            pool.terminate()
+            pool.join()
+
+    def iterateSD(self, _voxelSize, _boundingBox):
+        '''Sample the grid a tile at a time.
+
+        Args:
+            _voxelSize: The size of the voxels
+            _boundingBox: The bounding box of the NSpheres
+
+        Returns:
+            generator: An (M, 3) array of the points inside the mesh for each tile
+        '''
+
+        return self.iterateAxes(*self.m_sampler.axes(_voxelSize, _boundingBox))
+
+    def sampleAxes(self, _xs, _ys, _zs):
+        '''Sample a grid to find all the points inside the mesh.
+
+        Args:
+            _xs: The x positions
+            _ys: The y positions
+            _zs: The z positions
+
+        Returns:
+            numpy.ndarray: An (M, 3) array of points that lie inside the mesh, in the same order as the sampler
+        '''
+
+        inside = [np.zeros((0, 3), dtype=np.float64)]
+        inside.extend(self.iterateAxes(_xs, _ys, _zs))
+        return np.concatenate(inside)
+
+    def sampleSD(self, _voxelSize, _boundingBox):
+        '''Sample the grid to find all the points inside the mesh.
+
+        Args:
+            _voxelSize: The size of the voxels
+            _boundingBox: The bounding box of the NSpheres
+
+        Returns:
+            numpy.ndarray: An (M, 3) array of points that lie inside the mesh
+        '''
+
+        return self.sampleAxes(*self.m_sampler.axes(_voxelSize, _boundingBox))
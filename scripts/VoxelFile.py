@@ -0,0 +1,195 @@
+import struct
+import numpy as np
+import VoxelPoints
+
+
+class VoxelFile(object):
+    '''Class used for writing and reading point clouds of the sampled grid as voxel indices.
+
+    The file starts with a header of the grid origin, voxel size and dimensions, the encoding and the index type. Then either:
+    indices: the x, y and z voxel index of every point, in x, y, z order.
+    runs: each run of points along a z row as the x index, y index, first z index and number of points.
+    The indices are uint16 if every axis has fewer than 65536 voxels and uint32 otherwise, so the records can be memory mapped.
+    The position of a point is origin + index * voxelSize, see VoxelPoints. The files have the .vpc extension.
+    '''
+
+    m_magic = b"VOXP"
+    m_version = 1
+    m_indices = 0
+    m_runs = 1
+    m_types = ("<u2", "<u4")
+    # magic, version, encoding, index type, dims, origin, voxel size, number of points, number of records
+    m_headerFormat = "<4sIII3i3ddQQ"
+    m_headerSize = struct.calcsize(m_headerFormat)
+
+    def writeHeader(self, _file, _encoding, _indexType, _dims, _origin, _voxelSize, _count=0, _records=0):
+        '''Write the header.
+
+        Args:
+            _file: The file object, opened in binary mode
+            _encoding: Either m_indices or m_runs
+            _indexType: The index into m_types of the index type
+            _dims: The number of voxels along each axis
+            _origin: The position of the voxel with index (0, 0, 0)
+            _voxelSize: The size of the voxels
+            _count: The number of points
+            _records: The number of records, which is the number of points or runs
+        '''
+
+        _file.seek(0)
+        _file.write(struct.pack(self.m_headerFormat, self.m_magic, self.m_version, _encoding, _indexType, _dims[0], _dims[1], _dims[2], _origin[0], _origin[1], _origin[2], _voxelSize, _count, _records))
+
+    def findRuns(self, _indices):
+        '''Find the runs of points along the z rows.
+
+        Args:
+            _indices: An (M, 3) array of voxel indices in x, y, z order
+
+        Returns:
+            numpy.ndarray: An (R, 4) array of the x index, y index, first z index and number of points of each run
+        '''
+
+        indices = np.asarray(_indices, dtype=np.int64).reshape(-1, 3)
+        if len(indices) == 0:
+            return np.zeros((0, 4), dtype=np.int64)
+        # A run ends where the next point is not the next voxel of the same row
+        breaks = (indices[1:, 0] != indices[:-1, 0]) | (indices[1:, 1] != indices[:-1, 1]) | (indices[1:, 2] != indices[:-1, 2] + 1)
+        starts = np.concatenate(([0], np.flatnonzero(breaks) + 1))
+        lengths = np.diff(np.concatenate((starts, [len(indices)])))
+        return np.column_stack((indices[starts], lengths))
+
+    def expandRuns(self, _runs):
+        '''Find the voxel indices of every point of the runs.
+
+        Args:
+            _runs: An (R, 4) array of runs from findRuns
+
+        Returns:
+            numpy.ndarray: An (M, 3) array of voxel indices in x, y, z order, with the same type as the runs
+        '''
+
+        runs = np.asarray(_runs).reshape(-1, 4)
+        lengths = runs[:, 3].astype(np.int64)
+        indices = np.repeat(runs[:, 0:3], lengths, axis=0)
+        # The offset of each point from the start of its run
+        starts = np.cumsum(lengths) - lengths
+        indices[:, 2] += (np.arange(len(indices)) - np.repeat(starts, lengths)).astype(indices.dtype)
+        return indices
+
+    def writeStream(self, _filePath, _pointBlocks, _dims, _origin, _voxelSize, _runs=True):
+        '''Write blocks of points on the grid to a .vpc file as they are sampled.
+
+        The header is written again with the counts once every block has been written.
+
+        Args:
+            _filePath: The path of the file, including the extension
+            _pointBlocks: An iterable of (M, 3) arrays of sampled positions, or of VoxelPoints, in x, y, z order
+            _dims: The number of voxels along each axis
+            _origin: The position of the voxel with index (0, 0, 0), the first corner of the bounding box
+            _voxelSize: The size of the voxels
+            _runs: Write the runs along the z rows instead of every point
+
+        Returns:
+            int: The number of points written
+        '''
+
+        indexType = 0 if VoxelPoints.VoxelPoints.indexType(_dims).itemsize == 2 else 1
+        encoding = self.m_runs if _runs else self.m_indices
+        count = 0
+        records = 0
+        with open(_filePath, "wb") as outputFile:
+            self.writeHeader(outputFile, encoding, indexType, _dims, _origin, _voxelSize)
+            for points in _pointBlocks:
+                if not isinstance(points, VoxelPoints.VoxelPoints):
+                    points = VoxelPoints.VoxelPoints.fromPoints(points, _origin, _voxelSize, _dims)
+                # Each block has whole x planes, so a run never continues into the next block
+                blockRecords = self.findRuns(points.m_indices) if _runs else points.m_indices
+                outputFile.write(np.ascontiguousarray(blockRecords, dtype=self.m_types[indexType]).tobytes())
+                count += len(points)
+                records += len(blockRecords)
+            self.writeHeader(outputFile, encoding, indexType, _dims, _origin, _voxelSize, count, records)
+        return count
+
+    def write(self, _filePath, _points, _dims, _origin, _voxelSize, _runs=True):
+        '''Write points on the grid to a .vpc file.
+
+        Args:
+            _filePath: The path of the file, including the extension
+            _points: An (M, 3) array of sampled positions, or VoxelPoints, in x, y, z order
+            _dims: The number of voxels along each axis
+            _origin: The position of the voxel with index (0, 0, 0)
+            _voxelSize: The size of the voxels
+            _runs: Write the runs along the z rows instead of every point
+
+        Returns:
+            int: The number of points written
+        '''
+
+        return self.writeStream(_filePath, [_points], _dims, _origin, _voxelSize, _runs)
+
+    def readHeader(self, _filePath):
+        '''Read the header.
+
+        Args:
+            _filePath: The path of the file
+
+        Returns:
+            dict: The encoding, index type, dims, origin, voxel size, number of points and number of records
+        '''
+
+        with open(_filePath, "rb") as inputFile:
+            data = inputFile.read(self.m_headerSize)
+        if len(data) < self.m_headerSize:
+            raise IOError("Not a voxel point cloud: " + _filePath)
+        header = struct.unpack(self.m_headerFormat, data)
+        if header[0] != self.m_magic or header[1] != self.m_version:
+            raise IOError("Not a voxel point cloud: " + _filePath)
+        return {
+            "encoding": header[2],
+            "indexType": np.dtype(self.m_types[header[3]]),
+            "dims": header[4:7],
+            "origin": header[7:10],
+            "voxelSize": header[10],
+            "count": header[11],
+            "records": header[12]
+        }
+
+    def readRecords(self, _filePath, _mmap=True):
+        '''Read the records without expanding the runs.
+
+        Args:
+            _filePath: The path of the file
+            _mmap: Memory map the records instead of reading them
+
+        Returns:
+            numpy.ndarray, dict: The (records, 3) indices or (records, 4) runs and the header from readHeader
+        '''
+
+        header = self.readHeader(_filePath)
+        shape = (header["records"], 4 if header["encoding"] == self.m_runs else 3)
+        if header["records"] == 0:
+            return np.zeros(shape, dtype=header["indexType"]), header
+        if _mmap:
+            records = np.memmap(_filePath, dtype=header["indexType"], mode="r", offset=self.m_headerSize, shape=shape)
+        else:
+            with open(_filePath, "rb") as inputFile:
+                inputFile.seek(self.m_headerSize)
+                records = np.frombuffer(inputFile.read(shape[0] * shape[1] * header["indexType"].itemsize), dtype=header["indexType"]).reshape(shape)
+        return records, header
+
+    def read(self, _filePath, _mmap=True):
+        '''Read the points.
+
+        The indices of an indices file are memory mapped if _mmap is set, the runs of a runs file are expanded into memory.
+
+        Args:
+            _filePath: The path of the file
+            _mmap: Memory map the records instead of reading them
+
+        Returns:
+            VoxelPoints: The points, use points() for their positions
+        '''
+
+        records, header = self.readRecords(_filePath, _mmap)
+        indices = self.expandRuns(records) if header["encoding"] == self.m_runs else records
+        return VoxelPoints.VoxelPoints(indices, header["origin"], header["voxelSize"])
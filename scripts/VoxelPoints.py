@@ -0,0 +1,79 @@
+import numpy as np
+
+
+class VoxelPoints(object):
+    '''Class used for keeping points of the sampled grid as integer voxel indices.
+
+    Each point is the x, y and z index of its voxel, as uint16 when every axis has fewer than 65536 voxels and uint32 otherwise,
+    so a point takes 6 or 12 bytes instead of 24. The position of a point is origin + index * voxelSize,
+    which is how SDFSampler.axis finds the sample positions, so the positions are exactly the same as the sampled points.
+    '''
+
+    m_tolerance = 1e-6
+
+    def __init__(self, _indices, _origin, _voxelSize):
+        '''Constructor
+
+        Args:
+            _indices: An (M, 3) array of voxel indices
+            _origin: The position of the voxel with index (0, 0, 0), the first corner of the bounding box
+            _voxelSize: The size of the voxels
+        '''
+
+        self.m_indices = np.asarray(_indices).reshape(-1, 3)
+        self.m_origin = np.asarray(_origin, dtype=np.float64).reshape(3)
+        self.m_voxelSize = float(_voxelSize)
+
+    @staticmethod
+    def indexType(_dims):
+        '''Find the smallest unsigned integer type which holds every index of a grid.
+
+        Args:
+            _dims: The number of voxels along each axis
+
+        Returns:
+            numpy.dtype: Either uint16 or uint32
+        '''
+
+        # A count of voxels along an axis must also fit, see VoxelFile.findRuns
+        return np.dtype(np.uint16) if max(_dims) < 1 << 16 else np.dtype(np.uint32)
+
+    @classmethod
+    def fromPoints(cls, _points, _origin, _voxelSize, _dims):
+        '''Find the voxel indices of points on the grid.
+
+        Args:
+            _points: An (M, 3) array of sampled positions
+            _origin: The position of the voxel with index (0, 0, 0)
+            _voxelSize: The size of the voxels
+            _dims: The number of voxels along each axis
+
+        Returns:
+            VoxelPoints: The points
+
+        Raises:
+            ValueError: If a point is outside the grid or between grid positions
+        '''
+
+        origin = np.asarray(_origin, dtype=np.float64)
+        points = np.asarray(_points, dtype=np.float64).reshape(-1, 3)
+        scaled = (points - origin) / _voxelSize
+        indices = np.rint(scaled)
+        if len(indices) > 0 and (indices.min() < 0 or (indices >= np.asarray(_dims)).any()):
+            raise ValueError("The points are outside the grid")
+        # Sampled positions are origin + index * voxelSize, so dividing back only differs from the index by rounding
+        if len(indices) > 0 and np.abs(scaled - indices).max() > cls.m_tolerance:
+            raise ValueError("The points are not on the grid")
+        return cls(indices.astype(cls.indexType(_dims)), origin, _voxelSize)
+
+    def __len__(self):
+        return len(self.m_indices)
+
+    def points(self):
+        '''Find the position of every point.
+
+        Returns:
+            numpy.ndarray: An (M, 3) array of positions
+        '''
+
+        return self.m_origin + self.m_indices.astype(np.float64) * self.m_voxelSize
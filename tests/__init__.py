@@ -0,0 +1,10 @@
+'''Tests of the exporter which run without Maya.
+
+Run the tests from the repository folder with:
+    python -m pytest -q tests
+
+Importing the package puts the scripts folder and the benchmarks package on the path,
+and the stub maya package if Maya is not available, the same as the benchmarks.
+'''
+
+import benchmarks
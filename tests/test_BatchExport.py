@@ -0,0 +1,71 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import BatchExport
+import CapsuleFile
+import PLYFile
+import SDFExporter
+
+
+class BatchExportTest(unittest.TestCase):
+    '''Export small capsule files from the command line.'''
+
+    # Fewer capsules than values in a capsule, which used to be rejected as an empty rig
+    m_capsules = [[0.0, 0.0, 0.0, 1.0, 2.0, 0.0, 0.0, 0.7], [2.0, 0.0, 0.0, 0.7, 2.0, 2.0, 0.0, 0.5]]
+
+    def setUp(self):
+        '''Create a folder with a capsule file in each format.'''
+
+        self.m_folder = tempfile.mkdtemp()
+        self.m_outputDir = os.path.join(self.m_folder, "clouds")
+        self.m_inputs = []
+        for name, binary in (("small", True), ("other", False)):
+            inputPath = os.path.join(self.m_folder, name + CapsuleFile.CapsuleFile().extension(binary))
+            CapsuleFile.CapsuleFile().write(inputPath, self.m_capsules, binary)
+            self.m_inputs.append(inputPath)
+
+    def tearDown(self):
+        '''Remove the files.'''
+
+        shutil.rmtree(self.m_folder)
+
+    def batchExport(self, *_arguments):
+        '''Run BatchExport without printing.
+
+        Returns:
+            int, str: The exit code and the output
+        '''
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            code = BatchExport.main(list(_arguments))
+        return code, output.getvalue()
+
+    def testSmallFiles(self):
+        '''Files with only a few capsules are exported, the same as exporting the capsules directly.'''
+
+        code, output = self.batchExport(*(self.m_inputs + ["--output-dir", self.m_outputDir, "--voxel-size", "0.1", "--jobs", "1", "--ascii"]))
+        self.assertEqual(code, 0, output)
+        self.assertIn("Exported 2 of 2 files", output)
+        filePath = os.path.join(self.m_folder, "expected")
+        SDFExporter.SDFExporter().exportCapsules(filePath, sum(self.m_capsules, []), 0.1, 4.0, _binary=False)
+        expected = PLYFile.PLYFile().read(filePath + ".ply")
+        self.assertGreater(len(expected), 0)
+        for name in ("small", "other"):
+            points = PLYFile.PLYFile().read(os.path.join(self.m_outputDir, name + ".ply"))
+            self.assertEqual(points.tolist(), expected.tolist(), name)
+
+    def testFailed(self):
+        '''A file which can not be read fails without stopping the other files.'''
+
+        brokenPath = os.path.join(self.m_folder, "broken.json")
+        with open(brokenPath, "w") as outputFile:
+            outputFile.write("[1, 2, 3]")
+        code, output = self.batchExport(brokenPath, self.m_inputs[0], "--output-dir", self.m_outputDir, "--jobs", "1")
+        self.assertEqual(code, 1)
+        self.assertIn("broken.json: failed", output)
+        self.assertIn("Exported 1 of 2 files", output)
+        self.assertTrue(os.path.exists(os.path.join(self.m_outputDir, "small.ply")))
@@ -0,0 +1,62 @@
+import json
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+import numpy as np
+import CapsuleFile
+from benchmarks import RigGenerator
+
+
+class CapsuleFileTest(unittest.TestCase):
+    '''Write capsule files and read them back in both formats.'''
+
+    def setUp(self):
+        '''Create a folder for the files.'''
+
+        self.m_folder = tempfile.mkdtemp()
+        self.m_sdCapsuleData = RigGenerator.RigGenerator(0).generate("tree", 10)
+
+    def tearDown(self):
+        '''Remove the files.'''
+
+        shutil.rmtree(self.m_folder)
+
+    def testRoundTrip(self):
+        '''The capsules are read back exactly as rows of 8 values, in both formats.'''
+
+        capsuleFile = CapsuleFile.CapsuleFile()
+        expected = np.asarray(self.m_sdCapsuleData, dtype=np.float64).reshape(-1, 8)
+        for binary in (True, False):
+            for capsules in (self.m_sdCapsuleData, expected, expected[:2], expected[:0]):
+                filePath = os.path.join(self.m_folder, "rig" + capsuleFile.extension(binary))
+                capsuleFile.write(filePath, capsules, binary)
+                values = capsuleFile.read(filePath)
+                self.assertEqual(values.dtype, np.float64)
+                self.assertEqual(values.shape, (len(capsules) // 8 if isinstance(capsules, list) else len(capsules), 8))
+                np.testing.assert_array_equal(values, np.asarray(capsules, dtype=np.float64).reshape(-1, 8))
+
+    def testJsonLists(self):
+        '''A json file can also be a list of capsules or a flat list of values.'''
+
+        expected = np.asarray(self.m_sdCapsuleData, dtype=np.float64).reshape(-1, 8)
+        filePath = os.path.join(self.m_folder, "rig.json")
+        for data in (expected.tolist(), expected.ravel().tolist()):
+            with open(filePath, "w") as outputFile:
+                json.dump(data, outputFile)
+            np.testing.assert_array_equal(CapsuleFile.CapsuleFile().read(filePath), expected)
+
+    def testInvalid(self):
+        '''Files with a partial capsule or an unknown version are not read.'''
+
+        filePath = os.path.join(self.m_folder, "rig.json")
+        with open(filePath, "w") as outputFile:
+            json.dump(list(range(12)), outputFile)
+        with self.assertRaises(IOError):
+            CapsuleFile.CapsuleFile().read(filePath)
+        filePath = os.path.join(self.m_folder, "rig.caps")
+        with open(filePath, "wb") as outputFile:
+            outputFile.write(struct.pack(CapsuleFile.CapsuleFile.m_headerFormat, CapsuleFile.CapsuleFile.m_magic, 99, 0))
+        with self.assertRaises(IOError):
+            CapsuleFile.CapsuleFile().read(filePath)
@@ -0,0 +1,58 @@
+import math
+import unittest
+import numpy as np
+import DrawCache
+from benchmarks import DrawBenchmark
+
+
+class DrawCacheTest(unittest.TestCase):
+    '''Compare the bounding box of a segment with the spheres drawn along it.'''
+
+    def extents(self, _cache):
+        '''Find the min and max corners of the box around the spheres of the last update.'''
+
+        centres = np.asarray(_cache.m_centres)
+        radii = np.asarray(_cache.m_radii)[:, np.newaxis]
+        return (centres - radii).min(axis=0), (centres + radii).max(axis=0)
+
+    def testBounds(self):
+        '''The box is the extent of the spheres drawn, whatever the number of spheres.'''
+
+        for position, parentPosition, scale, parentRadius in DrawBenchmark.makeSegments(50):
+            length = math.sqrt(sum((p - q) ** 2 for p, q in zip(position, parentPosition)))
+            cache = DrawCache.DrawCache()
+            bounds = cache.bounds(position, parentPosition, scale, parentRadius)
+            self.assertEqual(len(cache.m_centres), cache.sphereCount(length))
+            lo, hi = self.extents(cache)
+            np.testing.assert_allclose(bounds[0], lo, rtol=0, atol=1e-9)
+            np.testing.assert_allclose(bounds[1], hi, rtol=0, atol=1e-9)
+            for pixelLength in (0.0, 10.0, 100.0):
+                cache.update(position, parentPosition, scale, parentRadius, cache.sphereCount(length, pixelLength))
+                self.assertEqual(cache.bounds(position, parentPosition, scale, parentRadius), cache.m_bounds)
+                lo, hi = self.extents(cache)
+                np.testing.assert_allclose(cache.m_bounds[0], lo, rtol=0, atol=1e-9)
+                np.testing.assert_allclose(cache.m_bounds[1], hi, rtol=0, atol=1e-9)
+                # The spheres at both ends are always drawn, so the box is the same as with every sphere
+                np.testing.assert_allclose(cache.m_bounds[0], bounds[0], rtol=0, atol=1e-9)
+                np.testing.assert_allclose(cache.m_bounds[1], bounds[1], rtol=0, atol=1e-9)
+
+    def testMoved(self):
+        '''The box is found again when the segment moves.'''
+
+        cache = DrawCache.DrawCache()
+        cache.bounds((0.0, 0.0, 0.0), (4.0, 0.0, 0.0), (1.0, 1.0, 1.0), 2.0)
+        self.assertEqual(cache.m_updates, 1)
+        cache.bounds((0.0, 0.0, 0.0), (4.0, 0.0, 0.0), (1.0, 1.0, 1.0), 2.0)
+        self.assertEqual(cache.m_updates, 1)
+        bounds = cache.bounds((0.0, 0.0, 0.0), (0.0, 6.0, 0.0), (1.0, 1.0, 1.0), 2.0)
+        self.assertEqual(cache.m_updates, 2)
+        np.testing.assert_allclose(bounds[0], (-2.0, -1.0, -2.0), rtol=0, atol=1e-9)
+        np.testing.assert_allclose(bounds[1], (2.0, 8.0, 2.0), rtol=0, atol=1e-9)
+
+    def testNoParent(self):
+        '''An NSphere at the same position as its parent is one sphere.'''
+
+        cache = DrawCache.DrawCache()
+        bounds = cache.bounds((1.0, 2.0, 3.0), (1.0, 2.0, 3.0), (2.0, 2.0, 2.0), 2.0)
+        self.assertEqual(len(cache.m_centres), 1)
+        self.assertEqual(bounds, ((-1.0, -1.0, -1.0), (1.0, 1.0, 1.0)))
@@ -0,0 +1,122 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import IncrementalSampler
+import SDFExporter
+import SDFSampler
+from benchmarks import RigGenerator
+
+
+class IncrementalSamplerTest(unittest.TestCase):
+    '''Edit random rigs and check the updated grid is the same as sampling it again from scratch.'''
+
+    m_voxelSize = 0.2
+    m_smoothness = 16.0
+
+    def setUp(self):
+        '''Create a random chain rig.'''
+
+        self.m_random = np.random.RandomState(0)
+        self.m_capsules = np.asarray(RigGenerator.RigGenerator(3).generate("chain", 20), dtype=np.float64).reshape(-1, 8)
+
+    def boundingBox(self):
+        '''Find the bounding box of the current capsules, as an export does.'''
+
+        return SDFExporter.SDFExporter().findBoundingBox(self.m_capsules.ravel(), self.m_voxelSize)
+
+    def moveSphere(self):
+        '''Move and resize a random NSphere, changing every capsule it is an end of.'''
+
+        sphere = self.m_capsules[self.m_random.randint(len(self.m_capsules)), 4:8].copy()
+        moved = sphere + np.append(self.m_random.uniform(-0.4, 0.4, 3), self.m_random.uniform(-0.1, 0.1))
+        for columns in (slice(0, 4), slice(4, 8)):
+            ends = (self.m_capsules[:, columns] == sphere).all(axis=1)
+            self.m_capsules[ends, columns] = moved
+
+    def check(self, _sampler):
+        '''Check the grid of the sampler is the same as a new grid, and has the same points as the whole grid sampled with every capsule.'''
+
+        boundingBox = self.boundingBox()
+        full = IncrementalSampler.IncrementalSampler()
+        full.update(self.m_capsules.ravel(), self.m_smoothness, self.m_voxelSize, boundingBox)
+        np.testing.assert_array_equal(_sampler.values(), full.values())
+        expected = SDFSampler.SDFSampler(self.m_capsules.ravel(), self.m_smoothness).sampleSD(self.m_voxelSize, boundingBox)
+        np.testing.assert_array_equal(_sampler.sampleSD(self.m_voxelSize, boundingBox), expected)
+
+    def update(self, _sampler):
+        '''Update the sampler with the current capsules.
+
+        Returns:
+            int: The number of voxels sampled
+        '''
+
+        return _sampler.update(self.m_capsules.ravel(), self.m_smoothness, self.m_voxelSize, self.boundingBox())
+
+    def testMoves(self):
+        '''Only the blocks near a moved NSphere are sampled again, and the grid is the same as sampling it again.'''
+
+        sampler = IncrementalSampler.IncrementalSampler()
+        total = self.update(sampler)
+        self.assertEqual(total, sampler.m_values.size)
+        for _ in range(5):
+            self.moveSphere()
+            sampled = self.update(sampler)
+            self.assertGreater(sampled, 0)
+            self.assertLess(sampled, total)
+            self.check(sampler)
+        # Nothing is sampled if nothing moved
+        self.assertEqual(self.update(sampler), 0)
+
+    def testAddRemove(self):
+        '''Adding or removing a capsule samples the whole grid.'''
+
+        sampler = IncrementalSampler.IncrementalSampler()
+        self.update(sampler)
+        child = self.m_capsules[-1, 4:8] + np.array([0.5, 0.5, 0.0, 0.0])
+        self.m_capsules = np.vstack((self.m_capsules, np.append(self.m_capsules[-1, 4:8], child)))
+        self.assertEqual(self.update(sampler), sampler.m_values.size)
+        self.check(sampler)
+        self.m_capsules = np.delete(self.m_capsules, 2, axis=0)
+        self.assertEqual(self.update(sampler), sampler.m_values.size)
+        self.check(sampler)
+        self.moveSphere()
+        self.assertLess(self.update(sampler), sampler.m_values.size)
+        self.check(sampler)
+
+    def testExtremity(self):
+        '''Moving the NSphere at the edge of the rig changes the bounding box of an export, but only samples the blocks near it.'''
+
+        folder = tempfile.mkdtemp()
+        try:
+            exporter = SDFExporter.SDFExporter()
+            filePath = os.path.join(folder, "rig")
+            total = exporter.exportCapsules(filePath, self.m_capsules, self.m_voxelSize, self.m_smoothness, _incremental=True)
+            self.assertEqual(total, exporter.m_incremental.m_values.size)
+            # The end of the capsules furthest along x
+            row, column = np.unravel_index(np.argmax(self.m_capsules[:, [0, 4]] + self.m_capsules[:, [3, 7]]), (len(self.m_capsules), 2))
+            sphere = self.m_capsules[row, 4 * column:4 * column + 4].copy()
+            for offset in (0.5, 0.3, 5.0):
+                before = exporter.findBoundingBox(self.m_capsules, self.m_voxelSize)
+                moved = sphere + np.array([offset, 0.0, 0.0, 0.0])
+                for columns in (slice(0, 4), slice(4, 8)):
+                    self.m_capsules[(self.m_capsules[:, columns] == sphere).all(axis=1), columns] = moved
+                sphere = moved
+                boundingBox = exporter.findBoundingBox(self.m_capsules, self.m_voxelSize)
+                self.assertNotEqual(boundingBox, before)
+                sampled = exporter.exportCapsules(filePath, self.m_capsules, self.m_voxelSize, self.m_smoothness, _incremental=True)
+                if offset < 1.0:
+                    # The box still fits in the padded grid
+                    self.assertLess(sampled, exporter.m_incremental.m_values.size // 2)
+                else:
+                    self.assertEqual(sampled, exporter.m_incremental.m_values.size)
+                # The file is the same as the first incremental export of the edited rig, and has the points of the whole grid
+                expectedPath = os.path.join(folder, "expected")
+                SDFExporter.SDFExporter().exportCapsules(expectedPath, self.m_capsules, self.m_voxelSize, self.m_smoothness, _incremental=True)
+                with open(filePath + ".ply", "rb") as inputFile, open(expectedPath + ".ply", "rb") as expectedFile:
+                    self.assertEqual(inputFile.read(), expectedFile.read(), offset)
+                expected = SDFSampler.SDFSampler(self.m_capsules.ravel(), self.m_smoothness).sampleSD(self.m_voxelSize, boundingBox)
+                np.testing.assert_array_equal(exporter.m_incremental.sampleSD(self.m_voxelSize, boundingBox), expected)
+        finally:
+            shutil.rmtree(folder)
@@ -0,0 +1,94 @@
+import unittest
+import numpy as np
+import MirrorSampler
+import SDFExporter
+from benchmarks import RigGenerator
+
+
+class MirrorSamplerTest(unittest.TestCase):
+    '''Compare sampling half of a grid and mirroring it with sampling the whole grid.'''
+
+    m_voxelSize = 0.1
+    m_smoothness = 4.0
+
+    def mirroredRig(self, _axis):
+        '''Generate a rig mirrored across the plane through the origin perpendicular to an axis.
+
+        Returns:
+            numpy.ndarray: The sdCapsule data
+        '''
+
+        capsules = np.asarray(RigGenerator.RigGenerator(2).generate("mirrored", 12), dtype=np.float64).reshape(-1, 8)
+        # The generated rig is mirrored across x, swap x with the axis
+        order = list(range(8))
+        order[0], order[_axis] = order[_axis], order[0]
+        order[4], order[_axis + 4] = order[_axis + 4], order[4]
+        return capsules[:, order].ravel()
+
+    def compare(self, _sdCapsuleData, _boundingBox, _plane, _mirrored=True):
+        '''Sample a grid with and without the mirror sampler and check the points and values are the same.
+
+        Args:
+            _sdCapsuleData: The sdCapsule data
+            _boundingBox: The bounding box of the grid
+            _plane: The (axis, offset) of the mirror plane
+            _mirrored: If the grid is mirrored by the plane, otherwise the mirror sampler samples the whole grid
+        '''
+
+        exporter = SDFExporter.SDFExporter()
+        for adaptive in (False, True):
+            full = exporter.createSampler(_sdCapsuleData, self.m_smoothness, adaptive)
+            mirror = MirrorSampler.MirrorSampler(exporter.createSampler(_sdCapsuleData, self.m_smoothness, adaptive), _plane)
+            expected = full.sampleSD(self.m_voxelSize, _boundingBox)
+            self.assertGreater(len(expected), 0)
+            np.testing.assert_array_equal(mirror.sampleSD(self.m_voxelSize, _boundingBox), expected)
+            if _mirrored:
+                self.assertGreater(mirror.m_positionsMirrored, 0)
+            else:
+                self.assertEqual(mirror.m_positionsMirrored, 0)
+            xs, ys, zs = full.axes(self.m_voxelSize, _boundingBox)
+            band = 3 * self.m_voxelSize
+            values = np.concatenate(list(mirror.iterateValues(xs, ys, zs, 8, band)))
+            np.testing.assert_allclose(values, np.concatenate(list(full.iterateValues(xs, ys, zs, 8, band))), rtol=0, atol=1e-5)
+
+    def testSymmetric(self):
+        '''The plane of a rig mirrored across each axis is found, and mirroring gives the same points and values.'''
+
+        for axis in range(3):
+            sdCapsuleData = self.mirroredRig(axis)
+            plane = MirrorSampler.MirrorSampler.findPlane(sdCapsuleData)
+            self.assertEqual(plane[0], axis)
+            self.assertAlmostEqual(plane[1], 0.0)
+            bbox = SDFExporter.SDFExporter().findBoundingBox(sdCapsuleData, self.m_voxelSize)
+            self.compare(sdCapsuleData, bbox, plane)
+            # The grid extends further on one side of the plane, so the positions past the mirror of the first position are sampled
+            lo = list(bbox[0])
+            lo[axis] -= 5 * self.m_voxelSize
+            self.compare(sdCapsuleData, (tuple(lo), bbox[1]), plane)
+
+    def testNotSymmetric(self):
+        '''A rig which is not mirrored has no plane and is sampled with the whole grid.'''
+
+        sdCapsuleData = RigGenerator.RigGenerator(2).generate("tree", 12)
+        self.assertIsNone(MirrorSampler.MirrorSampler.findPlane(sdCapsuleData))
+        self.assertIsNone(MirrorSampler.MirrorSampler.findPlane(self.mirroredRig(0), (1, 0.0)))
+        sampler = SDFExporter.SDFExporter().createSampler(sdCapsuleData, self.m_smoothness, _mirror="auto")
+        self.assertNotIsInstance(sampler, MirrorSampler.MirrorSampler)
+        # Moving one capsule of a mirrored rig breaks the symmetry
+        capsules = self.mirroredRig(0).reshape(-1, 8)
+        capsules[0, 4:7] += 0.5
+        self.assertIsNone(MirrorSampler.MirrorSampler.findPlane(capsules.ravel()))
+
+    def testGridNotMirrored(self):
+        '''A grid whose positions are not mirrored onto each other by the plane is sampled whole.'''
+
+        sdCapsuleData = self.mirroredRig(1)
+        plane = MirrorSampler.MirrorSampler.findPlane(sdCapsuleData)
+        lo, hi = SDFExporter.SDFExporter().findBoundingBox(sdCapsuleData, self.m_voxelSize)
+        # Shift the grid by a third of a voxel along the mirror axis
+        shift = np.array([0.0, self.m_voxelSize / 3.0, 0.0])
+        bbox = (tuple(np.asarray(lo) - shift), tuple(np.asarray(hi) - shift))
+        self.assertIsNone(MirrorSampler.MirrorSampler(None, plane).mirrorIndices(SDFExporter.SDFSampler.SDFSampler(sdCapsuleData, 4.0).axes(self.m_voxelSize, bbox)[1]))
+        self.compare(sdCapsuleData, bbox, plane, False)
+        # A plane past the end of the grid mirrors no positions
+        self.compare(sdCapsuleData, (lo, hi), (1, hi[1] + 1.0), False)
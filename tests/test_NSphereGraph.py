@@ -0,0 +1,151 @@
+import unittest
+import numpy as np
+import NSphereGraph
+from benchmarks import MockOpenMaya
+
+
+class NSphereGraphTest(unittest.TestCase):
+    '''Read a mock scene of NSpheres and check only the NSpheres that moved are read again.'''
+
+    def setUp(self):
+        '''Create a chain of four NSpheres with a branch.'''
+
+        self.m_om = NSphereGraph.om
+        NSphereGraph.om = MockOpenMaya
+        self.m_scene = MockOpenMaya.Scene()
+        self.m_root = self.m_scene.createNSphere((0, 0, 0), 1.0)
+        self.m_a = self.m_scene.createNSphere((2, 0, 0), 0.8, self.m_root)
+        self.m_b = self.m_scene.createNSphere((4, 0, 0), 0.6, self.m_a)
+        self.m_c = self.m_scene.createNSphere((2, 2, 0), 0.5, self.m_a)
+        self.m_graph = NSphereGraph.NSphereGraph()
+
+    def tearDown(self):
+        '''Restore OpenMaya.'''
+
+        self.m_graph.clear()
+        NSphereGraph.om = self.m_om
+
+    def capsules(self, _capsules):
+        '''Sort the capsules so they can be compared whatever order the NSpheres were found in.'''
+
+        return _capsules[np.lexsort(_capsules.T[::-1])]
+
+    def expected(self, *_pairs):
+        '''Find the capsules of pairs of (parent, child) NSpheres.'''
+
+        rows = []
+        for parent, child in _pairs:
+            row = []
+            for node in (parent, child):
+                translation, scale = self.m_scene.worldMatrix(node)
+                row += list(translation) + [max(scale)]
+            rows.append(row)
+        return self.capsules(np.array(rows, dtype=np.float64))
+
+    def testReadOnce(self):
+        '''Each NSphere is read once, and not again until it moves.'''
+
+        capsules = self.m_graph.findLineSegments(self.m_root)
+        np.testing.assert_array_equal(self.capsules(capsules), self.expected((self.m_root, self.m_a), (self.m_a, self.m_b), (self.m_a, self.m_c)))
+        self.assertEqual(self.m_graph.m_reads, 4)
+        self.assertEqual(self.m_scene.callbackCount(), 4)
+        self.m_graph.findLineSegments(self.m_root)
+        self.assertEqual(self.m_graph.m_reads, 0)
+        # Starting from another NSphere finds the same NSpheres
+        self.m_graph.findLineSegments(self.m_b)
+        self.assertEqual(self.m_graph.m_reads, 0)
+
+    def testDirty(self):
+        '''Moving an NSphere marks only it to be read again.'''
+
+        self.m_graph.findLineSegments(self.m_root)
+        self.m_scene.move(self.m_b, (5, 1, 0), 0.7)
+        self.assertEqual(self.m_graph.m_dirty, set([self.m_b.m_hashCode]))
+        capsules = self.m_graph.findLineSegments(self.m_root)
+        self.assertEqual(self.m_graph.m_reads, 1)
+        self.assertEqual(self.m_graph.m_dirty, set())
+        np.testing.assert_array_equal(self.capsules(capsules), self.expected((self.m_root, self.m_a), (self.m_a, self.m_b), (self.m_a, self.m_c)))
+        # Moving an NSphere twice only reads it once
+        self.m_scene.move(self.m_root, (0, 0, 1))
+        self.m_scene.move(self.m_root, (0, 0, 2))
+        self.m_graph.findLineSegments(self.m_root)
+        self.assertEqual(self.m_graph.m_reads, 1)
+        self.assertEqual(self.m_graph.m_data[self.m_root.m_hashCode], (0.0, 0.0, 2.0, 1.0))
+
+    def testDisconnect(self):
+        '''NSpheres which are no longer connected are removed with their callbacks, and read again if they are connected again.'''
+
+        self.m_graph.findLineSegments(self.m_root)
+        self.m_scene.disconnect(self.m_c)
+        capsules = self.m_graph.findLineSegments(self.m_root)
+        self.assertEqual(self.m_graph.m_reads, 0)
+        np.testing.assert_array_equal(self.capsules(capsules), self.expected((self.m_root, self.m_a), (self.m_a, self.m_b)))
+        self.assertNotIn(self.m_c.m_hashCode, self.m_graph.m_data)
+        self.assertEqual(self.m_scene.callbackCount(), 3)
+        self.m_scene.connect(self.m_b, self.m_c)
+        capsules = self.m_graph.findLineSegments(self.m_root)
+        self.assertEqual(self.m_graph.m_reads, 1)
+        np.testing.assert_array_equal(self.capsules(capsules), self.expected((self.m_root, self.m_a), (self.m_a, self.m_b), (self.m_b, self.m_c)))
+
+    def testDeleted(self):
+        '''A deleted NSphere is removed by the node removed callback, so a new node given its hash code is read.'''
+
+        self.m_graph.findLineSegments(self.m_root)
+        self.m_scene.delete(self.m_c)
+        self.assertNotIn(self.m_c.m_hashCode, self.m_graph.m_data)
+        self.assertEqual(self.m_scene.callbackCount(), 3)
+        d = self.m_scene.createNSphere((6, 0, 0), 0.4, self.m_b, self.m_c.m_hashCode)
+        capsules = self.m_graph.findLineSegments(self.m_root)
+        self.assertEqual(self.m_graph.m_reads, 1)
+        np.testing.assert_array_equal(self.capsules(capsules), self.expected((self.m_root, self.m_a), (self.m_a, self.m_b), (self.m_b, d)))
+
+    def testReusedHashCode(self):
+        '''The cached data of a deleted NSphere is not used for a new node given its hash code, even if the callback was missed.'''
+
+        self.m_graph.findLineSegments(self.m_root)
+        self.m_scene.delete(self.m_c, False)
+        d = self.m_scene.createNSphere((6, 0, 0), 0.4, self.m_b, self.m_c.m_hashCode)
+        capsules = self.m_graph.findLineSegments(self.m_root)
+        self.assertEqual(self.m_graph.m_reads, 1)
+        np.testing.assert_array_equal(self.capsules(capsules), self.expected((self.m_root, self.m_a), (self.m_a, self.m_b), (self.m_b, d)))
+        # The callback on the transform of the deleted NSphere is replaced by one on the new transform
+        self.assertEqual(self.m_scene.callbackCount(), 4)
+        self.m_scene.move(d, (7, 0, 0))
+        self.assertEqual(self.m_graph.m_dirty, set([d.m_hashCode]))
+
+    def testClear(self):
+        '''Clearing removes every callback and reads every NSphere again.'''
+
+        self.m_graph.findLineSegments(self.m_root)
+        self.m_graph.clear()
+        self.assertEqual(self.m_scene.callbackCount(), 0)
+        self.assertEqual(len(MockOpenMaya.m_nodeRemovedCallbacks), 0)
+        self.m_graph.findLineSegments(self.m_root)
+        self.assertEqual(self.m_graph.m_reads, 4)
+
+    def testGroup(self):
+        '''Moving or scaling a group marks every NSphere below it to be read again at its new world position.'''
+
+        self.m_graph.clear()
+        outer = self.m_scene.createGroup((1, 0, 0), 2.0)
+        inner = self.m_scene.createGroup((0, 1, 0), 1.0, outer)
+        root = self.m_scene.createNSphere((0, 0, 0), 1.0, _group=outer)
+        a = self.m_scene.createNSphere((1, 0, 0), 0.5, root, _group=inner)
+        b = self.m_scene.createNSphere((2, 0, 0), 0.25, a, _group=inner)
+        capsules = self.m_graph.findLineSegments(root)
+        pairs = ((root, a), (a, b))
+        np.testing.assert_array_equal(self.capsules(capsules), self.expected(*pairs))
+        # The positions and radii are in world space
+        self.assertEqual(self.m_graph.m_data[a.m_hashCode], (3.0, 2.0, 0.0, 1.0))
+        self.m_scene.move(inner, (0, 0, 3))
+        self.assertEqual(self.m_graph.m_dirty, set([a.m_hashCode, b.m_hashCode]))
+        capsules = self.m_graph.findLineSegments(root)
+        self.assertEqual(self.m_graph.m_reads, 2)
+        np.testing.assert_array_equal(self.capsules(capsules), self.expected(*pairs))
+        self.assertEqual(self.m_graph.m_data[a.m_hashCode], (3.0, 0.0, 6.0, 1.0))
+        self.m_scene.move(outer, (0, 0, 0), 0.5)
+        self.assertEqual(self.m_graph.m_dirty, set([root.m_hashCode, a.m_hashCode, b.m_hashCode]))
+        capsules = self.m_graph.findLineSegments(root)
+        self.assertEqual(self.m_graph.m_reads, 3)
+        np.testing.assert_array_equal(self.capsules(capsules), self.expected(*pairs))
+        self.assertEqual(self.m_graph.m_data[b.m_hashCode], (1.0, 0.0, 1.5, 0.125))
@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import PLYFile
+
+
+class PLYFileTest(unittest.TestCase):
+    '''Write .ply files and read them back in both formats.'''
+
+    def setUp(self):
+        '''Create a folder for the files and random points.'''
+
+        self.m_folder = tempfile.mkdtemp()
+        self.m_points = np.random.RandomState(0).uniform(-10.0, 10.0, (1000, 3))
+        self.m_file = PLYFile.PLYFile()
+
+    def tearDown(self):
+        '''Remove the files.'''
+
+        shutil.rmtree(self.m_folder)
+
+    def path(self, _name):
+        '''Find the path of a file in the folder.'''
+
+        return os.path.join(self.m_folder, _name)
+
+    def vertexCount(self, _filePath):
+        '''Find the vertex count in the header of a file.'''
+
+        with open(_filePath, "rb") as inputFile:
+            for line in inputFile:
+                if line.startswith(b"element vertex "):
+                    return line.split()[2]
+        return None
+
+    def testWriteRead(self):
+        '''The points are read back as float32.'''
+
+        for binary in (True, False):
+            filePath = self.path("write.ply")
+            self.m_file.write(filePath, self.m_points, binary)
+            points = self.m_file.read(filePath)
+            self.assertEqual(points.dtype, np.float32)
+            np.testing.assert_array_equal(points, self.m_points.astype(np.float32))
+            self.assertEqual(self.vertexCount(filePath), b"1000")
+
+    def testWriteStreamRead(self):
+        '''Blocks of points are read back in order, and the placeholder vertex count is patched.'''
+
+        blocks = [self.m_points[0:10], self.m_points[10:10], self.m_points[10:600], self.m_points[600:]]
+        for binary in (True, False):
+            filePath = self.path("stream.ply")
+            count = self.m_file.writeStream(filePath, iter(blocks), binary)
+            self.assertEqual(count, len(self.m_points))
+            self.assertEqual(self.vertexCount(filePath), b"1000".zfill(PLYFile.PLYFile.m_countDigits))
+            np.testing.assert_array_equal(self.m_file.read(filePath), self.m_points.astype(np.float32))
+
+    def testWriteStreamEmpty(self):
+        '''A stream without points is a valid file without vertices.'''
+
+        for binary in (True, False):
+            filePath = self.path("empty.ply")
+            self.assertEqual(self.m_file.writeStream(filePath, [], binary), 0)
+            self.assertEqual(self.m_file.read(filePath).shape, (0, 3))
+
+    def testNormals(self):
+        '''Points with normals are read back with their normals.'''
+
+        normals = self.m_points / np.linalg.norm(self.m_points, axis=1)[:, np.newaxis]
+        for binary in (True, False):
+            filePath = self.path("normals.ply")
+            self.m_file.writeStream(filePath, [np.hstack((self.m_points, normals))], binary, True)
+            np.testing.assert_array_equal(self.m_file.read(filePath), self.m_points.astype(np.float32))
+            np.testing.assert_array_equal(self.m_file.readNormals(filePath), normals.astype(np.float32))
+
+    def testMesh(self):
+        '''The vertices and triangles of a mesh are read back.'''
+
+        faces = np.random.RandomState(1).randint(0, len(self.m_points), (500, 3))
+        for binary in (True, False):
+            filePath = self.path("mesh.ply")
+            self.m_file.writeMesh(filePath, self.m_points, faces, binary)
+            vertices, readFaces = self.m_file.readMesh(filePath)
+            np.testing.assert_array_equal(vertices, self.m_points.astype(np.float32))
+            np.testing.assert_array_equal(readFaces, faces)
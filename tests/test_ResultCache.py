@@ -0,0 +1,111 @@
+import filecmp
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import ExportMonitor
+import ResultCache
+import SDFExporter
+from benchmarks import RigGenerator
+
+
+class ResultCacheTest(unittest.TestCase):
+    '''Store results in a cache folder and export from them.'''
+
+    def setUp(self):
+        '''Create a folder for the cache and the files.'''
+
+        self.m_folder = tempfile.mkdtemp()
+        self.m_cache = ResultCache.ResultCache(os.path.join(self.m_folder, "cache"))
+
+    def tearDown(self):
+        '''Remove the files.'''
+
+        shutil.rmtree(self.m_folder)
+
+    def testStore(self):
+        '''Results are read back with the types they are stored as.'''
+
+        for values, dtype in (
+                (np.arange(12, dtype=np.uint16).reshape(4, 3), np.uint16),
+                (np.arange(12, dtype=np.uint64).reshape(4, 3), np.float32),
+                (np.arange(24.0).reshape(2, 3, 4), np.float32),
+                (np.zeros((0, 3), dtype=np.uint32), np.uint32)):
+            key = self.m_cache.key([0.0] * 8, 0.1, 4.0, {"shape": list(values.shape), "type": str(values.dtype)})
+            self.m_cache.store(key, values)
+            loaded = self.m_cache.load(key)
+            self.assertEqual(loaded.dtype, dtype)
+            np.testing.assert_array_equal(loaded, values)
+
+    def testWriter(self):
+        '''A result written a block at a time is the blocks joined, and is only in the cache once it is committed.'''
+
+        blocks = [np.random.RandomState(i).uniform(-1.0, 1.0, (i, 5, 6)) for i in (3, 0, 8, 1)]
+        key = self.m_cache.key([0.0] * 8, 0.1, 4.0, {})
+        writer = self.m_cache.writer(key, np.float64, (5, 6))
+        for block in blocks:
+            writer.append(block)
+        self.assertIsNone(self.m_cache.load(key))
+        writer.commit()
+        np.testing.assert_array_equal(self.m_cache.load(key), np.concatenate(blocks).astype(np.float32))
+        self.assertEqual(os.listdir(self.m_cache.m_folderPath), [key + ResultCache.ResultCache.m_extension])
+        # An aborted result is not added and its temporary file is removed
+        otherKey = self.m_cache.key([1.0] * 8, 0.1, 4.0, {})
+        writer = self.m_cache.writer(otherKey, np.uint16, (3,))
+        writer.append(np.ones((4, 3), dtype=np.uint16))
+        writer.abort()
+        self.assertIsNone(self.m_cache.load(otherKey))
+        self.assertEqual(os.listdir(self.m_cache.m_folderPath), [key + ResultCache.ResultCache.m_extension])
+
+    def testExport(self):
+        '''Exporting from the cache writes the same file as sampling, for every output.'''
+
+        sdCapsuleData = RigGenerator.RigGenerator(1).generate("tree", 10)
+        for output, settings in (
+                ("points", {}),
+                ("points", {"_incremental": True}),
+                ("voxels", {}),
+                ("surface", {"_normals": True}),
+                ("mesh", {}),
+                ("sparse", {}),
+                ("dense", {})):
+            self.m_cache.clear()
+            exporter = SDFExporter.SDFExporter()
+            extension = exporter.extension(output)
+            paths = [os.path.join(self.m_folder, name) for name in ("sampled", "cached")]
+            for filePath in paths:
+                exporter.exportCapsules(filePath, sdCapsuleData, 0.1, 4.0, _output=output, _cache=self.m_cache, **settings)
+            self.assertEqual(exporter.m_monitor.report().get("cached"), 1, output)
+            self.assertTrue(filecmp.cmp(paths[0] + extension, paths[1] + extension, shallow=False), output)
+            self.assertEqual(len(os.listdir(self.m_cache.m_folderPath)), 1, output)
+            for filePath in paths:
+                os.remove(filePath + extension)
+
+    def testLevels(self):
+        '''Progressive exports are not cached, so every level is written each time.'''
+
+        sdCapsuleData = RigGenerator.RigGenerator(1).generate("tree", 10)
+        filePath = os.path.join(self.m_folder, "rig")
+        for _ in range(2):
+            exporter = SDFExporter.SDFExporter()
+            exporter.exportCapsules(filePath, sdCapsuleData, 0.1, 4.0, _cache=self.m_cache, _levels=3)
+            self.assertNotIn("cached", exporter.m_monitor.report())
+            self.assertEqual(sorted(os.listdir(self.m_folder)), ["rig.ply", "rig_lod1.ply", "rig_lod2.ply"])
+            for name in os.listdir(self.m_folder):
+                os.remove(os.path.join(self.m_folder, name))
+        # A result cached by a normal export is not used either
+        exporter.exportCapsules(filePath, sdCapsuleData, 0.1, 4.0, _cache=self.m_cache)
+        exporter.exportCapsules(filePath, sdCapsuleData, 0.1, 4.0, _cache=self.m_cache, _levels=3)
+        self.assertNotIn("cached", exporter.m_monitor.report())
+        self.assertEqual(sorted(os.listdir(self.m_folder)), ["cache", "rig.ply", "rig_lod1.ply", "rig_lod2.ply"])
+
+    def testCancel(self):
+        '''A cancelled export adds nothing to the cache.'''
+
+        monitor = ExportMonitor.ExportMonitor()
+        monitor.addListener(lambda _stage, _fraction: monitor.cancel())
+        exporter = SDFExporter.SDFExporter()
+        with self.assertRaises(ExportMonitor.ExportCancelled):
+            exporter.exportCapsules(os.path.join(self.m_folder, "rig"), RigGenerator.RigGenerator(1).generate("tree", 10), 0.1, 4.0, _monitor=monitor, _cache=self.m_cache)
+        self.assertEqual(os.listdir(self.m_cache.m_folderPath), [])
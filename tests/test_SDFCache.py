@@ -0,0 +1,70 @@
+import gc
+import unittest
+import weakref
+import numpy as np
+import SDFCache
+import SDFExporter
+
+
+class SDFCacheTest(unittest.TestCase):
+    '''Find the points of the NSpheres connected to an NSphereSDF node outside of Maya.'''
+
+    # The spheres are connected in the order of the inNSpheres attribute, the leaf first
+    m_spheres = [(3.0, 0.0, 0.0, 0.5), (1.5, 0.0, 0.0, 0.7), (0.0, 0.0, 0.0, 1.5)]
+    m_parents = [1, 2, -1]
+
+    def testFindLineSegments(self):
+        '''Each NSphere with a parent is a capsule from its parent.'''
+
+        cache = SDFCache.SDFCache()
+        sdCapsuleData = cache.findLineSegments(self.m_spheres, self.m_parents)
+        self.assertEqual(sdCapsuleData, [1.5, 0.0, 0.0, 0.7, 3.0, 0.0, 0.0, 0.5, 0.0, 0.0, 0.0, 1.5, 1.5, 0.0, 0.0, 0.7])
+        self.assertEqual(cache.findLineSegments(self.m_spheres, [-1, -1, -1]), [])
+
+    def testPoints(self):
+        '''The points are those of a full export whatever order the NSpheres are connected in, and are only sampled again when something changes.'''
+
+        cache = SDFCache.SDFCache()
+        sdCapsuleData = cache.findLineSegments(self.m_spheres, self.m_parents)
+        points = cache.points(sdCapsuleData, 4.0, 0.1)
+        exporter = SDFExporter.SDFExporter()
+        # Sample the capsules with the root first, so the bounding box does not depend on finding the root
+        rootFirst = sdCapsuleData[8:16] + sdCapsuleData[0:8]
+        expected = exporter.sampleSD(rootFirst, 0.1, 4.0, exporter.findBoundingBox(rootFirst, 0.1))
+        self.assertEqual(len(points), len(expected))
+        np.testing.assert_allclose(points, expected, rtol=0, atol=1e-9)
+        # The root sphere is inside
+        self.assertTrue(np.any(points[:, 0] < -1.0))
+        self.assertEqual(cache.m_updates, 1)
+        self.assertIs(cache.points(sdCapsuleData, 4.0, 0.1), points)
+        self.assertEqual(cache.m_updates, 1)
+        moved = list(self.m_spheres)
+        moved[0] = (3.0, 0.5, 0.0, 0.5)
+        cache.points(cache.findLineSegments(moved, self.m_parents), 4.0, 0.1)
+        self.assertEqual(cache.m_updates, 2)
+        self.assertEqual(len(cache.points(sdCapsuleData, 4.0, 0.1)), len(expected))
+
+    def testUnregister(self):
+        '''The cache of a deleted node is freed, and a new node given the same key only finds its own cache.'''
+
+        caches = dict(SDFCache.SDFCache.m_caches)
+        try:
+            cache = SDFCache.SDFCache()
+            cache.register(1234)
+            cache.points(cache.findLineSegments(self.m_spheres, self.m_parents), 4.0, 0.1)
+            self.assertIs(SDFCache.SDFCache.m_caches.get(1234), cache)
+            reference = weakref.ref(cache)
+            del cache
+            SDFCache.SDFCache.unregister(1234)
+            gc.collect()
+            self.assertIsNone(reference())
+            self.assertNotIn(1234, SDFCache.SDFCache.m_caches)
+            # Unregistering again, or a key that was never registered, does nothing
+            SDFCache.SDFCache.unregister(1234)
+            newCache = SDFCache.SDFCache()
+            newCache.register(1234)
+            self.assertIs(SDFCache.SDFCache.m_caches.get(1234), newCache)
+            self.assertEqual(len(newCache.m_points), 0)
+        finally:
+            SDFCache.SDFCache.m_caches.clear()
+            SDFCache.SDFCache.m_caches.update(caches)
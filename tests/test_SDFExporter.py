@@ -0,0 +1,191 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import ExportMonitor
+import SDFExporter
+from benchmarks import RigGenerator
+
+
+class BoundingBoxTest(unittest.TestCase):
+    '''Find the bounding box of capsules in any order.'''
+
+    def testShuffled(self):
+        '''The bounding box contains every NSphere and does not depend on the order of the capsules or of their ends.'''
+
+        exporter = SDFExporter.SDFExporter()
+        random = np.random.RandomState(0)
+        for seed, shape in enumerate(RigGenerator.RigGenerator.m_shapes):
+            capsules = np.asarray(RigGenerator.RigGenerator(seed).generate(shape, 30), dtype=np.float64).reshape(-1, 8)
+            spheres = np.vstack((capsules[:, 0:4], capsules[:, 4:8]))
+            expected = exporter.findBoundingBox(capsules.ravel(), 0.1)
+            np.testing.assert_array_less(np.asarray(expected[0]) - 1e-9, (spheres[:, 0:3] - spheres[:, 3:4]).min(axis=0))
+            np.testing.assert_array_less((spheres[:, 0:3] + spheres[:, 3:4]).max(axis=0), np.asarray(expected[1]) + 1e-9)
+            for _ in range(5):
+                shuffled = capsules[random.permutation(len(capsules))]
+                self.assertEqual(exporter.findBoundingBox(shuffled.ravel().tolist(), 0.1), expected, shape)
+                # Swap the ends, as a capsule is the same whichever end is the parent
+                swapped = np.hstack((shuffled[:, 4:8], shuffled[:, 0:4]))
+                self.assertEqual(exporter.findBoundingBox(swapped.ravel().tolist(), 0.1), expected, shape)
+
+    def testLeafFirst(self):
+        '''The root is in the bounding box when the first capsule is not connected to it.'''
+
+        sdCapsuleData = [1.5, 0.0, 0.0, 0.7, 3.0, 0.0, 0.0, 0.5, 0.0, 0.0, 0.0, 1.5, 1.5, 0.0, 0.0, 0.7]
+        self.assertEqual(SDFExporter.SDFExporter().findBoundingBox(sdCapsuleData, 0.1), ((-1.5, -1.5, -1.5), (3.5, 1.5, 1.5)))
+
+
+class CancelTest(unittest.TestCase):
+    '''Cancel exports over the file of a previous export.'''
+
+    m_sdCapsuleData = RigGenerator.RigGenerator(0).generate("tree", 10)
+
+    def setUp(self):
+        '''Create a folder with the file of a previous export.'''
+
+        self.m_folder = tempfile.mkdtemp()
+        self.m_filePath = os.path.join(self.m_folder, "rig")
+        self.m_previous = b"previous export"
+
+    def tearDown(self):
+        '''Remove the files.'''
+
+        shutil.rmtree(self.m_folder)
+
+    def writePrevious(self, _extension):
+        '''Write the file of a previous export.'''
+
+        with open(self.m_filePath + _extension, "wb") as outputFile:
+            outputFile.write(self.m_previous)
+
+    def readFile(self, _extension):
+        '''Read a file of the export.'''
+
+        with open(self.m_filePath + _extension, "rb") as inputFile:
+            return inputFile.read()
+
+    def cancelAfter(self, _calls):
+        '''Create a monitor which cancels the export after a number of progress reports.'''
+
+        monitor = ExportMonitor.ExportMonitor()
+        calls = [0]
+
+        def listener(_stage, _fraction):
+            calls[0] += 1
+            if calls[0] >= _calls:
+                monitor.cancel()
+        monitor.addListener(listener)
+        return monitor
+
+    def export(self, _monitor=None, **_settings):
+        '''Export the rig with small slabs, so the sampling reports progress many times.'''
+
+        exporter = SDFExporter.SDFExporter()
+        exporter.exportCapsules(self.m_filePath, self.m_sdCapsuleData, 0.05, 4.0, _monitor=_monitor, **_settings)
+        return exporter
+
+    def testCancelKeepsPrevious(self):
+        '''Cancelling an export while it samples or writes keeps the file of the previous export and removes the partly written file.'''
+
+        for output, extension, settings in (
+                ("points", ".ply", {}),
+                ("points", ".ply", {"_incremental": True}),
+                ("voxels", ".vpc", {}),
+                ("dense", ".sdf", {"_adaptive": False}),
+                ("mesh", ".ply", {})):
+            self.writePrevious(extension)
+            with self.assertRaises(ExportMonitor.ExportCancelled):
+                self.export(self.cancelAfter(2), _output=output, **settings)
+            self.assertEqual(self.readFile(extension), self.m_previous, output)
+            self.assertEqual(sorted(os.listdir(self.m_folder)), ["rig" + extension], output)
+            os.remove(self.m_filePath + extension)
+
+    def testCancelLevels(self):
+        '''Cancelling a progressive export keeps the levels already written and the file of the previous export, with any number of workers.'''
+
+        for workers in (1, 4):
+            self.writePrevious(".ply")
+            monitor = ExportMonitor.ExportMonitor()
+
+            def listener(_stage, _fraction):
+                if os.path.exists(self.m_filePath + "_lod1.ply"):
+                    monitor.cancel()
+            monitor.addListener(listener)
+            with self.assertRaises(ExportMonitor.ExportCancelled):
+                self.export(monitor, _levels=3, _workers=workers)
+            self.assertEqual(self.readFile(".ply"), self.m_previous)
+            self.assertEqual(sorted(os.listdir(self.m_folder)), ["rig.ply", "rig_lod1.ply", "rig_lod2.ply"])
+            for name in os.listdir(self.m_folder):
+                os.remove(os.path.join(self.m_folder, name))
+
+    def testReplace(self):
+        '''A complete export replaces the file of the previous export.'''
+
+        self.writePrevious(".ply")
+        self.export()
+        self.assertNotEqual(self.readFile(".ply"), self.m_previous)
+        self.assertEqual(sorted(os.listdir(self.m_folder)), ["rig.ply"])
+
+
+class ProgressiveTest(unittest.TestCase):
+    '''Export point clouds progressively with the other settings.'''
+
+    m_sdCapsuleData = RigGenerator.RigGenerator(2).generate("tree", 10)
+
+    def setUp(self):
+        '''Create a folder for the files.'''
+
+        self.m_folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        '''Remove the files.'''
+
+        shutil.rmtree(self.m_folder)
+
+    def readLevels(self, _filePath, _levels, _extension):
+        '''Read the file of each level, the last level first.'''
+
+        exporter = SDFExporter.SDFExporter()
+        levels = []
+        for lod in range(_levels):
+            with open(exporter.levelPath(_filePath, lod) + _extension, "rb") as inputFile:
+                levels.append(inputFile.read())
+        return levels
+
+    def testWorkers(self):
+        '''The levels are the same with any number of workers.'''
+
+        for output, extension in (("points", ".ply"), ("voxels", ".vpc")):
+            files = []
+            for workers in (1, 3):
+                filePath = os.path.join(self.m_folder, "%s%d" % (output, workers))
+                SDFExporter.SDFExporter().exportCapsules(filePath, self.m_sdCapsuleData, 0.05, 4.0, _workers=workers, _output=output, _levels=3)
+                files.append(self.readLevels(filePath, 3, extension))
+            self.assertEqual(files[0], files[1], output)
+
+    def testLastLevel(self):
+        '''The last level is the same file as a normal export, and the coarser levels are smaller.'''
+
+        for output, extension in (("points", ".ply"), ("voxels", ".vpc")):
+            for binary in (True, False):
+                if output == "voxels" and not binary:
+                    continue
+                filePath = os.path.join(self.m_folder, "progressive")
+                SDFExporter.SDFExporter().exportCapsules(filePath, self.m_sdCapsuleData, 0.05, 4.0, _binary=binary, _output=output, _levels=3)
+                levels = self.readLevels(filePath, 3, extension)
+                normalPath = os.path.join(self.m_folder, "normal")
+                SDFExporter.SDFExporter().exportCapsules(normalPath, self.m_sdCapsuleData, 0.05, 4.0, _binary=binary, _output=output)
+                with open(normalPath + extension, "rb") as inputFile:
+                    self.assertEqual(levels[0], inputFile.read(), "%s binary=%s" % (output, binary))
+                self.assertGreater(len(levels[0]), len(levels[1]))
+                self.assertGreater(len(levels[1]), len(levels[2]))
+
+    def testUnsupported(self):
+        '''Progressive exports can not be incremental or mirrored.'''
+
+        filePath = os.path.join(self.m_folder, "rig")
+        for settings in ({"_incremental": True}, {"_mirror": "auto"}, {"_mirror": (0, 0.0)}):
+            with self.assertRaises(ValueError):
+                SDFExporter.SDFExporter().exportCapsules(filePath, self.m_sdCapsuleData, 0.05, 4.0, _levels=3, **settings)
+        self.assertEqual(os.listdir(self.m_folder), [])
@@ -0,0 +1,122 @@
+import math
+import unittest
+import numpy as np
+import SDFExporter
+import SDFSampler
+import SmoothMin
+from benchmarks import RigGenerator
+
+
+class CullingTest(unittest.TestCase):
+    '''Compare the capsules culled by the CapsuleIndex with combining every capsule.'''
+
+    m_errorBound = 1e-4
+
+    def rigs(self):
+        '''Find random rigs of each shape.
+
+        Returns:
+            generator: The shape and sdCapsule data of each rig
+        '''
+
+        for seed, shape in enumerate(RigGenerator.RigGenerator.m_shapes):
+            yield shape, RigGenerator.RigGenerator(seed).generate(shape, 20)
+
+    def testCalculateCulledSD(self):
+        '''The culled signed distance has the same sign and is within the error bound at random positions.'''
+
+        for shape, sdCapsuleData in self.rigs():
+            for smoothness in (1.0, 4.0, 16.0):
+                culled = SDFSampler.SDFSampler(sdCapsuleData, smoothness, _errorBound=self.m_errorBound)
+                full = SDFSampler.SDFSampler(sdCapsuleData, smoothness)
+                bbox = SDFExporter.SDFExporter().findBoundingBox(sdCapsuleData, 0.1)
+                points = np.random.RandomState(0).uniform(bbox[0], bbox[1], (5000, 3))
+                culledNearest = np.empty(len(points))
+                fullNearest = np.empty(len(points))
+                culledValues = culled.calculateCulledSD(points, culledNearest)
+                fullValues = full.calculateSD(points, fullNearest)
+                message = "%s rig with k = %g" % (shape, smoothness)
+                np.testing.assert_array_equal(culledValues < 0, fullValues < 0, message)
+                # Positions with no capsules within the margin are given the margin
+                margin = culled.m_index.m_margin
+                near = culledNearest < margin
+                self.assertTrue(np.all(fullNearest[~near] >= margin), message)
+                np.testing.assert_allclose(culledNearest[near], fullNearest[near], rtol=0, atol=1e-12, err_msg=message)
+                # The margin only bounds the error on the surface, where the sum of the smooth min is close to 1
+                surface = near & (np.abs(fullValues) < 0.25)
+                self.assertTrue(np.all(np.abs(culledValues[surface] - fullValues[surface]) <= self.m_errorBound), message)
+
+    def testSampleSD(self):
+        '''Sampling the grid with the culled capsules finds the same points.'''
+
+        for shape, sdCapsuleData in self.rigs():
+            for smoothness in (1.0, 4.0, 16.0):
+                bbox = SDFExporter.SDFExporter().findBoundingBox(sdCapsuleData, 0.2)
+                culled = SDFSampler.SDFSampler(sdCapsuleData, smoothness, _errorBound=self.m_errorBound).sampleSD(0.2, bbox)
+                full = SDFSampler.SDFSampler(sdCapsuleData, smoothness).sampleSD(0.2, bbox)
+                self.assertGreater(len(full), 0)
+                np.testing.assert_array_equal(culled, full, "%s rig with k = %g" % (shape, smoothness))
+
+
+class ReferenceSampler(object):
+    '''The per-voxel sampling loop of PointCloudExporter, with the capsule distance in plain Python instead of Maya vectors.'''
+
+    def __init__(self, _sdCapsuleData, _smoothness):
+        '''Constructor
+
+        Args:
+            _sdCapsuleData: A list of the sdCapsule data in the format [x, y, z, r, x, y, z, r, ...]
+            _smoothness: The smoothness constant (k) for the smin function
+        '''
+
+        self.m_capsules = [tuple(_sdCapsuleData[i:i + 8]) for i in range(0, len(_sdCapsuleData), 8)]
+        self.m_kernel = SmoothMin.SmoothMin(_smoothness)
+
+    def frange(self, _start, _end, _step):
+        '''The float range of PointCloudExporter.frange.'''
+
+        count = max(0, int(math.ceil((_end - _start) / _step - 1e-6)))
+        for index in range(count):
+            yield _start + index * _step
+
+    def sdCapsule(self, _pos, _a, _r1, _b, _r2):
+        '''The signed distance capsule function of PointCloudExporter.sdCapsule.'''
+
+        pa = [_pos[i] - _a[i] for i in range(3)]
+        ba = [_b[i] - _a[i] for i in range(3)]
+        h = (pa[0] * ba[0] + pa[1] * ba[1] + pa[2] * ba[2]) / (ba[0] * ba[0] + ba[1] * ba[1] + ba[2] * ba[2])
+        h = min(max(h, 0.0), 1.0)
+        d = [pa[i] - ba[i] * h for i in range(3)]
+        return math.sqrt(d[0] * d[0] + d[1] * d[1] + d[2] * d[2]) - _r1 - h * (_r2 - _r1)
+
+    def calculateSD(self, _pos):
+        '''The smooth min of the distances to every capsule.'''
+
+        return self.m_kernel.smin([self.sdCapsule(_pos, s[0:3], s[3], s[4:7], s[7]) for s in self.m_capsules])
+
+    def sampleSD(self, _voxelSize, _boundingBox):
+        '''Find the points inside the mesh one voxel at a time.'''
+
+        points = []
+        for x in self.frange(_boundingBox[0][0], _boundingBox[1][0], _voxelSize):
+            for y in self.frange(_boundingBox[0][1], _boundingBox[1][1], _voxelSize):
+                for z in self.frange(_boundingBox[0][2], _boundingBox[1][2], _voxelSize):
+                    if self.calculateSD((x, y, z)) < 0:
+                        points.append((x, y, z))
+        return points
+
+
+class ReferenceTest(unittest.TestCase):
+    '''Compare the NumPy sampler with sampling one voxel at a time.'''
+
+    def testSampleSD(self):
+        '''The vectorised sampler finds the same points in the same order.'''
+
+        for seed, shape in enumerate(RigGenerator.RigGenerator.m_shapes):
+            sdCapsuleData = RigGenerator.RigGenerator(seed).generate(shape, 8)
+            bbox = SDFExporter.SDFExporter().findBoundingBox(sdCapsuleData, 0.2)
+            for smoothness in (1.0, 16.0):
+                expected = ReferenceSampler(sdCapsuleData, smoothness).sampleSD(0.2, bbox)
+                points = SDFSampler.SDFSampler(sdCapsuleData, smoothness).sampleSD(0.2, bbox)
+                self.assertGreater(len(expected), 0)
+                np.testing.assert_array_equal(points, np.array(expected).reshape(-1, 3), "%s rig with k = %g" % (shape, smoothness))
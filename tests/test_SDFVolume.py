@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import SDFExporter
+import SDFVolume
+
+
+class SDFVolumeTest(unittest.TestCase):
+    '''Export the volume of two NSpheres of the same radius, which is a capsule with a known signed distance.'''
+
+    m_voxelSize = 0.025
+    m_radius = 0.5
+    m_sdCapsuleData = [0.0, 0.0, 0.0, 0.5, 1.0, 0.5, 0.0, 0.5]
+
+    def setUp(self):
+        '''Create a folder for the files.'''
+
+        self.m_folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        '''Remove the files.'''
+
+        shutil.rmtree(self.m_folder)
+
+    def export(self, _output, _adaptive):
+        '''Export the volume and read it back.
+
+        Args:
+            _output: Either "sparse" or "dense"
+            _adaptive: Use the adaptive sampler
+
+        Returns:
+            numpy.ndarray, tuple, float: The signed distances, the origin and the voxel size
+        '''
+
+        filePath = os.path.join(self.m_folder, _output)
+        SDFExporter.SDFExporter().exportCapsules(filePath, self.m_sdCapsuleData, self.m_voxelSize, 4.0, _adaptive, None, _output=_output)
+        return SDFVolume.SDFVolume().read(filePath + ".sdf")
+
+    def analytic(self, _values, _origin, _voxelSize):
+        '''Find the distance from each voxel to the segment between the NSpheres, less the radius.'''
+
+        a = np.asarray(self.m_sdCapsuleData[0:3])
+        b = np.asarray(self.m_sdCapsuleData[4:7])
+        grid = np.indices(_values.shape).reshape(3, -1).T * _voxelSize + np.asarray(_origin)
+        h = np.clip(np.dot(grid - a, b - a) / np.dot(b - a, b - a), 0.0, 1.0)
+        closest = a + h[:, np.newaxis] * (b - a)
+        return (np.linalg.norm(grid - closest, axis=1) - self.m_radius).reshape(_values.shape)
+
+    def testDense(self):
+        '''Every value of the dense volume is the distance to the capsule.'''
+
+        values, origin, voxelSize = self.export("dense", False)
+        self.assertEqual(voxelSize, self.m_voxelSize)
+        bbox = SDFExporter.SDFExporter().findBoundingBox(self.m_sdCapsuleData, self.m_voxelSize)
+        self.assertEqual(tuple(origin), bbox[0])
+        self.assertEqual(values.shape, SDFExporter.SDFSampler.SDFSampler.dims(self.m_voxelSize, bbox))
+        np.testing.assert_allclose(values, self.analytic(values, origin, voxelSize), rtol=0, atol=1e-6)
+
+    def testSparse(self):
+        '''The sparse volume is the dense volume clamped to the narrow band, with either sampler.'''
+
+        dense = self.export("dense", False)[0]
+        band = 3 * self.m_voxelSize
+        for adaptive in (False, True):
+            sparse = self.export("sparse", adaptive)[0]
+            self.assertEqual(sparse.shape, dense.shape)
+            np.testing.assert_array_equal(sparse, np.clip(dense, np.float32(-band), np.float32(band)))
+            # The tiles inside and outside are not stored
+            self.assertLess(os.path.getsize(os.path.join(self.m_folder, "sparse.sdf")), os.path.getsize(os.path.join(self.m_folder, "dense.sdf")))
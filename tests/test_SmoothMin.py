@@ -0,0 +1,94 @@
+import math
+import unittest
+import numpy as np
+import SmoothMin
+
+
+def referenceExponential(_k, _values):
+    '''The exponential smin of PointCloudExporter.smin before SmoothMin, summing every exponential.'''
+
+    res = 0.0
+    for value in _values:
+        res += math.exp(-_k * value)
+    return math.copysign(math.log(res) / _k, min(_values))
+
+
+def referencePolynomial(_k, _values):
+    '''The polynomial smin folded over every value in increasing order, without stopping early.'''
+
+    width = 4.0 * math.log(2.0) / _k
+    values = sorted(_values)
+    result = values[0]
+    for value in values[1:]:
+        h = max(width - abs(value - result), 0.0) / width
+        result = min(result, value) - h * h * width * 0.25
+    return math.copysign(result, values[0])
+
+
+class SmoothMinTest(unittest.TestCase):
+    '''Compare the smooth min of both flavours with the formulas they replace.'''
+
+    m_smoothness = (1.0, 4.0, 16.0, 50.0)
+
+    def values(self, _seed, _rows=200, _columns=30):
+        '''Random distances, with some rows of only positive distances.'''
+
+        values = np.random.RandomState(_seed).uniform(-2.0, 3.0, (_rows, _columns))
+        values[::3] += 2.0
+        return values
+
+    def testExponential(self):
+        '''The exponential smin matches the sum of every exponential, with the sign of the smallest distance.'''
+
+        for seed, k in enumerate(self.m_smoothness):
+            values = self.values(seed)
+            kernel = SmoothMin.SmoothMin(k)
+            expected = np.array([referenceExponential(k, row) for row in values.tolist()])
+            rows = kernel.sminRows(values)
+            np.testing.assert_allclose(rows, expected, rtol=1e-9, atol=1e-9 / k)
+            np.testing.assert_array_equal(np.sign(rows), np.sign(values.min(axis=1)))
+            np.testing.assert_allclose([kernel.smin(row) for row in values.tolist()], expected, rtol=1e-9, atol=1e-9 / k)
+
+    def testPolynomial(self):
+        '''The polynomial smin stops at the first distance a blend width away, which gives the same result as the full fold.'''
+
+        for seed, k in enumerate(self.m_smoothness):
+            values = self.values(seed)
+            # Ties and distances just inside the blend width
+            values[1::4, 1] = values[1::4, 0]
+            kernel = SmoothMin.SmoothMin(k, SmoothMin.SmoothMin.m_polynomial)
+            expected = np.array([referencePolynomial(k, row) for row in values.tolist()])
+            np.testing.assert_array_equal(kernel.sminRows(values), expected)
+            np.testing.assert_array_equal([kernel.smin(row) for row in values.tolist()], expected)
+            np.testing.assert_array_equal(np.sign(expected), np.sign(values.min(axis=1)))
+
+    def testOffset(self):
+        '''The smooth min of distances further than the offset is at most the offset below the smallest distance.'''
+
+        for flavour in SmoothMin.SmoothMin.m_flavours:
+            for k in self.m_smoothness:
+                kernel = SmoothMin.SmoothMin(k, flavour)
+                values = np.abs(self.values(4)) + kernel.offset(30)
+                rows = kernel.sminRows(values)
+                self.assertTrue((rows <= values.min(axis=1) + 1e-12).all())
+                self.assertTrue((rows >= values.min(axis=1) - kernel.offset(values.shape[1]) - 1e-12).all())
+
+    def testRange(self):
+        '''Distances whose exponentials overflow or underflow give the smallest distance instead of an error.'''
+
+        kernel = SmoothMin.SmoothMin(50.0)
+        with self.assertRaises(OverflowError):
+            referenceExponential(50.0, [-300.0, -299.0, 5.0])
+        with self.assertRaises(ValueError):
+            referenceExponential(50.0, [400.0, 401.0])
+        for values, expected in (([-300.0, -299.0, 5.0], -300.0), ([400.0, 401.0], 400.0)):
+            self.assertAlmostEqual(kernel.smin(values), expected, 12)
+            result = kernel.sminRows(np.array([values]))
+            self.assertTrue(np.isfinite(result).all())
+            self.assertAlmostEqual(float(result[0]), expected, 12)
+
+    def testUnknownFlavour(self):
+        '''An unknown flavour is rejected.'''
+
+        with self.assertRaises(ValueError):
+            SmoothMin.SmoothMin(4.0, "cubic")
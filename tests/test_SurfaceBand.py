@@ -0,0 +1,121 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import PLYFile
+import SDFExporter
+import SDFSampler
+import SurfaceBand
+from benchmarks import RigGenerator
+
+
+class SurfaceBandTest(unittest.TestCase):
+    '''Find the points near the surface of random rigs, snap them and find their normals.'''
+
+    m_voxelSize = 0.15
+    m_smoothness = 16.0
+
+    def setUp(self):
+        '''Create a folder for the files.'''
+
+        self.m_folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        '''Remove the files.'''
+
+        shutil.rmtree(self.m_folder)
+
+    def surface(self, _sdCapsuleData, _snap=False, _normals=False):
+        '''Find the surface points of capsules from the values of the whole grid.
+
+        Returns:
+            SDFSampler, numpy.ndarray: The sampler of every capsule and the points
+        '''
+
+        boundingBox = SDFExporter.SDFExporter().findBoundingBox(_sdCapsuleData, self.m_voxelSize)
+        sampler = SDFSampler.SDFSampler(_sdCapsuleData, self.m_smoothness)
+        xs, ys, zs = sampler.axes(self.m_voxelSize, boundingBox)
+        surface = SurfaceBand.SurfaceBand(sampler, self.m_voxelSize, _snap, _normals)
+        blocks = surface.iterateSurface(sampler.iterateValues(xs, ys, zs, 8), xs, ys, zs)
+        return sampler, np.concatenate([np.zeros((0, 6 if _normals else 3))] + list(blocks))
+
+    def rigs(self):
+        '''Generate a rig of each shape.'''
+
+        for seed, shape in enumerate(RigGenerator.RigGenerator.m_shapes):
+            yield shape, RigGenerator.RigGenerator(seed).generate(shape, 10)
+
+    def testBand(self):
+        '''The points kept are every voxel with an absolute signed distance less than the band.'''
+
+        for shape, sdCapsuleData in self.rigs():
+            sampler, points = self.surface(sdCapsuleData)
+            self.assertGreater(len(points), 0, shape)
+            self.assertTrue((np.abs(sampler.calculateSD(points)) < self.m_voxelSize).all(), shape)
+            boundingBox = SDFExporter.SDFExporter().findBoundingBox(sdCapsuleData, self.m_voxelSize)
+            values = np.concatenate(list(sampler.iterateValues(*(sampler.axes(self.m_voxelSize, boundingBox) + [8]))))
+            self.assertEqual(len(points), int((np.abs(values) < self.m_voxelSize).sum()), shape)
+
+    def testSnap(self):
+        '''Snapping never moves a point further from the surface, and moves them much closer on average.'''
+
+        for shape, sdCapsuleData in self.rigs():
+            sampler, points = self.surface(sdCapsuleData)
+            snapped = self.surface(sdCapsuleData, _snap=True)[1]
+            self.assertEqual(snapped.shape, points.shape, shape)
+            before = np.abs(sampler.calculateSD(points))
+            after = np.abs(sampler.calculateSD(snapped))
+            self.assertTrue((after <= before).all(), shape)
+            self.assertLess(after.mean(), 0.1 * before.mean(), shape)
+            # A point is never moved further than the band by a step
+            self.assertTrue((np.abs(snapped - points).max(axis=1) <= 2 * self.m_voxelSize + 1e-9).all(), shape)
+
+    def testNormals(self):
+        '''The normals have unit length and point away from the capsules.'''
+
+        for shape, sdCapsuleData in self.rigs():
+            sampler, points = self.surface(sdCapsuleData, _snap=True, _normals=True)
+            normals = points[:, 3:6]
+            np.testing.assert_allclose(np.sqrt((normals * normals).sum(axis=1)), 1.0, rtol=0, atol=1e-9)
+            # The smallest capsule distance grows along the normal, apart from on the creases where the nearest capsule changes
+            step = 0.01
+            ahead = sampler.sdCapsules(points[:, 0:3] + step * normals).min(axis=1)
+            behind = sampler.sdCapsules(points[:, 0:3] - step * normals).min(axis=1)
+            self.assertGreater((ahead > behind).mean(), 0.995, shape)
+
+    def testCapsuleNormals(self):
+        '''The normals of a single capsule point straight away from its axis.'''
+
+        sdCapsuleData = [0.0, 0.0, 0.0, 0.5, 1.0, 0.0, 0.0, 0.5]
+        sampler, points = self.surface(sdCapsuleData, _snap=True, _normals=True)
+        closest = np.column_stack((np.clip(points[:, 0], 0.0, 1.0), np.zeros(len(points)), np.zeros(len(points))))
+        radial = points[:, 0:3] - closest
+        radial /= np.sqrt((radial * radial).sum(axis=1))[:, np.newaxis]
+        self.assertGreater(((radial * points[:, 3:6]).sum(axis=1)).min(), 0.999)
+        np.testing.assert_allclose(np.abs(sampler.calculateSD(points[:, 0:3])), 0.0, atol=1e-6)
+
+    def testWrite(self):
+        '''The points and normals of a surface export are read back from the .ply file in both formats.'''
+
+        sdCapsuleData = RigGenerator.RigGenerator(2).generate("tree", 10)
+        files = []
+        for binary in (True, False):
+            filePath = os.path.join(self.m_folder, "binary" if binary else "ascii")
+            SDFExporter.SDFExporter().exportCapsules(filePath, sdCapsuleData, self.m_voxelSize, self.m_smoothness, _binary=binary, _output="surface", _snap=True, _normals=True)
+            files.append((PLYFile.PLYFile().read(filePath + ".ply"), PLYFile.PLYFile().readNormals(filePath + ".ply")))
+        points, normals = files[0]
+        self.assertGreater(len(points), 0)
+        self.assertEqual(normals.shape, points.shape)
+        np.testing.assert_array_equal(files[1][0], points)
+        np.testing.assert_array_equal(files[1][1], normals)
+        np.testing.assert_allclose(np.sqrt((normals.astype(np.float64) ** 2).sum(axis=1)), 1.0, atol=1e-6)
+        # The blocks written are the same as the points and normals found directly
+        filePath = os.path.join(self.m_folder, "direct.ply")
+        expected = self.surface(sdCapsuleData, _snap=True, _normals=True)[1]
+        PLYFile.PLYFile().writeStream(filePath, [expected], True, True)
+        np.testing.assert_array_equal(PLYFile.PLYFile().read(filePath), expected[:, 0:3].astype(np.float32))
+        np.testing.assert_array_equal(PLYFile.PLYFile().readNormals(filePath), expected[:, 3:6].astype(np.float32))
+        # Points without normals have no normals in the file
+        PLYFile.PLYFile().writeStream(filePath, [expected[:, 0:3]], True, False)
+        self.assertIsNone(PLYFile.PLYFile().readNormals(filePath))
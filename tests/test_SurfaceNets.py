@@ -0,0 +1,64 @@
+import unittest
+import numpy as np
+import SurfaceNets
+
+
+class SurfaceNetsTest(unittest.TestCase):
+    '''Mesh the signed distance volume of a sphere.'''
+
+    m_voxelSize = 0.1
+    m_radius = 1.0
+    m_origin = (-1.5, -1.5, -1.5)
+
+    def setUp(self):
+        '''Sample the signed distance of the sphere on a grid and mesh it.'''
+
+        grid = np.indices((31, 31, 31)).transpose(1, 2, 3, 0) * self.m_voxelSize + np.asarray(self.m_origin)
+        self.m_values = np.linalg.norm(grid, axis=-1) - self.m_radius
+        self.m_vertices, self.m_faces = SurfaceNets.SurfaceNets().mesh(self.m_values, self.m_origin, self.m_voxelSize)
+
+    def edges(self):
+        '''Find the edges of the triangles.
+
+        Returns:
+            numpy.ndarray, numpy.ndarray: The (E, 2) sorted vertex indices of each edge and the number of triangles using it
+        '''
+
+        edges = np.concatenate([self.m_faces[:, [0, 1]], self.m_faces[:, [1, 2]], self.m_faces[:, [2, 0]]])
+        return np.unique(np.sort(edges, axis=1), axis=0, return_counts=True)
+
+    def testClosed(self):
+        '''Every edge is used by exactly two triangles in opposite directions, and the mesh is a sphere.'''
+
+        edges, counts = self.edges()
+        np.testing.assert_array_equal(counts, 2)
+        directed = np.concatenate([self.m_faces[:, [0, 1]], self.m_faces[:, [1, 2]], self.m_faces[:, [2, 0]]])
+        self.assertEqual(len(np.unique(directed, axis=0)), len(directed))
+        # The Euler characteristic of a sphere
+        self.assertEqual(len(self.m_vertices) - len(edges) + len(self.m_faces), 2)
+
+    def testCounts(self):
+        '''There is a vertex in every cell where the sign changes and two triangles for every grid edge where it changes.'''
+
+        inside = np.pad(self.m_values < 0, 1, "constant", constant_values=False)
+        cells = np.zeros(tuple(n - 1 for n in inside.shape), dtype=np.int64)
+        for i in range(2):
+            for j in range(2):
+                for k in range(2):
+                    cells += inside[i:i + cells.shape[0], j:j + cells.shape[1], k:k + cells.shape[2]]
+        self.assertEqual(len(self.m_vertices), np.count_nonzero((cells > 0) & (cells < 8)))
+        crossings = sum(np.count_nonzero(np.diff(inside, axis=axis)) for axis in range(3))
+        self.assertEqual(len(self.m_faces), 2 * crossings)
+        self.assertTrue(np.all(self.m_faces >= 0) and np.all(self.m_faces < len(self.m_vertices)))
+
+    def testVertices(self):
+        '''The vertices are within a voxel of the sphere.'''
+
+        radii = np.linalg.norm(self.m_vertices, axis=1)
+        self.assertLess(np.abs(radii - self.m_radius).max(), self.m_voxelSize)
+
+    def testEmpty(self):
+        '''A volume without a surface has no mesh.'''
+
+        vertices, faces = SurfaceNets.SurfaceNets().mesh(np.ones((4, 4, 4)), self.m_origin, self.m_voxelSize)
+        self.assertEqual((len(vertices), len(faces)), (0, 0))
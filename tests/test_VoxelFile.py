@@ -0,0 +1,160 @@
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import SDFExporter
+import SDFSampler
+import VoxelFile
+import VoxelPoints
+from benchmarks import RigGenerator
+
+
+class VoxelFileTest(unittest.TestCase):
+    '''Write voxel point clouds and read them back in both encodings.'''
+
+    m_voxelSize = 0.1
+    m_smoothness = 4.0
+
+    def setUp(self):
+        '''Create a folder for the files.'''
+
+        self.m_folder = tempfile.mkdtemp()
+        self.m_file = VoxelFile.VoxelFile()
+
+    def tearDown(self):
+        '''Remove the files.'''
+
+        shutil.rmtree(self.m_folder)
+
+    def path(self, _name):
+        '''Find the path of a file in the folder.'''
+
+        return os.path.join(self.m_folder, _name)
+
+    def sample(self, _shape, _seed):
+        '''Sample the points of a random rig.
+
+        Returns:
+            numpy.ndarray, tuple, tuple: The points, the bounding box and the number of voxels along each axis
+        '''
+
+        sdCapsuleData = RigGenerator.RigGenerator(_seed).generate(_shape, 10)
+        boundingBox = SDFExporter.SDFExporter().findBoundingBox(sdCapsuleData, self.m_voxelSize)
+        sampler = SDFSampler.SDFSampler(sdCapsuleData, self.m_smoothness)
+        return sampler.sampleSD(self.m_voxelSize, boundingBox), boundingBox, SDFSampler.SDFSampler.dims(self.m_voxelSize, boundingBox)
+
+    def testRoundTrip(self):
+        '''The positions read back are exactly the sampled points, in both encodings, memory mapped or read.'''
+
+        for seed, shape in enumerate(RigGenerator.RigGenerator.m_shapes):
+            points, boundingBox, dims = self.sample(shape, seed)
+            self.assertGreater(len(points), 0)
+            for runs in (True, False):
+                filePath = self.path("rig.vpc")
+                self.assertEqual(self.m_file.write(filePath, points, dims, boundingBox[0], self.m_voxelSize, runs), len(points))
+                header = self.m_file.readHeader(filePath)
+                self.assertEqual(header["encoding"], VoxelFile.VoxelFile.m_runs if runs else VoxelFile.VoxelFile.m_indices)
+                self.assertEqual(header["indexType"], np.dtype("<u2"))
+                self.assertEqual(tuple(header["dims"]), tuple(dims))
+                self.assertEqual(tuple(header["origin"]), tuple(boundingBox[0]))
+                self.assertEqual(header["voxelSize"], self.m_voxelSize)
+                self.assertEqual(header["count"], len(points))
+                for mmap in (True, False):
+                    voxels = self.m_file.read(filePath, mmap)
+                    self.assertEqual(len(voxels), len(points))
+                    np.testing.assert_array_equal(voxels.points(), points, "%s runs=%s mmap=%s" % (shape, runs, mmap))
+                    del voxels
+                # Runs take fewer records than points
+                if runs:
+                    self.assertLess(header["records"], len(points))
+                else:
+                    self.assertEqual(header["records"], len(points))
+
+    def testExport(self):
+        '''A voxels export has the points of sampling the grid.'''
+
+        sdCapsuleData = RigGenerator.RigGenerator(1).generate("tree", 10)
+        exporter = SDFExporter.SDFExporter()
+        filePath = self.path("rig")
+        exporter.exportCapsules(filePath, sdCapsuleData, self.m_voxelSize, self.m_smoothness, _output="voxels")
+        boundingBox = exporter.findBoundingBox(sdCapsuleData, self.m_voxelSize)
+        expected = exporter.sampleSD(sdCapsuleData, self.m_voxelSize, self.m_smoothness, boundingBox)
+        np.testing.assert_array_equal(self.m_file.read(filePath + ".vpc").points(), expected)
+
+    def testRuns(self):
+        '''Expanding the runs gives the indices back, including runs of a whole row.'''
+
+        dims = (3, 4, 5)
+        indices = np.array([[0, 0, 1], [0, 0, 2], [0, 0, 4], [0, 1, 0], [1, 2, 0], [1, 2, 1], [1, 2, 2], [1, 2, 3], [1, 2, 4], [1, 3, 0], [2, 0, 4], [2, 1, 0]])
+        runs = self.m_file.findRuns(indices)
+        np.testing.assert_array_equal(runs, [[0, 0, 1, 2], [0, 0, 4, 1], [0, 1, 0, 1], [1, 2, 0, 5], [1, 3, 0, 1], [2, 0, 4, 1], [2, 1, 0, 1]])
+        np.testing.assert_array_equal(self.m_file.expandRuns(runs), indices)
+        # A row with every voxel inside is one run of dims[2] points
+        self.assertIn(dims[2], runs[:, 3])
+        voxels = VoxelPoints.VoxelPoints(indices.astype(np.uint16), (0.0, 0.0, 0.0), 0.5)
+        self.m_file.write(self.path("runs.vpc"), voxels, dims, (0.0, 0.0, 0.0), 0.5)
+        records, header = self.m_file.readRecords(self.path("runs.vpc"))
+        np.testing.assert_array_equal(records, runs)
+        np.testing.assert_array_equal(self.m_file.read(self.path("runs.vpc")).m_indices, indices)
+        # Random sorted indices
+        grid = np.random.RandomState(0).uniform(size=(20, 20, 20)) < 0.7
+        indices = np.argwhere(grid)
+        np.testing.assert_array_equal(self.m_file.expandRuns(self.m_file.findRuns(indices)), indices)
+        self.assertEqual(self.m_file.findRuns(np.zeros((0, 3))).shape, (0, 4))
+
+    def testLargeAxis(self):
+        '''Grids with an axis of 65536 voxels or more use uint32 records, and a whole row is one run.'''
+
+        dims = (2, 1, 70000)
+        z = np.arange(dims[2])
+        indices = np.vstack((np.column_stack((np.zeros_like(z), np.zeros_like(z), z)), [[1, 0, 65535], [1, 0, 65536], [1, 0, 69999]]))
+        origin = (-1.0, 2.0, -3.5)
+        positions = VoxelPoints.VoxelPoints(indices, origin, 0.25).points()
+        for runs in (True, False):
+            filePath = self.path("large.vpc")
+            self.m_file.write(filePath, positions, dims, origin, 0.25, runs)
+            records, header = self.m_file.readRecords(filePath)
+            self.assertEqual(header["indexType"], np.dtype("<u4"))
+            self.assertEqual(records.dtype, np.dtype("<u4"))
+            if runs:
+                np.testing.assert_array_equal(records, [[0, 0, 0, dims[2]], [1, 0, 65535, 2], [1, 0, 69999, 1]])
+            for mmap in (True, False):
+                np.testing.assert_array_equal(self.m_file.read(filePath, mmap).points(), positions)
+            del records
+
+    def testEmpty(self):
+        '''A file with no points is read back as no points.'''
+
+        for runs in (True, False):
+            filePath = self.path("empty.vpc")
+            self.assertEqual(self.m_file.writeStream(filePath, [np.zeros((0, 3)), np.zeros((0, 3))], (4, 4, 4), (0.0, 0.0, 0.0), 0.1, runs), 0)
+            self.assertEqual(os.path.getsize(filePath), VoxelFile.VoxelFile.m_headerSize)
+            for mmap in (True, False):
+                voxels = self.m_file.read(filePath, mmap)
+                self.assertEqual(len(voxels), 0)
+                self.assertEqual(voxels.points().shape, (0, 3))
+
+    def testStream(self):
+        '''Writing the points in blocks of x planes gives the same file as writing them at once.'''
+
+        points, boundingBox, dims = self.sample("chain", 0)
+        blocks = [points[(points[:, 0] >= x) & (points[:, 0] < x + 8 * self.m_voxelSize - 1e-9)] for x in boundingBox[0][0] + np.arange(0, dims[0], 8) * self.m_voxelSize]
+        self.assertEqual(sum(len(block) for block in blocks), len(points))
+        self.m_file.writeStream(self.path("blocks.vpc"), blocks, dims, boundingBox[0], self.m_voxelSize)
+        self.m_file.write(self.path("whole.vpc"), points, dims, boundingBox[0], self.m_voxelSize)
+        with open(self.path("blocks.vpc"), "rb") as blocksFile, open(self.path("whole.vpc"), "rb") as wholeFile:
+            self.assertEqual(blocksFile.read(), wholeFile.read())
+
+    def testInvalid(self):
+        '''A file which is not a voxel point cloud is not read.'''
+
+        filePath = self.path("rig.vpc")
+        with open(filePath, "wb") as outputFile:
+            outputFile.write(b"ply\n" + b"\0" * VoxelFile.VoxelFile.m_headerSize)
+        with self.assertRaises(IOError):
+            self.m_file.read(filePath)
+        with open(filePath, "wb") as outputFile:
+            outputFile.write(b"VOXP")
+        with self.assertRaises(IOError):
+            self.m_file.read(filePath)
@@ -0,0 +1,88 @@
+import unittest
+import numpy as np
+import SDFExporter
+import SDFSampler
+import VoxelPoints
+from benchmarks import RigGenerator
+
+
+class GridTest(unittest.TestCase):
+    '''Check the grid positions at voxel sizes where adding the step each time drifted.'''
+
+    def accumulated(self, _start, _end, _step):
+        '''Count positions by adding the step each time, as the axis did before.'''
+
+        count = 0
+        position = _start
+        while position < _end:
+            count += 1
+            position += _step
+        return count
+
+    def testAxisCount(self):
+        '''The number of positions is the length of the range over the step, where adding the step gave an extra plane.'''
+
+        for voxelSize, start, end, count in ((0.05, 0.0, 3.0, 60), (0.05, 0.0, 6.0, 120), (0.05, 0.6, 1.2, 12),
+                                             (0.3, 0.0, 3.0, 10), (0.3, 0.0, 6.0, 20), (0.3, -0.3, 0.6, 3)):
+            message = "[%g, %g) at %g" % (start, end, voxelSize)
+            self.assertEqual(SDFSampler.SDFSampler.axisCount(start, end, voxelSize), count, message)
+            axis = SDFSampler.SDFSampler([0.0] * 8, 1.0).axis(start, end, voxelSize)
+            self.assertEqual(len(axis), count, message)
+            np.testing.assert_array_equal(axis, start + np.arange(count) * voxelSize, message)
+            self.assertLess(axis[-1], end, message)
+        # These ranges gained a plane at the end of the axis
+        self.assertEqual(self.accumulated(0.0, 3.0, 0.05), 61)
+        self.assertEqual(self.accumulated(0.0, 3.0, 0.3), 11)
+
+    def testDims(self):
+        '''The grid of a bounding box from findBoundingBox has the length of each side over the voxel size.'''
+
+        sampler = SDFSampler.SDFSampler([0.0] * 8, 1.0)
+        for voxelSize in (0.05, 0.3):
+            for seed, shape in enumerate(RigGenerator.RigGenerator.m_shapes):
+                sdCapsuleData = RigGenerator.RigGenerator(seed).generate(shape, 10)
+                bbox = SDFExporter.SDFExporter().findBoundingBox(sdCapsuleData, voxelSize)
+                dims = SDFSampler.SDFSampler.dims(voxelSize, bbox)
+                message = "%s rig at %g" % (shape, voxelSize)
+                self.assertEqual(dims, tuple(int(round((bbox[1][i] - bbox[0][i]) / voxelSize)) for i in range(3)), message)
+                self.assertEqual(dims, tuple(len(sampler.axis(bbox[0][i], bbox[1][i], voxelSize)) for i in range(3)), message)
+
+
+class VoxelPointsTest(unittest.TestCase):
+    '''Keep sampled points as voxel indices.'''
+
+    def testRoundTrip(self):
+        '''The positions of the indices are exactly the sampled points.'''
+
+        for voxelSize in (0.05, 0.3):
+            for seed, shape in enumerate(RigGenerator.RigGenerator.m_shapes):
+                sdCapsuleData = RigGenerator.RigGenerator(seed).generate(shape, 10)
+                bbox = SDFExporter.SDFExporter().findBoundingBox(sdCapsuleData, voxelSize)
+                dims = SDFSampler.SDFSampler.dims(voxelSize, bbox)
+                points = SDFSampler.SDFSampler(sdCapsuleData, 4.0).sampleSD(voxelSize, bbox)
+                self.assertGreater(len(points), 0)
+                voxels = VoxelPoints.VoxelPoints.fromPoints(points, bbox[0], voxelSize, dims)
+                message = "%s rig at %g" % (shape, voxelSize)
+                self.assertEqual(voxels.m_indices.dtype, np.uint16, message)
+                self.assertEqual(len(voxels), len(points), message)
+                np.testing.assert_array_equal(voxels.points(), points, message)
+
+    def testIndexType(self):
+        '''Grids with an axis of 65536 voxels or more need uint32 indices.'''
+
+        self.assertEqual(VoxelPoints.VoxelPoints.indexType((65535, 1, 1)), np.uint16)
+        self.assertEqual(VoxelPoints.VoxelPoints.indexType((1, 65536, 1)), np.uint32)
+
+    def testOffGrid(self):
+        '''Points outside the grid or between grid positions are not voxels.'''
+
+        origin = (-0.3, 0.0, 0.6)
+        dims = (4, 5, 6)
+        points = VoxelPoints.VoxelPoints([[0, 0, 0], [3, 4, 5]], origin, 0.3).points()
+        self.assertEqual(len(VoxelPoints.VoxelPoints.fromPoints(points, origin, 0.3, dims)), 2)
+        for offset in ((0.1, 0.0, 0.0), (0.0, 0.0, 0.001), (0.0, 1e-5, 0.0)):
+            with self.assertRaises(ValueError):
+                VoxelPoints.VoxelPoints.fromPoints(points + offset, origin, 0.3, dims)
+        for offset in ((-0.3, 0.0, 0.0), (0.0, 0.3, 0.0)):
+            with self.assertRaises(ValueError):
+                VoxelPoints.VoxelPoints.fromPoints(points + offset, origin, 0.3, dims)